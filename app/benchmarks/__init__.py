@@ -0,0 +1,8 @@
+"""Microbenchmarks das camadas de CRUD e serialização
+
+Uso (a partir de app/):
+
+    python -m benchmarks run --output benchmarks/baseline.json
+    python -m benchmarks compare benchmarks/baseline.json atual.json
+    python -m benchmarks explain --threshold 10000
+"""
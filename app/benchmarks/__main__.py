@@ -0,0 +1,135 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.compare import compare, format_report, load, regressions
+
+# Fora da árvore: o banco populado passa de centenas de MB
+DEFAULT_DATABASE_URL = "sqlite:///" + os.path.join(
+    tempfile.gettempdir(), "biblioteca-benchmark.db"
+)
+DEFAULT_SIZES = (100, 1000, 10000)
+
+
+def _sizes(value: str):
+    return tuple(int(size) for size in value.split(","))
+
+
+def cmd_run(args) -> int:
+    # Importado aqui: compare não precisa carregar a aplicação
+    from sqlmodel import create_engine
+
+    from benchmarks.suite import run_suite
+
+    engine = create_engine(args.database_url)
+
+    def progress(name, result):
+        print(f"{name:<45} {result['median_ms']:>10.3f} ms", file=sys.stderr)
+
+    result = run_suite(
+        engine,
+        sizes=args.sizes,
+        repeat=args.repeat,
+        only=args.only,
+        progress=progress,
+    )
+    engine.dispose()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"Resultados salvos em {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_compare(args) -> int:
+    comparisons = compare(load(args.baseline), load(args.current))
+    flagged = regressions(
+        comparisons, threshold=args.threshold, min_delta_ms=args.min_delta_ms
+    )
+    print(format_report(comparisons, flagged))
+    if flagged:
+        print(f"\n{len(flagged)} regressão(ões) acima de {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def cmd_explain(args) -> int:
+    from sqlmodel import create_engine
+
+    from benchmarks.explain import (
+        analyze,
+        crud_instances,
+        discover_finders,
+        format_report,
+    )
+    from benchmarks.suite import prepare_database
+
+    engine = create_engine(args.database_url)
+    prepare_database(engine, DEFAULT_SIZES)
+    finders, skipped = discover_finders(crud_instances())
+    results = analyze(engine, finders, threshold=args.threshold)
+    engine.dispose()
+    print(format_report(results, skipped, verbose=args.verbose))
+    flagged = [result for result in results if result.scans or result.error]
+    if flagged:
+        print(
+            f"\n{len(flagged)} finder(s) com varredura completa em tabela com "
+            f"{args.threshold:,}+ linhas (ou erro)"
+        )
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Microbenchmarks da API"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Executa os cenários e grava o JSON")
+    run.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL),
+        help="Banco de benchmark (populado automaticamente se vazio)",
+    )
+    run.add_argument("--sizes", type=_sizes, default=DEFAULT_SIZES)
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--only", help="Roda só os cenários que contêm o texto")
+    run.add_argument("--output", default="benchmarks/resultado.json")
+    run.set_defaults(func=cmd_run)
+
+    cmp = sub.add_parser("compare", help="Compara um resultado com o baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument(
+        "--threshold", type=float, default=0.15, help="Variação relativa tolerada"
+    )
+    cmp.add_argument(
+        "--min-delta-ms", type=float, default=0.05, help="Diferença mínima absoluta"
+    )
+    cmp.set_defaults(func=cmd_compare)
+
+    exp = sub.add_parser(
+        "explain", help="EXPLAIN dos finders dos CRUDs, acusando varreduras"
+    )
+    exp.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL),
+        help="Banco populado (populado automaticamente se vazio)",
+    )
+    exp.add_argument(
+        "--threshold",
+        type=int,
+        default=10_000,
+        help="Linhas a partir das quais uma varredura completa é acusada",
+    )
+    exp.add_argument("--verbose", action="store_true", help="Mostra todos os planos")
+    exp.set_defaults(func=cmd_explain)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
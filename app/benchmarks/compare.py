@@ -0,0 +1,66 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline_ms: Optional[float]
+    current_ms: Optional[float]
+
+    @property
+    def change(self) -> Optional[float]:
+        """Variação relativa da mediana (0.25 = 25% mais lento)"""
+        if not self.baseline_ms or self.current_ms is None:
+            return None
+        return self.current_ms / self.baseline_ms - 1
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], metric: str = "median_ms"
+) -> List[Comparison]:
+    """Pareia os cenários dos dois resultados (ausentes de um lado ficam None)"""
+    base, atual = baseline["results"], current["results"]
+    return [
+        Comparison(
+            name,
+            base[name][metric] if name in base else None,
+            atual[name][metric] if name in atual else None,
+        )
+        for name in sorted(base.keys() | atual.keys())
+    ]
+
+
+def regressions(
+    comparisons: List[Comparison], *, threshold: float, min_delta_ms: float
+) -> List[Comparison]:
+    """Cenários mais lentos que o limiar relativo e a diferença mínima absoluta
+
+    A diferença mínima evita acusar ruído em operações de microssegundos.
+    """
+    return [
+        c
+        for c in comparisons
+        if c.change is not None
+        and c.change > threshold
+        and c.current_ms - c.baseline_ms > min_delta_ms
+    ]
+
+
+def format_report(comparisons: List[Comparison], flagged: List[Comparison]) -> str:
+    flagged_names = {c.name for c in flagged}
+    width = max((len(c.name) for c in comparisons), default=10)
+    lines = [f"{'cenário':<{width}}  {'base ms':>10}  {'atual ms':>10}  {'var.':>8}"]
+    for c in comparisons:
+        base = f"{c.baseline_ms:.3f}" if c.baseline_ms is not None else "-"
+        atual = f"{c.current_ms:.3f}" if c.current_ms is not None else "-"
+        change = f"{c.change:+.1%}" if c.change is not None else "novo/removido"
+        marca = "  REGRESSÃO" if c.name in flagged_names else ""
+        lines.append(f"{c.name:<{width}}  {base:>10}  {atual:>10}  {change:>8}{marca}")
+    return "\n".join(lines)
@@ -0,0 +1,260 @@
+import importlib
+import inspect
+import json
+import pkgutil
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session
+
+import crud
+from crud.base import CRUDBase
+from crud.cache import entity_cache
+from domain.models import StatusEmprestimo
+
+# Valores usados nos parâmetros dos finders, pelo nome do parâmetro
+SAMPLES: Dict[str, Any] = {
+    "id": 1,
+    "autor_id": 1,
+    "editora_id": 1,
+    "usuario_id": 1,
+    "emprestimo_id": 1,
+    "titulo": "Casa",
+    "nome": "Silva",
+    "nacionalidade": "Brasileira",
+    "genero": "romance",
+    "ano_inicio": 1950,
+    "ano_fim": 2000,
+    "email": "usuario7@exemplo.com",
+    "cpf": f"{7:011d}",
+    "status": StatusEmprestimo.ATIVO,
+    "atrasados": True,
+    "apenas_ativos": True,
+    "q": "casa perdida",
+}
+FINDER_PREFIXES = ("get_", "search")
+# SQLite: "SCAN livro" é varredura da tabela; com índice vira "SEARCH ... USING"
+# ou "SCAN ... USING INDEX"
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+
+@dataclass
+class Finder:
+    name: str
+    call: Callable[[Session], Any]
+
+
+@dataclass
+class FinderPlan:
+    """Consultas de um finder, seus planos e as varreduras completas"""
+
+    name: str
+    plans: List[Tuple[str, List[str]]] = field(default_factory=list)
+    scans: List[Tuple[str, int]] = field(default_factory=list)  # (tabela, linhas)
+    error: Optional[str] = None
+
+
+def crud_instances() -> List[CRUDBase]:
+    """Instâncias de CRUDBase definidas nos módulos de app/crud/"""
+    instances = []
+    for module_info in pkgutil.iter_modules(crud.__path__):
+        module = importlib.import_module(f"crud.{module_info.name}")
+        for value in vars(module).values():
+            if isinstance(value, CRUDBase) and value not in instances:
+                instances.append(value)
+    return instances
+
+
+def _finder_call(
+    crud_obj: CRUDBase, name: str
+) -> Tuple[Optional[Callable[[Session], Any]], Optional[str]]:
+    """Chamada do método com os valores de SAMPLES (ou o parâmetro faltante)"""
+    method = getattr(crud_obj, name)
+    args, kwargs = [], {}
+    params = list(inspect.signature(method).parameters.values())[1:]  # sem db
+    for param in params:
+        if param.default is not inspect.Parameter.empty:
+            continue
+        if param.name not in SAMPLES:
+            return None, param.name
+        if param.kind is inspect.Parameter.KEYWORD_ONLY:
+            kwargs[param.name] = SAMPLES[param.name]
+        else:
+            args.append(SAMPLES[param.name])
+    return lambda db: method(db, *args, **kwargs), None
+
+
+def discover_finders(
+    instances: List[CRUDBase],
+) -> Tuple[List[Finder], List[str]]:
+    """Finders de cada CRUD: filtros, ordenações e métodos get_*/search*
+
+    Retorna também os métodos ignorados por falta de valor de amostra.
+    """
+    finders: List[Finder] = []
+    skipped: List[str] = []
+    for crud_obj in instances:
+        entity = crud_obj.model.__name__.lower()
+        for name in crud_obj.filter_fields:
+            filters = {name: SAMPLES.get(name)}
+            finders.append(
+                Finder(
+                    f"{entity}.get_multi[{name}]",
+                    lambda db, c=crud_obj, f=filters: c.get_multi(db, filters=f),
+                )
+            )
+            finders.append(
+                Finder(
+                    f"{entity}.count[{name}]",
+                    lambda db, c=crud_obj, f=filters: c.count(db, filters=f),
+                )
+            )
+        for sort in crud_obj.sort_fields:
+            if sort != "id":
+                finders.append(
+                    Finder(
+                        f"{entity}.get_multi[sort={sort}]",
+                        lambda db, c=crud_obj, s=sort: c.get_multi(db, sort=s),
+                    )
+                )
+        # Só métodos próprios do CRUD; os genéricos já foram cobertos acima
+        for name in sorted(vars(type(crud_obj))):
+            if not name.startswith(FINDER_PREFIXES):
+                continue
+            call, missing = _finder_call(crud_obj, name)
+            if call is None:
+                skipped.append(f"{entity}.{name} (sem amostra para {missing})")
+            else:
+                finders.append(Finder(f"{entity}.{name}", call))
+    return finders, skipped
+
+
+@contextmanager
+def capture_selects(engine: Engine) -> Iterator[List[Tuple[str, Any]]]:
+    """Coleta (SQL, parâmetros) dos SELECTs executados no engine"""
+    statements: List[Tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _walk_pg(plan: Dict[str, Any], depth: int = 0) -> Iterator[Tuple[int, Dict]]:
+    yield depth, plan
+    for child in plan.get("Plans", ()):
+        yield from _walk_pg(child, depth + 1)
+
+
+def explain(conn: Connection, statement: str, parameters: Any):
+    """Plano como linhas de texto e tabelas lidas por inteiro"""
+    if conn.dialect.name == "postgresql":
+        raw = conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + statement, parameters
+        ).scalar()
+        document = json.loads(raw) if isinstance(raw, str) else raw
+        lines, scanned = [], []
+        for depth, node in _walk_pg(document[0]["Plan"]):
+            relation = node.get("Relation Name")
+            label = node["Node Type"] + (f" on {relation}" if relation else "")
+            lines.append("  " * depth + label)
+            if node["Node Type"] == "Seq Scan":
+                scanned.append(relation)
+        return lines, scanned
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters
+        ).all()
+        lines = [row[-1] for row in rows]
+        # Sem WHERE e sem ordenação em B-tree temporária, o LIMIT interrompe a
+        # leitura na ordem do rowid: o SCAN não percorre a tabela inteira
+        if (
+            not WHERE.search(statement)
+            and LIMIT.search(statement)
+            and not any("TEMP B-TREE" in line for line in lines)
+        ):
+            return lines, []
+        scanned = [m.group(1) for m in map(SQLITE_SCAN.match, lines) if m]
+        return lines, scanned
+    raise NotImplementedError(f"EXPLAIN não suportado em {conn.dialect.name}")
+
+
+def analyze(
+    engine: Engine, finders: List[Finder], *, threshold: int
+) -> List[FinderPlan]:
+    """Executa cada finder, faz EXPLAIN das consultas e acusa varreduras
+
+    Uma varredura completa só é acusada se a tabela tiver pelo menos
+    threshold linhas.
+    """
+    sizes: Dict[str, int] = {}
+    results = []
+    previous, entity_cache.enabled = entity_cache.enabled, False
+    try:
+        with engine.connect() as conn:
+            for finder in finders:
+                result = FinderPlan(finder.name)
+                results.append(result)
+                try:
+                    with capture_selects(engine) as statements:
+                        with Session(engine) as db:
+                            finder.call(db)
+                    unique = {}
+                    for statement, parameters in statements:
+                        key = (statement, _hashable(parameters))
+                        unique.setdefault(key, (statement, parameters))
+                    for statement, parameters in unique.values():
+                        lines, scanned = explain(conn, statement, parameters)
+                        result.plans.append((statement, lines))
+                        for table in scanned:
+                            if table not in sizes:
+                                sizes[table] = conn.execute(
+                                    text(f"SELECT count(*) FROM {table}")
+                                ).scalar()
+                            if sizes[table] >= threshold:
+                                result.scans.append((table, sizes[table]))
+                except Exception as e:
+                    result.error = f"{e.__class__.__name__}: {e}"
+    finally:
+        entity_cache.enabled = previous
+    return results
+
+
+def _hashable(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return tuple(sorted(parameters.items()))
+    if isinstance(parameters, list):
+        return tuple(parameters)
+    return parameters
+
+
+def format_report(
+    results: List[FinderPlan], skipped: List[str], *, verbose: bool = False
+) -> str:
+    lines = []
+    for result in results:
+        if result.error:
+            status = f"ERRO  {result.error}"
+        elif result.scans:
+            tables = ", ".join(f"{t} ({n:,} linhas)" for t, n in result.scans)
+            status = f"SCAN  {tables}"
+        else:
+            status = "ok"
+        lines.append(f"{result.name:<52} {status}")
+        if verbose or result.scans:
+            for _, plan in result.plans:
+                lines.extend(f"{'':<6}{line}" for line in plan)
+    for name in skipped:
+        lines.append(f"{name:<52} ignorado")
+    return "\n".join(lines)
@@ -0,0 +1,340 @@
+import asyncio
+import itertools
+import platform
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import sqlalchemy
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, func, select
+
+from crud.autores_crud import crud_autor
+from crud.cache import entity_cache
+from crud.editoras_crud import crud_editora
+from crud.emprestimos_crud import STATUS_EM_ABERTO, crud_emprestimo
+from crud.livros_crud import crud_livro
+from crud.projection import rows_json
+from crud.search import ensure_search_index
+from crud.usuarios_crud import crud_usuario
+from domain.models import (
+    Emprestimo,
+    EmprestimoCreate,
+    EmprestimoReadWithLivros,
+    Livro,
+    LivroCreate,
+    LivroEmprestimoLink,
+    LivroRead,
+    LivroUpdate,
+    StatusEmprestimo,
+)
+from seeding.generator import SeedConfig, SeedGenerator
+from seeding.loader import load
+
+# Livros nunca emprestados no seed, disponíveis para os checkouts do benchmark
+LIVROS_RESERVA = 2000
+# Livros criados pelos cenários de escrita (o seed usa 978)
+ISBN_PREFIXO = "999"
+
+
+@dataclass
+class Case:
+    """Um cenário medido: fn(sessão, preparo) com preparo fora da medição"""
+
+    name: str
+    fn: Callable[[Session, Any], Any]
+    prepare: Optional[Callable[[Session], Any]] = None
+    cache: bool = True
+
+
+def prepare_database(engine: Engine, sizes: Sequence[int]) -> None:
+    """Cria o schema e, se o banco estiver vazio, popula para o maior tamanho"""
+    SQLModel.metadata.create_all(engine)
+    ensure_search_index(engine)
+    maior = max(sizes)
+    with Session(engine) as db:
+        livros = db.exec(select(func.count()).select_from(Livro)).one()
+    if livros == 0:
+        config = SeedConfig(
+            autores=max(maior // 50, 10),
+            editoras=max(maior // 200, 5),
+            livros=maior + LIVROS_RESERVA,
+            usuarios=max(maior // 5, 10),
+            emprestimos=maior,
+            livros_reservados=LIVROS_RESERVA,
+        )
+        load(engine, SeedGenerator(config))
+    elif livros < maior + LIVROS_RESERVA:
+        raise SystemExit(
+            f"Banco com {livros} livros; são necessários {maior + LIVROS_RESERVA}"
+        )
+
+
+def _serialize(model: type) -> Callable[[Session, List[Any]], bytes]:
+    """Serialização como o FastAPI faz para response_model=List[model]"""
+    field = create_response_field(name="bench", type_=List[model])
+
+    def fn(db: Session, items: List[Any]) -> bytes:
+        content = asyncio.run(
+            serialize_response(field=field, response_content=items, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    return fn
+
+
+def build_cases(engine: Engine, sizes: Sequence[int]) -> List[Case]:
+    """Cenários: métodos do CRUDBase, finders e serialização por tamanho"""
+    # ISBNs novos mesmo num banco já usado por execuções anteriores
+    with Session(engine) as db:
+        ultimo_isbn = db.exec(
+            select(func.max(Livro.isbn)).where(Livro.isbn.startswith(ISBN_PREFIXO))
+        ).one()
+    sequencia = itertools.count(int(ultimo_isbn[3:]) + 1 if ultimo_isbn else 1)
+
+    def novo_livro() -> LivroCreate:
+        n = next(sequencia)
+        return LivroCreate(
+            titulo=f"Bench {n}",
+            isbn=f"{ISBN_PREFIXO}{n:010d}",
+            ano_publicacao=2000,
+            genero="tecnico",
+            paginas=100,
+            autor_id=1,
+            editora_id=1,
+        )
+
+    def novo_emprestimo(db: Session) -> EmprestimoCreate:
+        em_aberto = (
+            select(LivroEmprestimoLink.livro_id)
+            .join(Emprestimo, Emprestimo.id == LivroEmprestimoLink.emprestimo_id)
+            .where(Emprestimo.status.in_(STATUS_EM_ABERTO))
+        )
+        livres = select(Livro.id).where(Livro.id.not_in(em_aberto))
+        livro_ids = db.exec(livres.order_by(Livro.id.desc()).limit(2)).all()
+        return EmprestimoCreate(
+            usuario_id=1,
+            livro_ids=livro_ids,
+            data_devolucao_prevista=datetime.now() + timedelta(days=14),
+        )
+
+    cases = [
+        Case(
+            "livro.create",
+            lambda db, obj_in: crud_livro.create(db, obj_in=obj_in),
+            prepare=lambda db: novo_livro(),
+        ),
+        Case("livro.get", lambda db, _: crud_livro.get(db, 1), cache=False),
+        Case("livro.get_cached", lambda db, _: crud_livro.get(db, 1)),
+        Case(
+            "livro.get_expand",
+            lambda db, _: crud_livro.get(db, 1, expand=["autor", "editora"]),
+        ),
+        Case(
+            "livro.update",
+            lambda db, livro: crud_livro.update(
+                db, db_obj=livro, obj_in=LivroUpdate(paginas=livro.paginas % 900 + 1)
+            ),
+            prepare=lambda db: crud_livro.get(db, 1),
+        ),
+        Case(
+            "livro.remove",
+            lambda db, livro_id: crud_livro.remove(db, id=livro_id),
+            prepare=lambda db: crud_livro.create(db, obj_in=novo_livro()).id,
+        ),
+        Case("livro.count", lambda db, _: crud_livro.count(db)),
+        Case(
+            "livro.count_filtered",
+            lambda db, _: crud_livro.count(db, filters={"genero": "poesia"}),
+        ),
+        Case("livro.search", lambda db, _: crud_livro.search(db, q="casa perdida")),
+        Case(
+            "autor.get_by_nome",
+            lambda db, _: crud_autor.get_by_nome(db, nome="Silva"),
+        ),
+        Case(
+            "autor.get_by_nacionalidade",
+            lambda db, _: crud_autor.get_by_nacionalidade(
+                db, nacionalidade="Brasileira"
+            ),
+        ),
+        Case(
+            "editora.get_by_nome",
+            lambda db, _: crud_editora.get_by_nome(db, nome="Casa"),
+        ),
+        Case(
+            "usuario.get_by_email",
+            lambda db, _: crud_usuario.get_by_email(db, email="usuario7@exemplo.com"),
+        ),
+        Case(
+            "usuario.get_by_cpf",
+            lambda db, _: crud_usuario.get_by_cpf(db, cpf=f"{7:011d}"),
+        ),
+        Case("usuario.get_ativos", lambda db, _: crud_usuario.get_ativos(db)),
+        Case(
+            "emprestimo.create_with_livros",
+            lambda db, obj_in: crud_emprestimo.create_with_livros(db, obj_in=obj_in),
+            prepare=novo_emprestimo,
+        ),
+        Case(
+            "emprestimo.get_by_usuario",
+            lambda db, _: crud_emprestimo.get_by_usuario(db, usuario_id=1),
+        ),
+        Case(
+            "emprestimo.get_with_livros",
+            lambda db, _: crud_emprestimo.get_with_livros(db, emprestimo_id=1),
+        ),
+    ]
+
+    def por_tamanho(name: str, fn: Callable[[Session, int], Any]) -> List[Case]:
+        return [Case(f"{name}[{n}]", lambda db, _, n=n: fn(db, n)) for n in sizes]
+
+    cases += por_tamanho(
+        "livro.get_multi", lambda db, n: crud_livro.get_multi(db, limit=n)
+    )
+    cases += por_tamanho(
+        "livro.get_multi_sorted",
+        lambda db, n: crud_livro.get_multi(db, limit=n, sort="-ano_publicacao"),
+    )
+    cases += por_tamanho(
+        "livro.get_multi_expand",
+        lambda db, n: crud_livro.get_multi(db, limit=n, expand=["autor", "editora"]),
+    )
+    cases += por_tamanho(
+        "livro.get_by_titulo",
+        lambda db, n: crud_livro.get_by_titulo(db, titulo="Casa", limit=n),
+    )
+    cases += por_tamanho(
+        "livro.get_by_genero",
+        lambda db, n: crud_livro.get_by_genero(db, genero="romance", limit=n),
+    )
+    cases += por_tamanho(
+        "livro.get_by_ano",
+        lambda db, n: crud_livro.get_by_ano(db, ano_inicio=1950, ano_fim=2000, limit=n),
+    )
+    cases += por_tamanho(
+        "livro.get_by_autor",
+        lambda db, n: crud_livro.get_by_autor(db, autor_id=1, limit=n),
+    )
+    cases += por_tamanho(
+        "emprestimo.get_multi", lambda db, n: crud_emprestimo.get_multi(db, limit=n)
+    )
+    cases += por_tamanho(
+        "emprestimo.get_by_status",
+        lambda db, n: crud_emprestimo.get_by_status(
+            db, status=StatusEmprestimo.ATIVO, limit=n
+        ),
+    )
+    cases += por_tamanho(
+        "emprestimo.get_atrasados",
+        lambda db, n: crud_emprestimo.get_atrasados(db, limit=n),
+    )
+    cases += por_tamanho(
+        "emprestimo.get_all_with_livros",
+        lambda db, n: crud_emprestimo.get_all_with_livros(db, limit=n),
+    )
+
+    serialize_livros = _serialize(LivroRead)
+    livro_columns = list(LivroRead.model_fields)
+
+    # Listagem sem expand de ponta a ponta: consulta + JSON da resposta
+    def listagem_orm(db: Session, n: int) -> bytes:
+        return serialize_livros(db, crud_livro.get_page(db, limit=n).items)
+
+    def listagem_projecao(db: Session, n: int) -> bytes:
+        return rows_json(livro_columns, crud_livro.get_page_rows(db, limit=n).items)
+
+    cases += por_tamanho("livro.list_orm_pydantic", listagem_orm)
+    cases += por_tamanho("livro.list_projection_orjson", listagem_projecao)
+    serialize_emprestimos = _serialize(EmprestimoReadWithLivros)
+    for n in sizes:
+        cases += [
+            Case(
+                f"livro.create_bulk[{n}]",
+                lambda db, objs: crud_livro.create_bulk(db, objs_in=objs),
+                prepare=lambda db, n=n: [novo_livro() for _ in range(n)],
+            ),
+            Case(
+                f"livro.get_page_cursor[{n}]",
+                lambda db, cursor, n=n: crud_livro.get_page(db, limit=n, cursor=cursor),
+                prepare=lambda db, n=n: crud_livro.get_page(db, limit=n).next_cursor,
+            ),
+            Case(
+                f"serialize.LivroRead[{n}]",
+                serialize_livros,
+                prepare=lambda db, n=n: crud_livro.get_multi(db, limit=n),
+            ),
+            Case(
+                f"serialize.EmprestimoReadWithLivros[{n}]",
+                serialize_emprestimos,
+                prepare=lambda db, n=n: crud_emprestimo.get_all_with_livros(
+                    db, limit=n
+                ),
+            ),
+        ]
+    return cases
+
+
+@contextmanager
+def _entity_cache(enabled: bool):
+    previous = entity_cache.enabled
+    entity_cache.enabled = enabled
+    try:
+        yield
+    finally:
+        entity_cache.enabled = previous
+
+
+def time_case(engine: Engine, case: Case, *, repeat: int, warmup: int = 1):
+    """Executa o cenário com uma sessão nova por repetição e mede só fn"""
+    timings = []
+    with _entity_cache(case.cache):
+        for i in range(warmup + repeat):
+            with Session(engine, expire_on_commit=False) as db:
+                arg = case.prepare(db) if case.prepare else None
+                start = time.perf_counter()
+                case.fn(db, arg)
+                elapsed = time.perf_counter() - start
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "mean_ms": statistics.fmean(timings),
+        "repeat": repeat,
+    }
+
+
+def run_suite(
+    engine: Engine,
+    *,
+    sizes: Sequence[int] = (100, 1000, 10000),
+    repeat: int = 5,
+    only: Optional[str] = None,
+    progress: Callable[[str, Dict[str, float]], None] = lambda name, result: None,
+) -> Dict[str, Any]:
+    """Roda todos os cenários (ou os que contêm `only`) e monta o resultado"""
+    prepare_database(engine, sizes)
+    results = {}
+    for case in build_cases(engine, sizes):
+        if only and only not in case.name:
+            continue
+        results[case.name] = time_case(engine, case, repeat=repeat)
+        progress(case.name, results[case.name])
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "sizes": list(sizes),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
@@ -1,21 +1,113 @@
 import logging
+from typing import Optional, Union
 
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from config.config import settings
+from config.metrics import instrument_engine
+from config.replicas import (
+    READ_METHODS,
+    REPLICA_INFO_KEY,
+    Replica,
+    ReplicaRouter,
+    collector,
+)
+from crud.counters import ensure_counters
+from crud.search import ensure_search_index
 
 logger = logging.getLogger("uvicorn")
 
+# Sessão recebida pelas rotas: AsyncSession no modo assíncrono, Session no síncrono
+DbSession = Union[AsyncSession, Session]
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def enforce_foreign_keys(engine: Engine) -> None:
+    """Liga a checagem de chaves estrangeiras, desligada por padrão no SQLite
+
+    As escritas com RETURNING dependem da violação da FK para responder
+    404/409 em vez de consultar antes.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def foreign_keys_on(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     echo=False,
     pool_pre_ping=True
 )
+instrument_engine(engine, "sync")
+enforce_foreign_keys(engine)
+
+
+def async_database_url(url: str) -> str:
+    """Converte a URL síncrona para o driver assíncrono equivalente"""
+    if settings.ASYNC_DATABASE_URL and url == settings.DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}://{rest}"
+
+
+async_engine: Optional[AsyncEngine] = None
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(
+        async_database_url(settings.DATABASE_URL),
+        echo=False,
+        pool_pre_ping=True,
+    )
+    instrument_engine(async_engine.sync_engine, "async")
+    enforce_foreign_keys(async_engine.sync_engine)
+
+
+def create_replica(name: str, url: str) -> Replica:
+    """Engines (síncrono e, no modo assíncrono, o async) de uma réplica"""
+    replica = Replica(name, create_engine(url, echo=False, pool_pre_ping=True))
+    instrument_engine(replica.engine, name)
+    enforce_foreign_keys(replica.engine)
+    if settings.DB_ASYNC:
+        replica.async_engine = create_async_engine(
+            async_database_url(url), echo=False, pool_pre_ping=True
+        )
+        instrument_engine(replica.async_engine.sync_engine, f"{name}-async")
+        enforce_foreign_keys(replica.async_engine.sync_engine)
+    return replica
+
+
+replica_router = ReplicaRouter(
+    [
+        create_replica(f"replica{i}", url)
+        for i, url in enumerate(settings.DATABASE_REPLICA_URLS)
+    ],
+    retry_seconds=settings.REPLICA_RETRY_SECONDS,
+    pin_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+collector(replica_router)
 
 def create_db_and_tables():
     """Cria as tabelas no banco de dados"""
     try:
         SQLModel.metadata.create_all(engine)
+        ensure_search_index(engine)
+        ensure_counters(engine)
         logger.info("Tabelas criadas com sucesso")
     except Exception as e:
         logger.error(f"Erro ao criar tabelas: {e}")
@@ -25,3 +117,74 @@ def get_session():
     """Dependency para obter sessão do banco"""
     with Session(engine) as session:
         yield session
+
+async def _replica_session(replica: Replica) -> Optional[DbSession]:
+    """Sessão na réplica com a conexão já aberta; None se ela estiver fora"""
+    try:
+        if replica.async_engine is not None:
+            session = AsyncSession(replica.async_engine, expire_on_commit=False)
+            session.info[REPLICA_INFO_KEY] = replica.name
+            try:
+                await session.connection()
+            except BaseException:
+                await session.close()
+                raise
+            return session
+        session = Session(replica.engine)
+        session.info[REPLICA_INFO_KEY] = replica.name
+        try:
+            await run_in_threadpool(session.connection)
+        except BaseException:
+            session.close()
+            raise
+        return session
+    except (DBAPIError, OSError) as e:
+        replica_router.mark_down(replica, e)
+        return None
+
+async def get_db(request: Request, response: Response):
+    """Dependency das rotas: sessão assíncrona ou síncrona conforme DB_ASYNC
+
+    Com réplicas configuradas, as rotas GET leem de uma réplica e as demais
+    usam o primário e fixam o cliente nele por READ_YOUR_WRITES_SECONDS.
+    O nó usado vai no header X-DB-Node.
+    """
+    session = None
+    if replica_router.enabled:
+        if request.method not in READ_METHODS:
+            replica_router.pin(response)
+        elif replica_router.is_read(request):
+            replica = replica_router.pick()
+            if replica is not None:
+                session = await _replica_session(replica)
+            if session is None:
+                replica_router.record_read(None, fallback=True)
+            else:
+                replica_router.record_read(replica)
+                response.headers["X-DB-Node"] = replica.name
+        else:
+            replica_router.record_read(None)
+        response.headers.setdefault("X-DB-Node", "primary")
+    if session is None:
+        if async_engine is None:
+            session = Session(engine)
+        else:
+            # expire_on_commit=False: atributos expirados exigiriam I/O na
+            # serialização
+            session = AsyncSession(async_engine, expire_on_commit=False)
+    if isinstance(session, AsyncSession):
+        async with session:
+            yield session
+    else:
+        with session:
+            yield session
+
+async def dispose_engines():
+    """Fecha os pools de conexão no encerramento da aplicação"""
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+    for replica in replica_router.replicas:
+        if replica.async_engine is not None:
+            await replica.async_engine.dispose()
+        replica.engine.dispose()
@@ -1,39 +1,112 @@
+import atexit
+import json
 import logging
 import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 
 from config.config import settings
 
+# Operações de leitura de alto volume: registradas por amostragem
+SAMPLED_OPERATIONS = {"READ", "READ_MULTI", "COUNT", "SEARCH"}
+
+# Campos estruturados aceitos via extra= e copiados para a linha JSON
+STRUCTURED_FIELDS = ("operation", "entity", "entity_id", "success", "error")
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler que nunca bloqueia: com a fila cheia o registro é descartado"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler = None
+_listener = None
+_sampled_out = 0
+
 
 def setup_logging():
-    """Configura o sistema de logging"""
+    """Configura o sistema de logging
+
+    A requisição só enfileira o registro; a escrita em arquivo (JSON) e no
+    console acontece na thread do QueueListener. Chamadas repetidas são
+    ignoradas, evitando handlers (e linhas) duplicados.
+    """
+    global _queue_handler, _listener
+
+    app_logger = logging.getLogger("biblioteca_api")
+    if _listener is not None:
+        return app_logger
 
     log_dir = os.path.dirname(settings.LOG_FILE)
     if log_dir and not os.path.exists(log_dir):
         os.makedirs(log_dir)
 
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-
     file_handler = logging.FileHandler(settings.LOG_FILE, encoding="utf-8")
-    file_handler.setFormatter(formatter)
+    file_handler.setFormatter(JsonFormatter())
     file_handler.setLevel(getattr(logging, settings.LOG_LEVEL))
 
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
     console_handler.setLevel(logging.INFO)
 
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = BoundedQueueHandler(log_queue)
+    _listener = QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
+
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, settings.LOG_LEVEL))
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(_queue_handler)
 
-    app_logger = logging.getLogger("biblioteca_api")
     app_logger.info("Sistema de logging configurado")
 
     return app_logger
 
 
+def logging_stats():
+    """Estado do pipeline de logs (fila, descartes e amostragem)"""
+    return {
+        "queue_size": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "sampled_out": _sampled_out,
+    }
+
+
 # Criar logger global
 logger = setup_logging()
 
@@ -45,16 +118,34 @@ def log_operation(
     success: bool = True,
     error: str = None,
 ):
-    """Registra operações realizadas na API"""
+    """Registra operações realizadas na API
+
+    Leituras bem-sucedidas são amostradas (LOG_READ_SAMPLE_RATE); escritas
+    e erros são sempre registrados.
+    """
+    global _sampled_out
+
+    if success and operation in SAMPLED_OPERATIONS:
+        if random.random() >= settings.LOG_READ_SAMPLE_RATE:
+            _sampled_out += 1
+            return
+
+    extra = {
+        "operation": operation,
+        "entity": entity,
+        "entity_id": entity_id,
+        "success": success,
+        "error": error,
+    }
     if success:
-        msg = f"Operação {operation} realizada com sucesso na entidade {entity}"
-        if entity_id:
-            msg += f" (ID: {entity_id})"
-        logger.info(msg)
+        msg = "Operação %s realizada com sucesso na entidade %s"
     else:
-        msg = f"Erro na operação {operation} na entidade {entity}"
-        if entity_id:
-            msg += f" (ID: {entity_id})"
-        if error:
-            msg += f" - Erro: {error}"
-        logger.error(msg)
+        msg = "Erro na operação %s na entidade %s"
+    args = [operation, entity]
+    if entity_id:
+        msg += " (ID: %s)"
+        args.append(entity_id)
+    if not success and error:
+        msg += " - Erro: %s"
+        args.append(error)
+    logger.log(logging.INFO if success else logging.ERROR, msg, *args, extra=extra)
@@ -0,0 +1,262 @@
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from config.logging_config import logging_stats
+from crud.cache import entity_cache
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # contagem por bucket (+Inf no fim), soma, total
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for labelvalues, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _labels(self.labelnames + ("le",), labelvalues + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {int(series[-1])}")
+        return lines
+
+
+class Gauge:
+    """Valor instantâneo (ex.: requisições em andamento)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, amount: float = 1, *labelvalues: str) -> None:
+        self.inc(-amount, *labelvalues)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_labels(self.labelnames, labelvalues)} {value}"
+            for labelvalues, value in sorted(values.items())
+        ]
+
+
+class Registry:
+    """Conjunto de métricas e coletores avaliados a cada scrape"""
+
+    def __init__(self):
+        self.metrics: List = []
+        # Coletores devolvem (nome, tipo, ajuda, [(labels, valor)])
+        self.collectors: List[Callable[[], Iterable[Tuple]]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    rendered = _labels(tuple(labels), tuple(labels.values()))
+                    lines.append(f"{name}{rendered} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_LATENCY = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Latência das requisições HTTP",
+        ("router", "route", "method", "status"),
+    )
+)
+HTTP_IN_FLIGHT = REGISTRY.register(
+    Gauge("http_requests_in_flight", "Requisições HTTP em andamento")
+)
+CRUD_LATENCY = REGISTRY.register(
+    Histogram(
+        "crud_operation_duration_seconds",
+        "Latência das operações do CRUD (inclui espera por conexão)",
+        ("entity", "operation"),
+    )
+)
+POOL_WAIT = REGISTRY.register(
+    Histogram(
+        "db_pool_checkout_wait_seconds",
+        "Tempo para obter uma conexão do pool (inclui a espera na fila)",
+        ("engine",),
+        POOL_WAIT_BUCKETS,
+    )
+)
+
+_pools: Dict[str, QueuePool] = {}
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Mede a espera por conexão e expõe o estado do pool do engine
+
+    Não há evento público antes do checkout, então o tempo é tomado em volta
+    de Engine.connect (usado pela Session e, via sync_engine, pela
+    AsyncSession): fila do pool, conexão nova e pre-ping.
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return  # SingletonThreadPool/NullPool não têm fila a medir
+    connect = engine.connect
+
+    @wraps(connect)
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - start, name)
+
+    engine.connect = timed_connect
+    _pools[name] = pool
+
+
+def _pool_collector():
+    gauges = {
+        "db_pool_size": ("Tamanho configurado do pool", QueuePool.size),
+        "db_pool_checked_out": ("Conexões em uso", QueuePool.checkedout),
+        "db_pool_checked_in": ("Conexões ociosas no pool", QueuePool.checkedin),
+        "db_pool_overflow": ("Conexões além de pool_size", QueuePool.overflow),
+    }
+    for metric, (help, getter) in gauges.items():
+        samples = [({"engine": name}, getter(pool)) for name, pool in _pools.items()]
+        yield metric, "gauge", help, samples
+
+
+def _app_collector():
+    logs = logging_stats()
+    yield "log_records_dropped_total", "counter", "Registros de log descartados", [
+        ({}, logs["dropped"])
+    ]
+    yield "log_queue_size", "gauge", "Registros de log aguardando escrita", [
+        ({}, logs["queue_size"])
+    ]
+    cache = entity_cache.stats()["models"]
+    for metric in ("hits", "misses", "invalidations"):
+        samples = [
+            ({"entity": model}, values[metric]) for model, values in cache.items()
+        ]
+        yield f"entity_cache_{metric}_total", "counter", f"Cache: {metric}", samples
+
+
+REGISTRY.collectors.append(_pool_collector)
+REGISTRY.collectors.append(_app_collector)
+
+
+def _route_labels(scope) -> Tuple[str, str]:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched", "unmatched"
+    router = path.strip("/").split("/", 1)[0] or "root"
+    return router, path
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede latência por rota/status e requisições em voo"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            router, route = _route_labels(scope)
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start, router, route, scope["method"], status
+            )
+
+
+def render_metrics() -> str:
+    """Todas as métricas no formato de texto do Prometheus"""
+    return REGISTRY.render()
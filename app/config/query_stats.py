@@ -0,0 +1,174 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config.config import settings
+
+logger = logging.getLogger("biblioteca_api")
+
+F = TypeVar("F", bound=Callable)
+
+
+class QueryStats:
+    """Consultas e tempo de banco acumulados durante uma requisição"""
+
+    __slots__ = ("queries", "seconds", "batches")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.batches = 0
+
+
+# Objeto mutável: a thread do threadpool e o greenlet do run_sync recebem uma
+# cópia do contexto, mas continuam apontando para o mesmo QueryStats
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    stats.queries += 1
+    stats.seconds += time.perf_counter() - starts.pop()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    stats = _current.get()
+    conn = exception_context.connection
+    if stats is None or conn is None or not conn.info.get("query_start"):
+        return
+    stats.queries += 1
+    stats.seconds += time.perf_counter() - conn.info["query_start"].pop()
+
+
+def query_budget(max_queries: int, *, per_batch: bool = False) -> Callable[[F], F]:
+    """Declara o máximo de consultas SQL esperado para a rota
+
+    Usado abaixo do decorador da rota:
+
+        @router.get("/")
+        @query_budget(1)
+        async def listar(...):
+
+    Com per_batch=True o máximo vale por bloco marcado com count_batch
+    (lote/importação), já que o número de blocos depende do corpo enviado.
+    """
+
+    def decorator(endpoint: F) -> F:
+        endpoint.query_budget = max_queries
+        endpoint.query_budget_per_batch = per_batch
+        return endpoint
+
+    return decorator
+
+
+def count_batch() -> None:
+    """Marca um bloco de escrita para as rotas com orçamento por bloco"""
+    stats = _current.get()
+    if stats is not None:
+        stats.batches += 1
+
+
+def _route_budget(scope, stats: QueryStats) -> Optional[int]:
+    endpoint = getattr(scope.get("route"), "endpoint", None)
+    budget = getattr(endpoint, "query_budget", None)
+    if budget is None:
+        return settings.DB_QUERY_BUDGET_DEFAULT
+    if getattr(endpoint, "query_budget_per_batch", False):
+        return budget * max(stats.batches, 1)
+    return budget
+
+
+class QueryStatsMiddleware:
+    """Conta consultas e tempo de banco por requisição
+
+    Os totais vão nos headers X-DB-Queries e X-DB-Time (ms). Em modo estrito
+    (DB_QUERY_BUDGET_STRICT, para testes) a resposta de uma requisição que
+    passar do orçamento da rota é trocada por um 500 descrevendo o excesso;
+    fora dele o excesso só é logado. Consultas feitas depois do início da
+    resposta (streaming) não entram na conta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        replaced = False
+
+        async def send_wrapper(message):
+            nonlocal replaced
+            if replaced:
+                return  # corpo da resposta original descartado
+            if message["type"] == "http.response.start":
+                error = self._check_budget(scope, stats)
+                if error is not None:
+                    replaced = True
+                    await self._send_error(send, error, stats)
+                    return
+                headers = list(message.get("headers", []))
+                headers.extend(self._headers(stats))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+
+    @staticmethod
+    def _headers(stats: QueryStats):
+        return [
+            (b"x-db-queries", str(stats.queries).encode()),
+            (b"x-db-time", f"{stats.seconds * 1000:.2f}".encode()),
+        ]
+
+    @staticmethod
+    def _check_budget(scope, stats: QueryStats) -> Optional[str]:
+        """Mensagem de erro se o orçamento estourou em modo estrito"""
+        budget = _route_budget(scope, stats)
+        if budget is None or stats.queries <= budget:
+            return None
+        route = getattr(scope.get("route"), "path", scope["path"])
+        msg = "%s %s executou %s consultas (orçamento: %s)"
+        args = (scope["method"], route, stats.queries, budget)
+        if settings.DB_QUERY_BUDGET_STRICT:
+            logger.error(msg, *args)
+            return msg % args
+        logger.warning(msg, *args)
+        return None
+
+    async def _send_error(self, send, error: str, stats: QueryStats) -> None:
+        body = json.dumps({"detail": error}, ensure_ascii=False).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 500,
+                "headers": headers + self._headers(stats),
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
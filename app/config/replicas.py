@@ -0,0 +1,173 @@
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config.metrics import REGISTRY
+
+logger = logging.getLogger("biblioteca_api")
+
+# Métodos HTTP atendidos pelas réplicas; os demais vão sempre para o primário
+READ_METHODS = frozenset({"GET", "HEAD"})
+# Cookie com o instante (epoch) até o qual as leituras do cliente ficam no
+# primário, para que ele veja as próprias escritas apesar do atraso da réplica
+PIN_COOKIE = "db_primary_until"
+# Marca em Session.info das sessões abertas numa réplica (valor: nome dela)
+REPLICA_INFO_KEY = "db_replica"
+
+
+def is_replica_session(db: Any) -> bool:
+    """Sessão de réplica: leituras possivelmente atrasadas, fora dos caches"""
+    return bool(db.info.get(REPLICA_INFO_KEY))
+
+
+@dataclass
+class Replica:
+    """Réplica de leitura: engines e estado de saúde"""
+
+    name: str
+    engine: Engine
+    async_engine: Optional[AsyncEngine] = None
+    down_until: float = 0.0
+    leituras: int = 0
+    falhas: int = 0
+    ultimo_erro: Optional[str] = None
+
+    def sync_engine(self) -> Engine:
+        """Engine síncrono por onde passam as conexões (também no modo async)"""
+        if self.async_engine is not None:
+            return self.async_engine.sync_engine
+        return self.engine
+
+
+@dataclass
+class ReplicaRouter:
+    """Escolhe a réplica de cada leitura e tira da rotação as que falharem
+
+    A escolha é round-robin entre as réplicas disponíveis. Uma réplica com
+    falha de conexão fica fora por `retry_seconds`; sem nenhuma disponível,
+    a leitura vai para o primário.
+    """
+
+    replicas: List[Replica] = field(default_factory=list)
+    retry_seconds: float = 30.0
+    pin_seconds: float = 5.0
+    leituras_primario: int = 0
+    fallbacks: int = 0
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._cycle = itertools.count()
+        for replica in self.replicas:
+            self._watch(replica)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def add(self, replica: Replica) -> None:
+        self._watch(replica)
+        self.replicas.append(replica)
+
+    def _watch(self, replica: Replica) -> None:
+        # Conexão perdida no meio de uma consulta também tira a réplica
+        def handle_error(context):
+            if context.is_disconnect:
+                self.mark_down(replica, context.original_exception)
+
+        event.listen(replica.sync_engine(), "handle_error", handle_error)
+
+    def pick(self) -> Optional[Replica]:
+        """Próxima réplica disponível (None = usar o primário)"""
+        now = time.monotonic()
+        with self._lock:
+            available = [r for r in self.replicas if r.down_until <= now]
+            if not available:
+                return None
+            return available[next(self._cycle) % len(available)]
+
+    def mark_down(self, replica: Replica, error: BaseException) -> None:
+        with self._lock:
+            replica.down_until = time.monotonic() + self.retry_seconds
+            replica.falhas += 1
+            message = str(error).splitlines()[0] if str(error) else ""
+            replica.ultimo_erro = f"{error.__class__.__name__}: {message}"
+        logger.warning(
+            f"Réplica {replica.name} fora de rotação por {self.retry_seconds}s: "
+            f"{replica.ultimo_erro}"
+        )
+
+    def record_read(
+        self, replica: Optional[Replica], *, fallback: bool = False
+    ) -> None:
+        """Conta a leitura no nó que a atendeu (None = primário)"""
+        with self._lock:
+            if replica is None:
+                self.leituras_primario += 1
+                self.fallbacks += int(fallback)
+            else:
+                replica.leituras += 1
+
+    def is_read(self, request: Request) -> bool:
+        """Requisição de leitura que pode ir para uma réplica"""
+        if not self.enabled or request.method not in READ_METHODS:
+            return False
+        try:
+            pinned_until = float(request.cookies.get(PIN_COOKIE, 0))
+        except ValueError:
+            return True
+        return pinned_until <= time.time()
+
+    def pin(self, response: Response) -> None:
+        """Fixa as próximas leituras do cliente no primário (read-your-writes)"""
+        if self.enabled and self.pin_seconds > 0:
+            response.set_cookie(
+                PIN_COOKIE,
+                f"{time.time() + self.pin_seconds:.3f}",
+                max_age=max(1, int(self.pin_seconds + 0.999)),
+                httponly=True,
+                samesite="lax",
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "leituras_primario": self.leituras_primario,
+                "fallbacks": self.fallbacks,
+                "replicas": [
+                    {
+                        "nome": r.name,
+                        "disponivel": r.down_until <= now,
+                        "leituras": r.leituras,
+                        "falhas": r.falhas,
+                        "ultimo_erro": r.ultimo_erro,
+                    }
+                    for r in self.replicas
+                ],
+            }
+
+
+def collector(router: ReplicaRouter):
+    """Coletor de métricas do roteamento de leituras"""
+
+    def collect():
+        stats = router.stats()
+        reads = [({"node": "primary"}, stats["leituras_primario"])]
+        reads += [({"node": r["nome"]}, r["leituras"]) for r in stats["replicas"]]
+        yield "db_reads_total", "counter", "Leituras por nó do banco", reads
+        yield "db_replica_fallbacks_total", "counter", "Leituras desviadas", [
+            ({}, stats["fallbacks"])
+        ]
+        yield "db_replica_up", "gauge", "Réplica em rotação (1) ou fora (0)", [
+            ({"node": r["nome"]}, int(r["disponivel"])) for r in stats["replicas"]
+        ]
+
+    REGISTRY.collectors.append(collect)
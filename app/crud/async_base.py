@@ -0,0 +1,250 @@
+import time
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from config.config import settings
+from config.metrics import CRUD_LATENCY
+from config.query_stats import count_batch
+from crud.base import CreateSchemaType, CRUDBase, ModelType, UpdateSchemaType
+from crud.export import ExportFormat, stream_rows, stream_rows_async
+from crud.importer import (
+    ImportErrorReport,
+    ImportFileError,
+    next_batch,
+    read_records,
+)
+from crud.pagination import Page
+from domain.models import BulkCreateResult, ImportResult
+
+
+async def run_sync(db: Any, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa fn(sessão_síncrona, *args, **kwargs) sem bloquear o loop
+
+    AsyncSession.run_sync no modo assíncrono; threadpool com Session.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    raise TypeError(f"Sessão não suportada: {type(db).__name__}")
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """Interface assíncrona de um CRUDBase
+
+    A lógica (filtros, cursor, expand, validações) continua no CRUD síncrono;
+    aqui ela é executada com AsyncSession.run_sync, que emite o mesmo SQL mas
+    faz o I/O no event loop (asyncpg/aiosqlite) em vez de ocupar uma thread.
+    Com uma Session síncrona (DB_ASYNC=False) a chamada vai para o threadpool.
+
+    Métodos específicos de cada CRUD (get_by_email, search, ...) também ficam
+    disponíveis, como corrotinas, via __getattr__.
+    """
+
+    def __init__(self, crud: CRUDBase[ModelType, CreateSchemaType, UpdateSchemaType]):
+        self.crud = crud
+        self.model = crud.model
+        self.read_schema = crud.read_schema
+
+    async def run(self, db: Any, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Executa fn(sessão_síncrona, *args, **kwargs) sem bloquear o loop"""
+        start = time.perf_counter()
+        try:
+            return await run_sync(db, fn, *args, **kwargs)
+        finally:
+            CRUD_LATENCY.observe(
+                time.perf_counter() - start, self.model.__name__, fn.__name__
+            )
+
+    async def create(self, db: Any, *, obj_in: CreateSchemaType) -> ModelType:
+        """Criar uma nova entidade"""
+        return await self.run(db, self.crud.create, obj_in=obj_in)
+
+    async def create_bulk(
+        self, db: Any, *, objs_in: List[CreateSchemaType]
+    ) -> BulkCreateResult:
+        """Criar entidades em lote"""
+        count_batch()
+        return await self.run(db, self.crud.create_bulk, objs_in=objs_in)
+
+    async def get(self, db: Any, id: int, **kwargs) -> Optional[ModelType]:
+        """Buscar por ID"""
+        return await self.run(db, self.crud.get, id, **kwargs)
+
+    async def get_multi(self, db: Any, **kwargs) -> List[ModelType]:
+        """Listar com filtros e paginação (mesmos parâmetros de CRUDBase)"""
+        return await self.run(db, self.crud.get_multi, **kwargs)
+
+    async def get_page(self, db: Any, **kwargs) -> Page[ModelType]:
+        """Listar uma página junto com o cursor da próxima"""
+        return await self.run(db, self.crud.get_page, **kwargs)
+
+    async def get_version(self, db: Any, id: int) -> Optional[datetime]:
+        """Versão (atualizado_em) da entidade, sem carregar a linha"""
+        return await self.run(db, self.crud.get_version, id)
+
+    async def get_page_versions(self, db: Any, **kwargs) -> List[Tuple[int, datetime]]:
+        """(id, atualizado_em) das linhas de uma página da listagem"""
+        return await self.run(db, self.crud.get_page_versions, **kwargs)
+
+    async def get_page_rows(self, db: Any, **kwargs) -> Page[Row]:
+        """Página como linhas das colunas do read_schema, sem ORM"""
+        return await self.run(db, self.crud.get_page_rows, **kwargs)
+
+    async def get_row(self, db: Any, id: int, **kwargs) -> Optional[Row]:
+        """Linha com as colunas de fields= e atualizado_em, sem ORM"""
+        return await self.run(db, self.crud.get_row, id, **kwargs)
+
+    async def facets(self, db: Any, **kwargs) -> Dict[str, Any]:
+        """Total e contagens por faceta com os filtros da listagem"""
+        return await self.run(db, self.crud.facets, **kwargs)
+
+    async def update(
+        self, db: Any, *, db_obj: ModelType, obj_in: UpdateSchemaType
+    ) -> ModelType:
+        """Atualizar entidade"""
+        return await self.run(db, self.crud.update, db_obj=db_obj, obj_in=obj_in)
+
+    async def remove(self, db: Any, *, id: int) -> Optional[ModelType]:
+        """Deletar entidade"""
+        return await self.run(db, self.crud.remove, id=id)
+
+    async def create_returning(self, db: Any, *, obj_in: CreateSchemaType) -> ModelType:
+        """Criar com um único INSERT ... RETURNING"""
+        return await self.run(db, self.crud.create_returning, obj_in=obj_in)
+
+    async def update_returning(
+        self, db: Any, *, id: int, obj_in: UpdateSchemaType
+    ) -> Optional[ModelType]:
+        """Atualizar com um único UPDATE ... RETURNING"""
+        return await self.run(db, self.crud.update_returning, id=id, obj_in=obj_in)
+
+    async def remove_returning(self, db: Any, *, id: int) -> Optional[ModelType]:
+        """Deletar com um único DELETE ... RETURNING"""
+        return await self.run(db, self.crud.remove_returning, id=id)
+
+    async def count(self, db: Any, **kwargs) -> int:
+        """Contar registros"""
+        return await self.run(db, self.crud.count, **kwargs)
+
+    def export(
+        self,
+        db: Any,
+        *,
+        fmt: ExportFormat,
+        sort: Optional[str] = None,
+        filters: Optional[Mapping[str, Any]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Union[AsyncIterator[bytes], Iterator[bytes]]:
+        """Corpo da exportação em streaming (para StreamingResponse)
+
+        A consulta é montada aqui, então filtros inválidos falham antes da
+        resposta começar; a leitura usa uma conexão própria do engine da
+        sessão.
+        """
+        statement = self.crud.export_statement(
+            sort=sort, filters=filters, fields=fields
+        )
+        chunk_size = settings.EXPORT_CHUNK_SIZE
+        if isinstance(db, AsyncSession):
+            return stream_rows_async(db.bind, statement, fmt, chunk_size)
+        return stream_rows(db.get_bind(), statement, fmt, chunk_size)
+
+    async def import_file(
+        self,
+        db: Any,
+        file: BinaryIO,
+        *,
+        schema: Type[CreateSchemaType],
+        fmt: ExportFormat,
+        report_path: str,
+    ) -> ImportResult:
+        """Importa um arquivo CSV/NDJSON em blocos de IMPORT_CHUNK_SIZE
+
+        O arquivo é lido sob demanda no threadpool e cada bloco é gravado
+        numa transação própria; blocos já gravados permanecem mesmo que um
+        bloco seguinte falhe. Os erros vão para um relatório CSV em disco,
+        baixado em report_path/<id>.
+        """
+        records = read_records(file, fmt)
+        report = ImportErrorReport(
+            self.model.__name__,
+            sample=settings.IMPORT_ERROR_SAMPLE,
+            ttl=settings.IMPORT_REPORT_TTL,
+        )
+        total = criados = 0
+        try:
+            while True:
+                try:
+                    batch = await run_in_threadpool(
+                        next_batch, records, settings.IMPORT_CHUNK_SIZE
+                    )
+                except ImportFileError as e:
+                    report.add(e.linha, str(e))
+                    break
+                if not batch:
+                    break
+                count_batch()
+                total += len(batch)
+                try:
+                    created, erros = await self.run(
+                        db, self.crud.import_rows, batch, schema=schema
+                    )
+                except SQLAlchemyError as e:
+                    # A falha pode vir de fora do try/rollback de create_bulk
+                    # (ex.: lookups); sem rollback o próximo bloco herdaria a
+                    # transação abortada
+                    await run_sync(db, Session.rollback)
+                    message = f"Falha ao gravar o bloco: {e.__class__.__name__}"
+                    created, erros = 0, [(record.linha, message) for record in batch]
+                criados += created
+                report.add_all(erros)
+        finally:
+            report.close()
+        return ImportResult(
+            total=total,
+            criados=criados,
+            com_erro=report.count,
+            erros=report.sample,
+            relatorio_erros=(
+                f"{report_path}/{report.report_id}" if report.report_id else None
+            ),
+        )
+
+    def next_cursor(self, items: List[ModelType], **kwargs) -> Optional[str]:
+        """Cursor da próxima página (não acessa o banco)"""
+        return self.crud.next_cursor(items, **kwargs)
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        attribute = getattr(self.crud, name)
+        if not callable(attribute):
+            return attribute
+
+        async def method(db: Any, *args, **kwargs):
+            return await self.run(db, attribute, *args, **kwargs)
+
+        method.__name__ = name
+        method.__doc__ = attribute.__doc__
+        return method
@@ -1,21 +1,36 @@
 from typing import List
 
-from sqlmodel import Session, select
+from sqlmodel import Session
 
+from crud.async_base import AsyncCRUDBase
 from crud.base import CRUDBase
-from domain.models import Autor, AutorCreate, AutorUpdate
+from crud.filters import FilterSpec
+from domain.models import Autor, AutorCreate, AutorRead, AutorUpdate
 
 
 class CRUDAutor(CRUDBase[Autor, AutorCreate, AutorUpdate]):
-    def get_by_nome(self, db: Session, *, nome: str) -> List[Autor]:
+    cache_ttl = 300
+    read_schema = AutorRead
+    sort_fields = ("id", "nome", "data_criacao")
+    filter_fields = {
+        "nome": FilterSpec("nome", "ilike"),
+        "nacionalidade": FilterSpec("nacionalidade"),
+    }
+
+    def get_by_nome(
+        self, db: Session, *, nome: str, skip: int = 0, limit: int = 100
+    ) -> List[Autor]:
         """Buscar autores por nome (busca parcial)"""
-        statement = select(Autor).where(Autor.nome.ilike(f"%{nome}%"))
-        return db.exec(statement).all()
+        return self.get_multi(db, skip=skip, limit=limit, filters={"nome": nome})
 
-    def get_by_nacionalidade(self, db: Session, *, nacionalidade: str) -> List[Autor]:
+    def get_by_nacionalidade(
+        self, db: Session, *, nacionalidade: str, skip: int = 0, limit: int = 100
+    ) -> List[Autor]:
         """Filtrar por nacionalidade"""
-        statement = select(Autor).where(Autor.nacionalidade == nacionalidade)
-        return db.exec(statement).all()
+        return self.get_multi(
+            db, skip=skip, limit=limit, filters={"nacionalidade": nacionalidade}
+        )
 
 
 crud_autor = CRUDAutor(Autor)
+crud_autor_async = AsyncCRUDBase(crud_autor)
@@ -1,19 +1,79 @@
 import logging
-from typing import Generic, List, Optional, Type, TypeVar
+from datetime import datetime
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
+from pydantic import ValidationError
+from sqlalchemy import Delete, Insert, Update, delete, insert, tuple_, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, make_transient_to_detached, selectinload
 from sqlmodel import Session, func, select
 
+from config.config import settings
 from config.logging_config import log_operation
-from domain.models import SQLModel
+from config.query_stats import count_batch
+from config.replicas import is_replica_session
+from crud.cache import entity_cache
+from crud.counters import bump_count, estimate_count, read_count
+from crud.exceptions import (
+    DuplicateValueError,
+    InvalidCursorError,
+    InvalidQueryError,
+    ReferencedRowError,
+    ReferenceNotFoundError,
+)
+from crud.facets import cache_key, facet_cache, facet_counts
+from crud.filters import FilterSpec, compile_filters
+from crud.importer import ImportRecord
+from crud.pagination import Page, decode_cursor, encode_cursor, parse_sort
+from crud.projection import read_columns
+from domain.models import BulkCreateResult, BulkItemError, Contador, SQLModel
 
 logger = logging.getLogger("uvicorn")
 
+# Linhas por INSERT do create_bulk: a página padrão do insertmanyvalues do
+# SQLAlchemy, bem abaixo do limite de parâmetros do SQLite e do Postgres
+INSERT_PAGE_SIZE = 1000
+
 ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=SQLModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=SQLModel)
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Colunas não nulas aceitas como chave de ordenação/cursor
+    sort_fields: Tuple[str, ...] = ("id",)
+    # Filtros declarativos aceitos por get_multi (nome do parâmetro -> spec)
+    filter_fields: Dict[str, FilterSpec] = {}
+    # Relacionamentos aceitos em expand= (nome -> "joined" ou "selectin").
+    # "joined" para N:1 (entra no mesmo SELECT); "selectin" para coleções
+    # (uma consulta extra por página, com IN nos ids carregados).
+    expand_fields: Dict[str, str] = {}
+    # Validações da criação em lote, feitas com um único IN por campo
+    unique_fields: Dict[str, str] = {}  # campo -> mensagem de duplicidade
+    reference_fields: Dict[str, Tuple[Type[SQLModel], str]] = {}  # FK -> (modelo, msg)
+    # Importação: coluna com o nome da referência -> (FK, modelo com `nome`)
+    lookup_fields: Dict[str, Tuple[str, Type[SQLModel]]] = {}
+    # TTL (segundos) do cache de get() por id; None desativa o cache do modelo
+    cache_ttl: Optional[float] = None
+    # Schema de leitura (só colunas da tabela) das listagens sem expand:
+    # get_page_rows projeta essas colunas e a página não passa pelo ORM
+    read_schema: Optional[Type[SQLModel]] = None
+    # Facetas aceitas por facets() (nome -> coluna ou expressão agrupada)
+    facet_fields: Dict[str, Any] = {}
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
 
@@ -23,6 +83,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             obj_data = obj_in.model_dump()
             db_obj = self.model(**obj_data)
             db.add(db_obj)
+            bump_count(db, self.model.__name__, 1)
             db.commit()
             db.refresh(db_obj)
             log_operation("CREATE", self.model.__name__, db_obj.id, True)
@@ -32,10 +93,189 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             log_operation("CREATE", self.model.__name__, None, False, str(e))
             raise
 
-    def get(self, db: Session, id: int) -> Optional[ModelType]:
-        """Buscar por ID"""
+    def _bulk_errors(
+        self, db: Session, objs_in: List[CreateSchemaType]
+    ) -> Dict[int, str]:
+        """Valida FKs e campos únicos do lote inteiro com uma consulta por campo"""
+        erros: Dict[int, str] = {}
+        for field, (ref_model, message) in self.reference_fields.items():
+            values = {getattr(obj, field) for obj in objs_in}
+            statement = select(ref_model.id).where(ref_model.id.in_(values))
+            existing = set(db.exec(statement))
+            for i, obj in enumerate(objs_in):
+                if getattr(obj, field) not in existing:
+                    erros.setdefault(i, message)
+
+        for field, message in self.unique_fields.items():
+            column = getattr(self.model, field)
+            values = {getattr(obj, field) for obj in objs_in}
+            taken = set(db.exec(select(column).where(column.in_(values))))
+            for i, obj in enumerate(objs_in):
+                value = getattr(obj, field)
+                if value in taken:
+                    erros.setdefault(i, message)
+                taken.add(value)  # duplicado dentro do próprio lote
+        return erros
+
+    def _insert_values(self, obj_in: CreateSchemaType) -> Dict[str, Any]:
+        """Valores do INSERT: campos do schema mais os padrões do modelo
+
+        Mesmo resultado de instanciar o modelo (aplica os default_factory,
+        ex.: data_criacao), sem montar um objeto ORM por linha.
+        """
+        values = obj_in.model_dump()
+        for name, field in self.model.model_fields.items():
+            if name != "id" and name not in values:
+                values[name] = field.get_default(call_default_factory=True)
+        return values
+
+    def create_bulk(
+        self, db: Session, *, objs_in: List[CreateSchemaType]
+    ) -> BulkCreateResult:
+        """Criar entidades em lote: INSERT multi-linha numa única transação
+
+        Linhas inválidas são reportadas por índice e não impedem as demais.
+        O INSERT sai em páginas de INSERT_PAGE_SIZE linhas; as páginas além
+        da primeira contam como blocos extras no orçamento de consultas.
+        """
+        erros = self._bulk_errors(db, objs_in) if objs_in else {}
+        validos = [i for i in range(len(objs_in)) if i not in erros]
+        ids: List[Optional[int]] = [None] * len(objs_in)
         try:
-            obj = db.get(self.model, id)
+            if validos:
+                rows = [self._insert_values(objs_in[i]) for i in validos]
+                # No Postgres o SQLAlchemy garante a ordem do RETURNING em lote;
+                # no SQLite isso o faria inserir linha a linha, e lá a ordem do
+                # RETURNING já segue a de inserção.
+                ordered = db.get_bind().dialect.name != "sqlite"
+                statement = insert(self.model).returning(
+                    self.model.id, sort_by_parameter_order=ordered
+                )
+                new_ids: List[int] = []
+                for start in range(0, len(rows), INSERT_PAGE_SIZE):
+                    if start:
+                        count_batch()
+                    page = rows[start : start + INSERT_PAGE_SIZE]
+                    new_ids.extend(db.execute(statement, page).scalars().all())
+                for i, new_id in zip(validos, new_ids):
+                    ids[i] = new_id
+                bump_count(db, self.model.__name__, len(validos))
+            db.commit()
+            log_operation("CREATE_BULK", self.model.__name__, None, True)
+        except Exception as e:
+            db.rollback()
+            log_operation("CREATE_BULK", self.model.__name__, None, False, str(e))
+            raise
+        return BulkCreateResult(
+            total=len(objs_in),
+            criados=len(validos),
+            ids=ids,
+            erros=[
+                BulkItemError(indice=i, erro=message)
+                for i, message in sorted(erros.items())
+            ],
+        )
+
+    def _resolve_lookups(
+        self, db: Session, records: List[ImportRecord]
+    ) -> Dict[int, str]:
+        """Troca referências por nome pelo id, com uma consulta por campo
+
+        Só vale para registros sem a FK explícita; nomes inexistentes ou
+        ambíguos viram erro da linha.
+        """
+        erros: Dict[int, str] = {}
+        for name_field, (fk_field, ref_model) in self.lookup_fields.items():
+            pending = [
+                record
+                for record in records
+                if fk_field not in record.dados and record.dados.get(name_field)
+            ]
+            if not pending:
+                continue
+            nomes = {record.dados[name_field] for record in pending}
+            statement = select(ref_model.nome, ref_model.id).where(
+                ref_model.nome.in_(nomes)
+            )
+            ids: Dict[str, Optional[int]] = {}
+            for nome, ref_id in db.exec(statement):
+                ids[nome] = None if nome in ids else ref_id  # None: ambíguo
+            _, not_found = self.reference_fields[fk_field]
+            for record in pending:
+                nome = record.dados[name_field]
+                if nome not in ids:
+                    erros[record.linha] = not_found
+                elif ids[nome] is None:
+                    erros[record.linha] = (
+                        f"{name_field} ambíguo: {nome}; informe {fk_field}"
+                    )
+                else:
+                    record.dados[fk_field] = ids[nome]
+        return erros
+
+    def import_rows(
+        self,
+        db: Session,
+        records: List[ImportRecord],
+        *,
+        schema: Type[CreateSchemaType],
+    ) -> Tuple[int, List[Tuple[int, str]]]:
+        """Grava um bloco de registros importados numa única transação
+
+        Valida cada registro com o schema de criação e delega a create_bulk
+        (FKs e campos únicos checados com um IN por campo). Retorna quantos
+        foram criados e os erros como (linha, mensagem).
+        """
+        erros = {record.linha: record.erro for record in records if record.erro}
+        pending = [record for record in records if not record.erro]
+        erros.update(self._resolve_lookups(db, pending))
+        objs_in: List[CreateSchemaType] = []
+        linhas: List[int] = []
+        for record in pending:
+            if record.linha in erros:
+                continue
+            try:
+                objs_in.append(schema.model_validate(record.dados))
+                linhas.append(record.linha)
+            except ValidationError as e:
+                erros[record.linha] = "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                    for error in e.errors()
+                )
+        criados = 0
+        if objs_in:
+            result = self.create_bulk(db, objs_in=objs_in)
+            criados = result.criados
+            for item in result.erros:
+                erros[linhas[item.indice]] = item.erro
+        return criados, sorted(erros.items())
+
+    def get(
+        self, db: Session, id: int, *, expand: Optional[Iterable[str]] = None
+    ) -> Optional[ModelType]:
+        """Buscar por ID (read-through no cache de entidades, sem expand)
+
+        Leituras de réplica consultam o cache mas não o preenchem: uma linha
+        atrasada iria para todos os clientes, inclusive os fixados no
+        primário depois de uma escrita.
+        """
+        options = self.loader_options(expand)
+        use_cache = self.cache_ttl is not None and entity_cache.enabled and not options
+        try:
+            obj = self._from_cache(db, id) if use_cache else None
+            if obj is None:
+                # Anotada antes do SELECT: uma invalidação entre a leitura e o
+                # set descarta o preenchimento
+                generation = entity_cache.generation(self.model.__name__, id)
+                obj = db.get(self.model, id, options=options)
+                if obj and use_cache and not is_replica_session(db):
+                    entity_cache.set(
+                        self.model.__name__,
+                        id,
+                        obj.model_dump(),
+                        self.cache_ttl,
+                        generation=generation,
+                    )
             if obj:
                 log_operation("READ", self.model.__name__, id, True)
             return obj
@@ -43,12 +283,95 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             log_operation("READ", self.model.__name__, id, False, str(e))
             return None
 
+    def _from_cache(self, db: Session, id: int) -> Optional[ModelType]:
+        """Reconstrói a entidade do cache como instância persistente da sessão"""
+        key = db.identity_key(self.model, id)
+        if key in db.identity_map:
+            return db.identity_map[key]
+        data = entity_cache.get(self.model.__name__, id)
+        if data is None:
+            return None
+        obj = self.model(**data)
+        # Sem SELECT: a instância entra na sessão como se tivesse sido carregada,
+        # então update()/remove() continuam funcionando sobre ela
+        make_transient_to_detached(obj)
+        return db.merge(obj, load=False)
+
+    def _invalidate_cache(self, id: int) -> None:
+        """Remove a entidade do cache após uma escrita confirmada"""
+        if self.cache_ttl is not None:
+            entity_cache.invalidate(self.model.__name__, id)
+
+    def loader_options(self, expand: Optional[Iterable[str]]) -> List[Any]:
+        """Estratégias de eager loading para os relacionamentos pedidos"""
+        options = []
+        for name in expand or ():
+            strategy = self.expand_fields.get(name)
+            if strategy is None:
+                raise InvalidQueryError(f"Relacionamento não expansível: {name}")
+            attribute = getattr(self.model, name)
+            loader = joinedload if strategy == "joined" else selectinload
+            options.append(loader(attribute))
+        return options
+
+    def build_filters(self, filters: Optional[Mapping[str, Any]]) -> List[Any]:
+        """Compila os filtros declarados em filter_fields em cláusulas WHERE"""
+        return compile_filters(self.model, self.filter_fields, filters)
+
+    def _order_and_seek(self, statement, *, sort: Optional[str], cursor: Optional[str]):
+        """Aplica ORDER BY (sort_key, id) e, se houver cursor, o predicado de seek"""
+        sort_key, desc = parse_sort(sort)
+        if sort_key not in self.sort_fields:
+            raise InvalidQueryError(f"Ordenação não suportada: {sort_key}")
+        column = getattr(self.model, sort_key)
+        id_column = self.model.id
+
+        if cursor:
+            cursor_sort, value, last_id = decode_cursor(cursor)
+            if cursor_sort != (sort or "id"):
+                raise InvalidCursorError("Cursor gerado para outra ordenação")
+            if sort_key == "id":
+                seek = id_column < last_id if desc else id_column > last_id
+            else:
+                key = tuple_(column, id_column)
+                seek = key < (value, last_id) if desc else key > (value, last_id)
+            statement = statement.where(seek)
+
+        if sort_key == "id":
+            order_by = (id_column.desc() if desc else id_column.asc(),)
+        elif desc:
+            order_by = (column.desc(), id_column.desc())
+        else:
+            order_by = (column.asc(), id_column.asc())
+        return statement.order_by(*order_by)
+
+    def next_cursor(
+        self, items: List[ModelType], *, limit: int, sort: Optional[str] = None
+    ) -> Optional[str]:
+        """Cursor da próxima página (None quando a página não veio cheia)"""
+        if not items or len(items) < limit:
+            return None
+        sort_key, _ = parse_sort(sort)
+        last = items[-1]
+        return encode_cursor(sort or "id", getattr(last, sort_key), last.id)
+
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        filters: Optional[Mapping[str, Any]] = None,
+        expand: Optional[Iterable[str]] = None,
     ) -> List[ModelType]:
-        """Listar com paginação"""
+        """Listar com filtros combináveis e paginação por offset ou cursor"""
+        statement = select(self.model).options(*self.loader_options(expand))
+        statement = self._page_statement(
+            statement, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters
+        )
         try:
-            statement = select(self.model).offset(skip).limit(limit)
             results = db.exec(statement).all()
             log_operation("READ_MULTI", self.model.__name__, None, True)
             return results
@@ -56,22 +379,191 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             log_operation("READ_MULTI", self.model.__name__, None, False, str(e))
             return []
 
+    def _page_statement(
+        self,
+        statement,
+        *,
+        skip: int,
+        limit: int,
+        cursor: Optional[str],
+        sort: Optional[str],
+        filters: Optional[Mapping[str, Any]],
+    ):
+        """Filtros, ordenação e limites de uma página da listagem"""
+        statement = statement.where(*self.build_filters(filters))
+        statement = self._order_and_seek(statement, sort=sort, cursor=cursor)
+        if not cursor:
+            statement = statement.offset(skip)
+        return statement.limit(limit)
+
+    def get_version(self, db: Session, id: int) -> Optional[datetime]:
+        """Versão (atualizado_em) da entidade, sem carregar a linha
+
+        Vem do cache de entidades quando ele tem a entidade; senão é um
+        SELECT só da coluna pela PK.
+        """
+        if self.cache_ttl is not None and entity_cache.enabled:
+            data = entity_cache.get(self.model.__name__, id)
+            if data is not None:
+                return data["atualizado_em"]
+        statement = select(self.model.atualizado_em).where(self.model.id == id)
+        return db.exec(statement).first()
+
+    def get_page_versions(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        filters: Optional[Mapping[str, Any]] = None,
+    ) -> List[Tuple[int, datetime]]:
+        """(id, atualizado_em) das linhas da página que get_multi devolveria"""
+        statement = select(self.model.id, self.model.atualizado_em)
+        statement = self._page_statement(
+            statement, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters
+        )
+        return [tuple(row) for row in db.exec(statement).all()]
+
+    def get_page_rows(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        filters: Optional[Mapping[str, Any]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[Row]:
+        """Página como linhas (tuplas) das colunas do read_schema, sem ORM
+
+        Mesma consulta de get_page, mas sem hidratar entidades nem revalidar
+        cada linha; com fields= só essas colunas do schema são lidas. Elas
+        vêm primeiro, na ordem pedida; depois vêm as que o ETag e o cursor
+        precisam e não foram pedidas.
+        """
+        columns = read_columns(self.read_schema, fields)
+        table = self.model.__table__
+        sort_key, _ = parse_sort(sort)
+        for extra in ("id", "atualizado_em", sort_key):
+            # Chave de ordenação inválida fica para o _page_statement recusar
+            if extra not in columns and extra in table.c:
+                columns.append(extra)
+        statement = select(*(table.c[name] for name in columns))
+        statement = self._page_statement(
+            statement, skip=skip, limit=limit, cursor=cursor, sort=sort, filters=filters
+        )
+        rows = db.exec(statement).all()
+        next_cursor = self.next_cursor(rows, limit=limit, sort=sort)
+        return Page(items=rows, next_cursor=next_cursor)
+
+    def get_row(
+        self, db: Session, id: int, *, fields: Optional[Sequence[str]] = None
+    ) -> Optional[Row]:
+        """Linha (tupla) com as colunas de fields= e atualizado_em, sem ORM"""
+        columns = read_columns(self.read_schema, fields) + ["atualizado_em"]
+        table = self.model.__table__
+        statement = select(*(table.c[name] for name in columns))
+        return db.exec(statement.where(table.c.id == id)).first()
+
+    def export_statement(
+        self,
+        *,
+        sort: Optional[str] = None,
+        filters: Optional[Mapping[str, Any]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ):
+        """SELECT das colunas da tabela para exportação (linhas, sem ORM)
+
+        Mesmos filtros e ordenação da listagem; sem limite, para ser lido
+        em blocos por um cursor do servidor. Com fields=, só essas colunas
+        do schema de leitura.
+        """
+        table = self.model.__table__
+        if fields:
+            columns = [table.c[name] for name in read_columns(self.read_schema, fields)]
+        else:
+            columns = list(table.columns)
+        statement = select(*columns).where(*self.build_filters(filters))
+        return self._order_and_seek(statement, sort=sort, cursor=None)
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        filters: Optional[Mapping[str, Any]] = None,
+        expand: Optional[Iterable[str]] = None,
+    ) -> Page[ModelType]:
+        """Listar uma página junto com o cursor opaco da próxima"""
+        items = self.get_multi(
+            db,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            filters=filters,
+            expand=expand,
+        )
+        next_cursor = self.next_cursor(items, limit=limit, sort=sort)
+        return Page(items=items, next_cursor=next_cursor)
+
+    def facets(
+        self,
+        db: Session,
+        *,
+        names: Optional[Sequence[str]] = None,
+        filters: Optional[Mapping[str, Any]] = None,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        """Total e contagens por faceta com os filtros da listagem
+
+        Todas as facetas pedidas (ou todas as de facet_fields) saem de uma
+        só consulta agrupada. O resultado fica em cache por
+        FACETS_CACHE_TTL segundos para o mesmo conjunto de filtros.
+        """
+        names = list(dict.fromkeys(names or self.facet_fields))
+        invalid = [name for name in names if name not in self.facet_fields]
+        if invalid:
+            raise InvalidQueryError(f"Facetas não suportadas: {', '.join(invalid)}")
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        where = self.build_filters(filters)
+        ttl = settings.FACETS_CACHE_TTL
+        key = cache_key(self.model.__name__, names, filters, limit)
+        result = facet_cache.get(key) if ttl > 0 else None
+        if result is None:
+            facets = {name: self.facet_fields[name] for name in names}
+            result = facet_counts(db, self.model, facets, where, limit=limit)
+            # Só o primário alimenta o cache, como em get()
+            if ttl > 0 and not is_replica_session(db):
+                facet_cache.set(key, result, ttl)
+        return result
+
     def update(
         self, db: Session, *, db_obj: ModelType, obj_in: UpdateSchemaType
     ) -> ModelType:
         """Atualizar entidade"""
+        # Lido antes do commit: depois dele o objeto expira e db_obj.id
+        # dispararia um SELECT extra antes do refresh
+        id = db_obj.id
         try:
             obj_data = obj_in.model_dump(exclude_unset=True)
             for field, value in obj_data.items():
                 setattr(db_obj, field, value)
             db.add(db_obj)
             db.commit()
+            self._invalidate_cache(id)
             db.refresh(db_obj)
-            log_operation("UPDATE", self.model.__name__, db_obj.id, True)
+            log_operation("UPDATE", self.model.__name__, id, True)
             return db_obj
         except Exception as e:
             db.rollback()
-            log_operation("UPDATE", self.model.__name__, db_obj.id, False, str(e))
+            log_operation("UPDATE", self.model.__name__, id, False, str(e))
             raise
 
     def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
@@ -80,7 +572,9 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             obj = db.get(self.model, id)
             if obj:
                 db.delete(obj)
+                bump_count(db, self.model.__name__, -1)
                 db.commit()
+                self._invalidate_cache(id)
                 log_operation("DELETE", self.model.__name__, id, True)
             return obj
         except Exception as e:
@@ -88,13 +582,207 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             log_operation("DELETE", self.model.__name__, id, False, str(e))
             raise
 
-    def count(self, db: Session) -> int:
-        """Contar total de registros"""
+    def create_returning(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+        """Criar com um único INSERT ... RETURNING, sem SELECTs de validação
+
+        Chave estrangeira inexistente e valor único repetido vêm da violação
+        de constraint (ReferenceNotFoundError/DuplicateValueError); só nesse
+        caso são feitas consultas, para montar a mensagem.
+        """
+        values = self._insert_values(obj_in)
+        statement = insert(self.model).values(**values)
         try:
-            statement = select(func.count(self.model.id))
-            count = db.exec(statement).one()
+            row = self._execute_counted(db, statement, 1)[0]
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            log_operation("CREATE", self.model.__name__, None, False, str(e.orig))
+            raise self._integrity_error(db, e, values) from e
+        except Exception as e:
+            db.rollback()
+            log_operation("CREATE", self.model.__name__, None, False, str(e))
+            raise
+        log_operation("CREATE", self.model.__name__, row.id, True)
+        return self.model(**row._mapping)
+
+    def update_returning(
+        self, db: Session, *, id: int, obj_in: UpdateSchemaType
+    ) -> Optional[ModelType]:
+        """Atualizar com um único UPDATE ... RETURNING (None se o id não existe)"""
+        values = obj_in.model_dump(exclude_unset=True)
+        if not values:
+            return self.get(db, id)
+        statement = update(self.model).where(self.model.id == id).values(**values)
+        try:
+            rows = self._write_returning(db, statement, id=id)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            log_operation("UPDATE", self.model.__name__, id, False, str(e.orig))
+            raise self._integrity_error(db, e, values, id=id) from e
+        except Exception as e:
+            db.rollback()
+            log_operation("UPDATE", self.model.__name__, id, False, str(e))
+            raise
+        if not rows:
+            return None
+        self._invalidate_cache(id)
+        log_operation("UPDATE", self.model.__name__, id, True)
+        return self.model(**rows[0]._mapping)
+
+    def remove_returning(self, db: Session, *, id: int) -> Optional[ModelType]:
+        """Deletar com um único DELETE ... RETURNING (None se o id não existe)
+
+        Registro ainda referenciado gera ReferencedRowError, pela violação
+        da chave estrangeira.
+        """
+        statement = delete(self.model).where(self.model.id == id)
+        try:
+            rows = self._execute_counted(db, statement, -1, id=id)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            log_operation("DELETE", self.model.__name__, id, False, str(e.orig))
+            if _is_foreign_key_violation(e):
+                raise ReferencedRowError(
+                    f"{self.model.__name__} possui registros vinculados"
+                ) from e
+            raise
+        except Exception as e:
+            db.rollback()
+            log_operation("DELETE", self.model.__name__, id, False, str(e))
+            raise
+        if not rows:
+            return None
+        self._invalidate_cache(id)
+        log_operation("DELETE", self.model.__name__, id, True)
+        return self.model(**rows[0]._mapping)
+
+    def _write_returning(
+        self, db: Session, statement, *, id: Optional[int] = None
+    ) -> List[Any]:
+        """Executa o INSERT/UPDATE/DELETE devolvendo as linhas afetadas
+
+        Em dialetos sem RETURNING, emula com um SELECT pela PK (antes do
+        DELETE; depois do INSERT/UPDATE).
+        """
+        dialect = db.get_bind().dialect
+        columns = self.model.__table__.columns
+        if isinstance(statement, Insert):
+            supported = dialect.insert_returning
+        elif isinstance(statement, Update):
+            supported = dialect.update_returning
+        else:
+            supported = dialect.delete_returning
+        if supported:
+            return db.execute(statement.returning(*columns)).all()
+
+        def by_id(pk):
+            return select(*columns).where(self.model.id == pk)
+
+        if isinstance(statement, Delete):
+            rows = db.execute(by_id(id)).all()
+            if rows:
+                db.execute(statement)
+            return rows
+        result = db.execute(statement)
+        if isinstance(statement, Insert):
+            id = result.inserted_primary_key[0]
+        elif result.rowcount == 0:
+            return []
+        return db.execute(by_id(id)).all()
+
+    def _execute_counted(
+        self, db: Session, statement, sign: int, *, id: Optional[int] = None
+    ) -> List[Any]:
+        """INSERT/DELETE devolvendo as linhas, com o ajuste do contador
+
+        No Postgres o ajuste vai no mesmo comando, numa CTE de escrita; nos
+        outros bancos é um UPDATE em seguida, na mesma transação.
+        """
+        entidade = self.model.__name__
+        if db.get_bind().dialect.name != "postgresql":
+            rows = self._write_returning(db, statement, id=id)
+            bump_count(db, entidade, sign * len(rows))
+            return rows
+        alteradas = statement.returning(*self.model.__table__.columns).cte(
+            "alteradas"
+        )
+        quantidade = select(func.count()).select_from(alteradas).scalar_subquery()
+        contador = (
+            update(Contador)
+            .where(Contador.entidade == entidade)
+            .values(quantidade=Contador.quantidade + sign * quantidade)
+            .cte("contador")
+        )
+        return db.execute(select(alteradas).add_cte(contador)).all()
+
+    def _integrity_error(
+        self,
+        db: Session,
+        error: IntegrityError,
+        values: Mapping[str, Any],
+        *,
+        id: Optional[int] = None,
+    ) -> Exception:
+        """Erro da API para a constraint violada (ou o próprio erro original)
+
+        O SQLite não diz qual chave estrangeira falhou, então as referências
+        e os campos únicos da escrita são verificados aqui, fora do caminho
+        feliz.
+        """
+        if _is_foreign_key_violation(error):
+            for field, (ref_model, message) in self.reference_fields.items():
+                value = values.get(field)
+                if value is not None and db.get(ref_model, value) is None:
+                    return ReferenceNotFoundError(message)
+        for field, message in self.unique_fields.items():
+            if values.get(field) is None:
+                continue
+            column = getattr(self.model, field)
+            statement = select(self.model.id).where(column == values[field])
+            if id is not None:
+                statement = statement.where(self.model.id != id)
+            if db.exec(statement).first() is not None:
+                return DuplicateValueError(message)
+        return error
+
+    def count(
+        self,
+        db: Session,
+        *,
+        filters: Optional[Mapping[str, Any]] = None,
+        approx: bool = False,
+    ) -> int:
+        """Contar registros
+
+        Sem filtros lê o contador mantido pelas escritas (O(1)); com
+        approx=True usa a estimativa do Postgres. Com filtros faz count(*)
+        com o mesmo WHERE da listagem.
+        """
+        try:
+            clauses = self.build_filters(filters)
+            count = None
+            if clauses:
+                statement = (
+                    select(func.count()).select_from(self.model).where(*clauses)
+                )
+                count = db.exec(statement).one()
+            elif approx:
+                count = estimate_count(db, self.model)
+            if count is None:
+                count = read_count(db, self.model)
             log_operation("COUNT", self.model.__name__, None, True)
             return count
+        except InvalidQueryError:
+            raise
         except Exception as e:
+            # Sem fallback para 0: seria indistinguível de uma tabela vazia
             log_operation("COUNT", self.model.__name__, None, False, str(e))
-            return 0
+            raise
+
+
+def _is_foreign_key_violation(error: IntegrityError) -> bool:
+    # SQLSTATE 23503 (psycopg2/asyncpg); o SQLite só informa na mensagem
+    code = getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+    return code == "23503" or "FOREIGN KEY constraint failed" in str(error.orig)
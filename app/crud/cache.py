@@ -0,0 +1,153 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from config.config import settings
+
+
+class CacheBackend(ABC):
+    """Armazenamento do cache de entidades (em processo agora, compartilhado depois)
+
+    Os valores são dicts com as colunas da entidade; um backend compartilhado
+    (ex.: Redis) só precisa serializá-los.
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Dict[str, Any], ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def size(self) -> int:
+        return 0
+
+    def evictions(self) -> int:
+        return 0
+
+
+class InMemoryLRUCache(CacheBackend):
+    """LRU limitado por número de entradas, com expiração por TTL"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        # chave -> (expira_em, valor), da menos para a mais recentemente usada
+        self._data: "OrderedDict[Hashable, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def size(self) -> int:
+        return len(self._data)
+
+    def evictions(self) -> int:
+        return self._evictions
+
+
+class EntityCache:
+    """Cache read-through de entidades por (modelo, id), com contadores
+
+    Cada invalidação avança a geração da chave; quem leu do banco passa a
+    geração anotada antes do SELECT para set(), que descarta o valor se uma
+    escrita foi invalidada no meio (senão a linha antiga voltaria ao cache
+    até o TTL). As gerações ficam em GENERATION_SLOTS contadores por hash da
+    chave: colisões só fazem pular um preenchimento.
+    """
+
+    GENERATION_SLOTS = 4096
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "invalidations": 0}
+        )
+        self._generations = [0] * self.GENERATION_SLOTS
+        self._lock = threading.Lock()
+
+    def _slot(self, model: str, id: Any) -> int:
+        return hash((model, id)) % self.GENERATION_SLOTS
+
+    def get(self, model: str, id: Any) -> Optional[Dict[str, Any]]:
+        value = self.backend.get((model, id))
+        self._stats[model]["hits" if value is not None else "misses"] += 1
+        return value
+
+    def generation(self, model: str, id: Any) -> int:
+        """Geração atual da chave, a anotar antes de ler do banco"""
+        return self._generations[self._slot(model, id)]
+
+    def set(
+        self,
+        model: str,
+        id: Any,
+        value: Dict[str, Any],
+        ttl: float,
+        generation: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            slot = self._slot(model, id)
+            if generation is not None and self._generations[slot] != generation:
+                return  # invalidada depois da leitura: valor possivelmente antigo
+            self.backend.set((model, id), value, ttl)
+
+    def invalidate(self, model: str, id: Any) -> None:
+        with self._lock:
+            self._generations[self._slot(model, id)] += 1
+            self.backend.delete((model, id))
+        self._stats[model]["invalidations"] += 1
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": self.backend.size(),
+            "evictions": self.backend.evictions(),
+            "models": {model: dict(values) for model, values in self._stats.items()},
+        }
+
+
+entity_cache = EntityCache(
+    InMemoryLRUCache(max_entries=settings.CACHE_MAX_ENTRIES),
+    enabled=settings.CACHE_ENABLED,
+)
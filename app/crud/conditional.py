@@ -0,0 +1,141 @@
+import hashlib
+from typing import Any, Iterable, List, Optional, Sequence, Union
+
+from fastapi import Request, Response
+
+from config.config import settings
+from crud.async_base import AsyncCRUDBase
+from crud.pagination import Page
+from crud.exceptions import InvalidQueryError
+from crud.projection import json_response, read_columns, row_json, rows_json
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag forte a partir do que determina a representação"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def cache_control() -> str:
+    # no-cache: o cliente guarda a resposta, mas revalida (If-None-Match)
+    if settings.HTTP_CACHE_MAX_AGE > 0:
+        return f"private, max-age={settings.HTTP_CACHE_MAX_AGE}"
+    return "private, no-cache"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match confere com o ETag (comparação fraca, como manda o GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": cache_control()}
+    )
+
+
+def set_validators(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control()
+
+
+def sparse_columns(
+    crud: AsyncCRUDBase,
+    fields: Optional[Sequence[str]],
+    expand: Optional[Iterable[str]] = None,
+) -> Optional[List[str]]:
+    """Colunas pedidas em fields= (validadas contra o read_schema), ou None"""
+    if not fields:
+        return None
+    if expand:
+        raise InvalidQueryError("fields= não pode ser combinado com expand=")
+    return read_columns(crud.read_schema, fields)
+
+
+async def get_or_304(
+    crud: AsyncCRUDBase,
+    db: Any,
+    request: Request,
+    response: Response,
+    id: int,
+    *,
+    expand: Optional[Iterable[str]] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Union[Any, Response, None]:
+    """Entidade por id com ETag, ou 304 se o If-None-Match conferir
+
+    Com If-None-Match, só a versão (atualizado_em) é consultada, ou lida do
+    cache, antes de decidir; a linha só é carregada e serializada se tiver
+    mudado. Com expand a representação inclui outras tabelas, então a
+    resposta sai sem ETag. Com fields= só essas colunas são lidas e a
+    resposta já sai serializada.
+    """
+    columns = sparse_columns(crud, fields, expand)
+    variant = (crud.model.__name__, id) + ((tuple(columns),) if columns else ())
+    if not expand and "if-none-match" in request.headers:
+        versao = await crud.get_version(db, id)
+        if versao is not None:
+            etag = make_etag(*variant, versao)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+    if columns:
+        row = await crud.get_row(db, id, fields=columns)
+        if row is None:
+            return None
+        set_validators(response, make_etag(*variant, row.atualizado_em))
+        return json_response(row_json(columns, row), response=response)
+    obj = await crud.get(db, id, expand=expand)
+    if obj is not None and not expand:
+        set_validators(response, make_etag(*variant, obj.atualizado_em))
+    return obj
+
+
+async def page_or_304(
+    crud: AsyncCRUDBase,
+    db: Any,
+    request: Request,
+    response: Response,
+    *,
+    limit: int,
+    sort: Optional[str] = None,
+    expand: Optional[Iterable[str]] = None,
+    fields: Optional[Sequence[str]] = None,
+    **kwargs: Any,
+) -> Union[Page, Response]:
+    """Página da listagem com ETag, ou 304 se o If-None-Match conferir
+
+    A versão da página são os pares (id, atualizado_em) das suas linhas,
+    lidos com a mesma consulta da listagem mas só com essas duas colunas.
+    Sem expand e com read_schema, a página já sai como Response: as linhas
+    projetadas (só as colunas de fields=, se houver) vão direto para o
+    JSON, sem entidades nem response_model.
+    """
+    columns = sparse_columns(crud, fields, expand)
+    variant = (crud.model.__name__, limit, sort)
+    variant += (tuple(columns),) if columns else ()
+    if not expand and "if-none-match" in request.headers:
+        versions = await crud.get_page_versions(db, limit=limit, sort=sort, **kwargs)
+        etag = make_etag(*variant, versions)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    if not expand and crud.read_schema is not None:
+        rows = await crud.get_page_rows(
+            db, limit=limit, sort=sort, fields=columns, **kwargs
+        )
+        versions = [(row.id, row.atualizado_em) for row in rows.items]
+        set_validators(response, make_etag(*variant, versions))
+        if rows.next_cursor:
+            response.headers["X-Next-Cursor"] = rows.next_cursor
+        content = rows_json(columns or read_columns(crud.read_schema), rows.items)
+        return json_response(content, response=response)
+    page = await crud.get_page(db, limit=limit, sort=sort, expand=expand, **kwargs)
+    if not expand:
+        versions = [(item.id, item.atualizado_em) for item in page.items]
+        set_validators(response, make_etag(*variant, versions))
+    return page
@@ -0,0 +1,88 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import func, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from domain.models import Autor, Contador, Editora, Emprestimo, Livro, Usuario
+
+logger = logging.getLogger("biblioteca_api")
+
+# Entidades com contador mantido pelas escritas do CRUD
+CONTADAS = (Autor, Editora, Livro, Usuario, Emprestimo)
+
+# Estimativa do planner; -1 quando a tabela ainda não passou por ANALYZE
+POSTGRES_ESTIMATE = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:tabela)"
+)
+
+
+def bump_count(db: Session, entidade: str, delta: int) -> None:
+    """Ajusta o contador dentro da transação corrente (sem commit)
+
+    A linha é criada pela migração ou por ensure_counters na inicialização;
+    sem ela o UPDATE não afeta nada.
+    """
+    if delta:
+        db.execute(
+            update(Contador)
+            .where(Contador.entidade == entidade)
+            .values(quantidade=Contador.quantidade + delta)
+        )
+
+
+def read_count(db: Session, model: type) -> int:
+    """Lê o contador mantido, sem escrever nada
+
+    Sem a linha do contador faz count(*): a leitura pode estar numa réplica,
+    e criar a linha aqui concorreria com as escritas (um INSERT confirmado
+    entre o count(*) e a criação ficaria fora do contador para sempre).
+    """
+    quantidade = db.exec(
+        select(Contador.quantidade).where(Contador.entidade == model.__name__)
+    ).first()
+    if quantidade is not None:
+        return quantidade
+    logger.warning(f"Contador de {model.__name__} ausente; usando count(*)")
+    return db.exec(select(func.count()).select_from(model)).one()
+
+
+def estimate_count(db: Session, model: type) -> Optional[int]:
+    """Estimativa via pg_class.reltuples (None fora do Postgres ou sem ANALYZE)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = db.execute(
+        POSTGRES_ESTIMATE, {"tabela": model.__tablename__}
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
+
+
+def rebuild_counts(db: Session, *models: type) -> None:
+    """Recalcula os contadores com count(*) (após cargas fora do CRUD)"""
+    for model in models:
+        quantidade = db.exec(select(func.count()).select_from(model)).one()
+        db.merge(Contador(entidade=model.__name__, quantidade=quantidade))
+    db.commit()
+
+
+def ensure_counters(engine: Engine, *models: type) -> None:
+    """Cria, com count(*), os contadores ausentes (na inicialização da API)
+
+    A migração já os cria; aqui cobre bancos criados só com create_all.
+    """
+    with Session(engine) as db:
+        existentes = set(db.exec(select(Contador.entidade)).all())
+        for model in models or CONTADAS:
+            if model.__name__ in existentes:
+                continue
+            quantidade = db.exec(select(func.count()).select_from(model)).one()
+            try:
+                db.add(Contador(entidade=model.__name__, quantidade=quantidade))
+                db.commit()
+            except IntegrityError:
+                # Outra instância criou o contador ao mesmo tempo
+                db.rollback()
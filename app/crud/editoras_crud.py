@@ -1,17 +1,28 @@
 from typing import List
 
-from sqlmodel import Session, select
+from sqlmodel import Session
 
+from crud.async_base import AsyncCRUDBase
 from crud.base import CRUDBase
-from domain.models import Editora, EditoraCreate, EditoraUpdate
+from crud.filters import FilterSpec
+from domain.models import Editora, EditoraCreate, EditoraRead, EditoraUpdate
 
 
 class CRUDEditora(CRUDBase[Editora, EditoraCreate, EditoraUpdate]):
-    def get_by_nome(self, db: Session, *, nome: str) -> List[Editora]:
+    cache_ttl = 300
+    read_schema = EditoraRead
+    sort_fields = ("id", "nome", "data_criacao")
+    filter_fields = {
+        "nome": FilterSpec("nome", "ilike"),
+    }
+
+    def get_by_nome(
+        self, db: Session, *, nome: str, skip: int = 0, limit: int = 100
+    ) -> List[Editora]:
         """Buscar editoras por nome (busca parcial)"""
-        statement = select(Editora).where(Editora.nome.ilike(f"%{nome}%"))
-        return db.exec(statement).all()
+        return self.get_multi(db, skip=skip, limit=limit, filters={"nome": nome})
 
 
 # Instância do CRUD
 crud_editora = CRUDEditora(Editora)
+crud_editora_async = AsyncCRUDBase(crud_editora)
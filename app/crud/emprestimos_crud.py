@@ -1,88 +1,344 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from sqlmodel import Session, and_, select
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, and_, func, or_, select
 
+from crud.async_base import AsyncCRUDBase
 from crud.base import CRUDBase
+from crud.counters import bump_count
+from crud.exceptions import LivroNotFoundError, LivroUnavailableError
+from crud.filters import FilterSpec
+from crud.rollups import (
+    corrigir_devolucao,
+    registrar_devolucao,
+    registrar_emprestimo,
+    remover_emprestimo,
+)
 from config.logging_config import log_operation
 from domain.models import (
     Emprestimo,
     EmprestimoCreate,
+    EmprestimoRead,
     EmprestimoUpdate,
+    Livro,
     LivroEmprestimoLink,
     StatusEmprestimo,
+    Usuario,
 )
 
+# Status em que os livros do empréstimo continuam fora da biblioteca
+STATUS_EM_ABERTO = (StatusEmprestimo.ATIVO, StatusEmprestimo.ATRASADO)
+# Campos cuja edição muda a devolução contada nos rollups
+CAMPOS_DEVOLUCAO = {"status", "data_devolucao_real", "data_devolucao_prevista"}
+
+
+def _atrasados(model, value):
+    """Marcados como ATRASADO, mais os ativos vencidos desde a última varredura
+
+    Os dois lados usam índice (ix_emprestimo_status e o parcial de ativos por
+    vencimento); o segundo só encontra o que o job de atrasos ainda não marcou.
+    """
+    if not value:
+        return None
+    return or_(
+        model.status == StatusEmprestimo.ATRASADO,
+        and_(
+            model.status == StatusEmprestimo.ATIVO,
+            model.data_devolucao_prevista < datetime.now(),
+        ),
+    )
+
 
 class CRUDEmprestimo(CRUDBase[Emprestimo, EmprestimoCreate, EmprestimoUpdate]):
+    read_schema = EmprestimoRead
+    sort_fields = ("id", "data_emprestimo", "data_devolucao_prevista")
+    filter_fields = {
+        "usuario_id": FilterSpec("usuario_id"),
+        "status": FilterSpec("status"),
+        "atrasados": FilterSpec(build=_atrasados),
+    }
+    expand_fields = {"usuario": "joined", "livros": "selectin"}
+    reference_fields = {"usuario_id": (Usuario, "Usuário não encontrado")}
+
+    def _reservar_livros(self, db: Session, livro_ids: List[int]) -> None:
+        """Bloqueia as linhas dos livros e garante que estão disponíveis
+
+        Uma consulta só: os livros pedidos que não estão em empréstimo em
+        aberto (NOT EXISTS correlacionado), travados com SELECT ... FOR
+        UPDATE SKIP LOCKED no Postgres; um livro travado por outro checkout
+        em andamento é tratado como indisponível, em vez de enfileirar a
+        requisição. Só se faltar algum é feita uma segunda consulta, para
+        separar inexistentes (404) de indisponíveis (409).
+        """
+        ids = set(livro_ids)
+        em_uso = (
+            select(LivroEmprestimoLink.livro_id)
+            .join(Emprestimo, Emprestimo.id == LivroEmprestimoLink.emprestimo_id)
+            .where(
+                LivroEmprestimoLink.livro_id == Livro.id,
+                Emprestimo.status.in_(STATUS_EM_ABERTO),
+            )
+            .exists()
+        )
+        lock = (
+            select(Livro.id)
+            .where(Livro.id.in_(ids), ~em_uso)
+            .with_for_update(of=Livro, skip_locked=True)
+        )
+        faltando = ids - set(db.exec(lock))
+        if faltando:
+            existentes = set(db.exec(select(Livro.id).where(Livro.id.in_(faltando))))
+            if faltando - existentes:
+                raise LivroNotFoundError(sorted(faltando - existentes))
+            raise LivroUnavailableError(sorted(existentes))
+
     def create_with_livros(
         self, db: Session, *, obj_in: EmprestimoCreate
     ) -> Emprestimo:
-        """Criar empréstimo com livros associados"""
-        try:
-            # Criar empréstimo
-            obj_data = obj_in.model_dump(exclude={"livro_ids"})
-            db_obj = Emprestimo(**obj_data)
-            db.add(db_obj)
-            db.flush()  # Para obter o ID sem fazer commit
+        """Criar empréstimo com livros associados (checkout)
+
+        Valida e trava os livros em uma consulta, insere o empréstimo com
+        INSERT ... RETURNING (usuário inexistente vem da violação da chave
+        estrangeira) e os vínculos em um único INSERT em lote; contador e
+        rollups dos relatórios são atualizados na mesma transação.
 
-            # Associar livros
-            for livro_id in obj_in.livro_ids:
-                link = LivroEmprestimoLink(livro_id=livro_id, emprestimo_id=db_obj.id)
-                db.add(link)
+        Sem FOR UPDATE (SQLite), o driver só abre a transação na primeira
+        escrita; por isso o contador é ajustado antes da verificação, e
+        checkouts concorrentes verificam um depois do outro.
+        """
+        livro_ids = list(dict.fromkeys(obj_in.livro_ids))
+        values = self._insert_values(obj_in)
+        del values["livro_ids"]
+        statement = insert(Emprestimo).values(**values)
+        postgres = db.get_bind().dialect.name == "postgresql"
+        try:
+            if not postgres:
+                bump_count(db, "Emprestimo", 1)
+            self._reservar_livros(db, livro_ids)
+            if postgres:
+                row = self._execute_counted(db, statement, 1)[0]
+            else:
+                row = self._write_returning(db, statement)[0]
+            db_obj = Emprestimo(**row._mapping)
 
+            db.execute(
+                insert(LivroEmprestimoLink),
+                [
+                    {"livro_id": livro_id, "emprestimo_id": db_obj.id}
+                    for livro_id in livro_ids
+                ],
+            )
+            registrar_emprestimo(db, db_obj, livro_ids)
             db.commit()
-            db.refresh(db_obj)
-            log_operation("CREATE_WITH_LIVROS", "Emprestimo", db_obj.id, True)
-            return db_obj
+        except IntegrityError as e:
+            db.rollback()
+            log_operation("CREATE_WITH_LIVROS", "Emprestimo", None, False, str(e.orig))
+            raise self._integrity_error(db, e, values) from e
         except Exception as e:
             db.rollback()
             log_operation("CREATE_WITH_LIVROS", "Emprestimo", None, False, str(e))
             raise
+        log_operation("CREATE_WITH_LIVROS", "Emprestimo", db_obj.id, True)
+        return db_obj
+
+    def devolver(self, db: Session, *, id: int) -> Optional[Emprestimo]:
+        """Marcar como devolvido e somar a devolução aos rollups (uma transação)
+
+        O UPDATE ... RETURNING só pega empréstimos ainda não devolvidos, então
+        duas devoluções simultâneas não contam duas vezes nos relatórios.
+        None se o empréstimo não existe ou já foi devolvido.
+        """
+        statement = (
+            update(Emprestimo)
+            .where(
+                Emprestimo.id == id, Emprestimo.status != StatusEmprestimo.DEVOLVIDO
+            )
+            .values(
+                status=StatusEmprestimo.DEVOLVIDO, data_devolucao_real=datetime.now()
+            )
+        )
+        try:
+            rows = self._write_returning(db, statement, id=id)
+            if rows:
+                registrar_devolucao(db, Emprestimo(**rows[0]._mapping))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            log_operation("RETURN", "Emprestimo", id, False, str(e))
+            raise
+        if not rows:
+            return None
+        self._invalidate_cache(id)
+        log_operation("RETURN", "Emprestimo", id, True)
+        return Emprestimo(**rows[0]._mapping)
 
-    def get_by_usuario(self, db: Session, *, usuario_id: int) -> List[Emprestimo]:
+    def update_returning(
+        self, db: Session, *, id: int, obj_in: EmprestimoUpdate
+    ) -> Optional[Emprestimo]:
+        """Atualizar com UPDATE ... RETURNING, acertando os rollups
+
+        Se a edição mexe na devolução (status, data real ou prazo), a linha
+        é lida antes com FOR UPDATE e a diferença entre a devolução antiga e
+        a nova vai para os rollups na mesma transação. Status DEVOLVIDO sem
+        data de devolução usa a data atual, como devolver().
+        """
+        values = obj_in.model_dump(exclude_unset=True)
+        if not CAMPOS_DEVOLUCAO & values.keys():
+            return super().update_returning(db, id=id, obj_in=obj_in)
+        columns = Emprestimo.__table__.columns
+        atual = select(*columns).where(Emprestimo.id == id).with_for_update()
+        try:
+            row = db.execute(atual).first()
+            if row is None:
+                db.rollback()
+                return None
+            antes = Emprestimo(**row._mapping)
+            if (
+                values.get("status") == StatusEmprestimo.DEVOLVIDO
+                and values.get("data_devolucao_real") is None
+                and antes.data_devolucao_real is None
+            ):
+                values["data_devolucao_real"] = datetime.now()
+            statement = update(Emprestimo).where(Emprestimo.id == id).values(**values)
+            rows = self._write_returning(db, statement, id=id)
+            depois = Emprestimo(**rows[0]._mapping)
+            corrigir_devolucao(db, antes, depois)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            log_operation("UPDATE", "Emprestimo", id, False, str(e))
+            raise
+        self._invalidate_cache(id)
+        log_operation("UPDATE", "Emprestimo", id, True)
+        return depois
+
+    def remove(self, db: Session, *, id: int) -> Optional[Emprestimo]:
+        """Deletar empréstimo e vínculos, descontando-o dos rollups
+
+        Tudo numa transação: os relatórios continuam batendo com o histórico
+        que resumem. None se o empréstimo não existe.
+        """
+        link = LivroEmprestimoLink
+        try:
+            livro_ids = list(
+                db.exec(select(link.livro_id).where(link.emprestimo_id == id))
+            )
+            db.execute(delete(link).where(link.emprestimo_id == id))
+            statement = delete(Emprestimo).where(Emprestimo.id == id)
+            rows = self._execute_counted(db, statement, -1, id=id)
+            if rows:
+                remover_emprestimo(db, Emprestimo(**rows[0]._mapping), livro_ids)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            log_operation("DELETE", "Emprestimo", id, False, str(e))
+            raise
+        if not rows:
+            return None
+        self._invalidate_cache(id)
+        log_operation("DELETE", "Emprestimo", id, True)
+        return Emprestimo(**rows[0]._mapping)
+
+    def get_by_usuario(
+        self, db: Session, *, usuario_id: int, skip: int = 0, limit: int = 100
+    ) -> List[Emprestimo]:
         """Filtrar empréstimos por usuário"""
-        statement = select(Emprestimo).where(Emprestimo.usuario_id == usuario_id)
-        return db.exec(statement).all()
+        return self.get_multi(
+            db, skip=skip, limit=limit, filters={"usuario_id": usuario_id}
+        )
 
     def get_by_status(
-        self, db: Session, *, status: StatusEmprestimo
+        self,
+        db: Session,
+        *,
+        status: StatusEmprestimo,
+        skip: int = 0,
+        limit: int = 100,
     ) -> List[Emprestimo]:
         """Filtrar por status"""
-        statement = select(Emprestimo).where(Emprestimo.status == status)
-        return db.exec(statement).all()
+        return self.get_multi(db, skip=skip, limit=limit, filters={"status": status})
 
-    def get_atrasados(self, db: Session) -> List[Emprestimo]:
+    def get_atrasados(
+        self, db: Session, *, skip: int = 0, limit: int = 100
+    ) -> List[Emprestimo]:
         """Listar empréstimos atrasados"""
-        hoje = datetime.now()
-        statement = select(Emprestimo).where(
-            and_(
+        return self.get_multi(db, skip=skip, limit=limit, filters={"atrasados": True})
+
+    def marcar_atrasados(
+        self,
+        db: Session,
+        *,
+        agora: datetime,
+        desde: Optional[datetime] = None,
+        apos_id: Optional[int] = None,
+        limit: int = 1000,
+    ) -> int:
+        """Marca como ATRASADO um lote de empréstimos ativos vencidos
+
+        Seleciona até `limit` ids pelo índice parcial de ativos por vencimento
+        (só os vencidos a partir de `desde`, ou só os criados depois de
+        `apos_id`, se informados) e os atualiza com um UPDATE ... WHERE id
+        IN (...) numa transação. Retorna quantos marcou; os marcados saem do
+        índice parcial, então a mesma chamada devolve o próximo lote.
+        """
+        vencidos = (
+            select(Emprestimo.id)
+            .where(
                 Emprestimo.status == StatusEmprestimo.ATIVO,
-                Emprestimo.data_devolucao_prevista < hoje,
+                Emprestimo.data_devolucao_prevista < agora,
             )
+            .limit(limit)
+            # No Postgres, linhas travadas por uma devolução ficam para o
+            # próximo lote em vez de bloquear o job
+            .with_for_update(skip_locked=True)
         )
-        return db.exec(statement).all()
+        if desde is not None:
+            vencidos = vencidos.where(Emprestimo.data_devolucao_prevista >= desde)
+        if apos_id is not None:
+            vencidos = vencidos.where(Emprestimo.id > apos_id)
+        try:
+            ids = db.exec(vencidos).all()
+            if ids:
+                db.execute(
+                    update(Emprestimo)
+                    .where(
+                        Emprestimo.id.in_(ids),
+                        Emprestimo.status == StatusEmprestimo.ATIVO,
+                    )
+                    .values(status=StatusEmprestimo.ATRASADO)
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+                log_operation("MARK_OVERDUE", "Emprestimo", None, True)
+            return len(ids)
+        except Exception as e:
+            db.rollback()
+            log_operation("MARK_OVERDUE", "Emprestimo", None, False, str(e))
+            raise
+
+    def ultimo_id(self, db: Session) -> int:
+        """Maior id de empréstimo (0 se não houver)"""
+        return db.exec(select(func.max(Emprestimo.id))).one() or 0
 
     def get_with_livros(self, db: Session, emprestimo_id: int) -> Emprestimo:
         """Buscar empréstimo com livros associados"""
-        statement = select(Emprestimo).where(Emprestimo.id == emprestimo_id)
-        emprestimo = db.exec(statement).first()
-        if emprestimo:
-            # Força o carregamento dos livros relacionados
-            _ = emprestimo.livros
-        return emprestimo
+        return self.get(db, emprestimo_id, expand=["livros"])
 
     def get_all_with_livros(
-        self, db: Session, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[Emprestimo]:
-        """Listar empréstimos com livros associados"""
-        statement = select(Emprestimo).offset(skip).limit(limit)
-        emprestimos = db.exec(statement).all()
-        # Força o carregamento dos livros para cada empréstimo
-        for emprestimo in emprestimos:
-            _ = emprestimo.livros
-        return emprestimos
+        """Listar empréstimos com livros associados (uma consulta extra por página)"""
+        return self.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, expand=["livros"]
+        )
 
 
 # Instância do CRUD
 crud_emprestimo = CRUDEmprestimo(Emprestimo)
+crud_emprestimo_async = AsyncCRUDBase(crud_emprestimo)
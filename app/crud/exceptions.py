@@ -0,0 +1,34 @@
+class InvalidQueryError(ValueError):
+    """Parâmetro de consulta (filtro, ordenação, cursor) inválido"""
+
+
+class InvalidCursorError(InvalidQueryError):
+    """Cursor de paginação malformado ou incompatível com a ordenação"""
+
+
+class LivroNotFoundError(LookupError):
+    """Um ou mais livros do empréstimo não existem"""
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+        super().__init__(f"Livros não encontrados: {self.ids}")
+
+
+class LivroUnavailableError(RuntimeError):
+    """Livros já emprestados ou reservados por um checkout concorrente"""
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+        super().__init__(f"Livros indisponíveis: {self.ids}")
+
+
+class ReferenceNotFoundError(LookupError):
+    """Chave estrangeira da escrita aponta para um registro inexistente"""
+
+
+class DuplicateValueError(ValueError):
+    """Valor já usado por outro registro num campo único"""
+
+
+class ReferencedRowError(RuntimeError):
+    """Registro ainda referenciado por outros, não pode ser removido"""
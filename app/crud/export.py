@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Iterator, List, Sequence
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import Select
+from starlette.responses import StreamingResponse
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def _plain(value: Any) -> Any:
+    """Valor serializável: datas em ISO 8601 e enums pelo valor"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class _Encoder:
+    """Converte blocos de linhas em bytes no formato pedido"""
+
+    def __init__(self, fmt: ExportFormat, columns: Sequence[str]):
+        self.fmt = fmt
+        self.columns = list(columns)
+
+    def header(self) -> bytes:
+        if self.fmt is ExportFormat.CSV:
+            return self._csv([self.columns])
+        return b""
+
+    def rows(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        plain = [[_plain(value) for value in row] for row in rows]
+        if self.fmt is ExportFormat.CSV:
+            return self._csv(plain)
+        lines = (
+            json.dumps(dict(zip(self.columns, row)), ensure_ascii=False)
+            for row in plain
+        )
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _csv(rows: List[Sequence[Any]]) -> bytes:
+        out = io.StringIO()
+        csv.writer(out, lineterminator="\n").writerows(rows)
+        return out.getvalue().encode("utf-8")
+
+
+def stream_rows(
+    engine: Engine, statement: Select, fmt: ExportFormat, chunk_size: int
+) -> Iterator[bytes]:
+    """Exporta com um cursor do servidor numa conexão própria (modo síncrono)
+
+    A conexão vive enquanto a resposta é enviada, independente da sessão da
+    requisição; só um bloco de chunk_size linhas fica em memória por vez.
+    """
+    encoder = _Encoder(fmt, statement.selected_columns.keys())
+    yield encoder.header()
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=chunk_size
+        ).execute(statement)
+        for partition in result.partitions():
+            yield encoder.rows(partition)
+
+
+async def stream_rows_async(
+    engine: AsyncEngine, statement: Select, fmt: ExportFormat, chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Mesmo que stream_rows, com AsyncConnection.stream (asyncpg/aiosqlite)"""
+    encoder = _Encoder(fmt, statement.selected_columns.keys())
+    yield encoder.header()
+    async with engine.connect() as conn:
+        result = await conn.stream(
+            statement.execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.partitions():
+            yield encoder.rows(partition)
+
+
+def export_response(body, fmt: ExportFormat, name: str) -> StreamingResponse:
+    """StreamingResponse com o tipo de mídia e nome de arquivo do formato"""
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt.value}"'},
+    )
@@ -0,0 +1,139 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import literal, null, tuple_, union_all
+from sqlmodel import Session, SQLModel, func, select
+
+from crud.cache import InMemoryLRUCache
+
+# Contagens de facetas por (modelo, facetas, filtros, limite); expiram por
+# FACETS_CACHE_TTL, sem invalidação nas escritas
+facet_cache = InMemoryLRUCache(max_entries=1000)
+
+FacetRow = Tuple[Optional[str], Any, int]
+
+
+def _grouping_sets_rows(
+    db: Session,
+    model: Type[SQLModel],
+    facets: Dict[str, Any],
+    where: List[Any],
+    limit: int,
+) -> List[FacetRow]:
+    """PostgreSQL: GROUP BY GROUPING SETS, um conjunto por faceta e () para o total
+
+    row_number() particionado pelos flags de grouping() ranqueia os valores
+    dentro de cada conjunto, e só os `limit` primeiros saem do banco.
+    """
+    names = list(facets)
+    exprs = list(facets.values())
+    flags = [func.grouping(expr) for expr in exprs]
+    total = func.count()
+    rank = func.row_number().over(
+        partition_by=flags, order_by=[total.desc(), *exprs]
+    )
+    grouped = (
+        select(
+            *(expr.label(f"v{i}") for i, expr in enumerate(exprs)),
+            *(flag.label(f"g{i}") for i, flag in enumerate(flags)),
+            total.label("total"),
+            rank.label("rank"),
+        )
+        .select_from(model)
+        .where(*where)
+        .group_by(func.grouping_sets(*exprs, tuple_()))
+        .subquery()
+    )
+    values = [grouped.c[f"v{i}"] for i in range(len(exprs))]
+    grouping = [grouped.c[f"g{i}"] for i in range(len(exprs))]
+    statement = (
+        select(*values, *grouping, grouped.c.total)
+        .where(grouped.c.rank <= limit)
+        .order_by(grouped.c.total.desc(), *values)
+    )
+    rows = []
+    for row in db.exec(statement).all():
+        row_flags = row[len(exprs) : 2 * len(exprs)]
+        # grouping(expr) = 0 só na coluna do conjunto que gerou a linha
+        if 0 in row_flags:
+            i = row_flags.index(0)
+            rows.append((names[i], row[i], row[-1]))
+        else:
+            rows.append((None, None, row[-1]))
+    return rows
+
+
+def _union_rows(
+    db: Session,
+    model: Type[SQLModel],
+    facets: Dict[str, Any],
+    where: List[Any],
+    limit: int,
+) -> List[FacetRow]:
+    """Demais bancos: UNION ALL de um GROUP BY por faceta, mais o total
+
+    Cada GROUP BY ranqueia seus valores com row_number() e devolve só os
+    `limit` primeiros.
+    """
+    selects = []
+    for name, expr in facets.items():
+        total = func.count()
+        grouped = (
+            select(
+                literal(name).label("faceta"),
+                expr.label("valor"),
+                total.label("total"),
+                func.row_number()
+                .over(order_by=[total.desc(), expr])
+                .label("rank"),
+            )
+            .select_from(model)
+            .where(*where)
+            .group_by(expr)
+            .subquery()
+        )
+        selects.append(
+            select(grouped.c.faceta, grouped.c.valor, grouped.c.total).where(
+                grouped.c.rank <= limit
+            )
+        )
+    selects.append(
+        select(null().label("faceta"), null().label("valor"), func.count())
+        .select_from(model)
+        .where(*where)
+    )
+    statement = union_all(*selects)
+    columns = statement.selected_columns
+    statement = statement.order_by(columns.total.desc(), columns.valor)
+    return [tuple(row) for row in db.exec(statement).all()]
+
+
+def facet_counts(
+    db: Session,
+    model: Type[SQLModel],
+    facets: Dict[str, Any],
+    where: List[Any],
+    *,
+    limit: int,
+) -> Dict[str, Any]:
+    """Total e contagens por valor de cada faceta, numa só consulta
+
+    Cada faceta traz os `limit` valores mais frequentes, do mais para o
+    menos frequente; o corte é feito no banco.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        rows = _grouping_sets_rows(db, model, facets, where, limit)
+    else:
+        rows = _union_rows(db, model, facets, where, limit)
+    result: Dict[str, Any] = {"total": 0, "facetas": {name: [] for name in facets}}
+    for name, valor, total in rows:
+        if name is None:
+            result["total"] = total
+        else:
+            result["facetas"][name].append({"valor": valor, "total": total})
+    return result
+
+
+def cache_key(
+    model: str, names: Sequence[str], filters: Dict[str, Any], limit: int
+) -> tuple:
+    return (model, tuple(names), tuple(sorted(filters.items())), limit)
@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from sqlalchemy import true
+
+from crud.exceptions import InvalidQueryError
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """Descreve como um parâmetro de consulta vira uma cláusula WHERE
+
+    - ``column`` + ``op``: comparação simples contra uma coluna do modelo
+    - ``build``: função ``(model, value) -> cláusula | None`` para casos compostos
+    """
+
+    column: Optional[str] = None
+    op: str = "eq"
+    build: Optional[Callable[[Any, Any], Any]] = None
+
+
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "eq": lambda column, value: column == value,
+    "gte": lambda column, value: column >= value,
+    "lte": lambda column, value: column <= value,
+    "in": lambda column, value: column.in_(value),
+    "ilike": lambda column, value: column.ilike(f"%{value}%"),
+    # Filtro booleano que só restringe quando ligado (ex.: apenas_ativos=true)
+    "flag": lambda column, value: column == true() if value else None,
+}
+
+
+def compile_filters(
+    model: Any, specs: Mapping[str, FilterSpec], values: Optional[Mapping[str, Any]]
+) -> List[Any]:
+    """Compila os filtros informados (ignorando None) em cláusulas SQL"""
+    clauses = []
+    for name, value in (values or {}).items():
+        if value is None:
+            continue
+        spec = specs.get(name)
+        if spec is None:
+            raise InvalidQueryError(f"Filtro não suportado: {name}")
+        if spec.build is not None:
+            clause = spec.build(model, value)
+        else:
+            clause = OPERATORS[spec.op](getattr(model, spec.column), value)
+        if clause is not None:
+            clauses.append(clause)
+    return clauses
+
+
+def split_csv(value: Optional[str]) -> List[str]:
+    """Converte um parâmetro 'a,b,c' em ['a', 'b', 'c']"""
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
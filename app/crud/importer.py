@@ -0,0 +1,184 @@
+import codecs
+import csv
+import itertools
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from config.config import settings
+from crud.export import ExportFormat
+from domain.models import ImportItemError
+
+READ_SIZE = 1 << 16
+# Linha mais longa aceita; acima disso o arquivo é rejeitado a partir dali
+MAX_LINE_SIZE = 1 << 20
+REPORT_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ImportFileError(ValueError):
+    """Erro que impede continuar a leitura do arquivo (encoding, linha enorme)"""
+
+    def __init__(self, linha: int, message: str):
+        super().__init__(message)
+        self.linha = linha
+
+
+class ImportRecord(NamedTuple):
+    """Um registro do arquivo: dados já decodificados ou o erro de leitura"""
+
+    linha: int
+    dados: Optional[Dict[str, Any]]
+    erro: Optional[str] = None
+
+
+def detect_format(filename: Optional[str]) -> ExportFormat:
+    """Formato pela extensão do arquivo enviado (CSV por padrão)"""
+    suffix = Path(filename or "").suffix.lower()
+    return ExportFormat.NDJSON if suffix in (".ndjson", ".jsonl") else ExportFormat.CSV
+
+
+def _lines(file: BinaryIO) -> Iterator[str]:
+    """Linhas do arquivo (com o \\n) decodificadas em UTF-8, bloco a bloco"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    linha = 0
+    while True:
+        chunk = file.read(READ_SIZE)
+        try:
+            pending += decoder.decode(chunk, final=not chunk)
+        except UnicodeDecodeError as e:
+            linha += e.object[: e.start].count(b"\n")
+            raise ImportFileError(linha + 1, "Conteúdo não está em UTF-8")
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            linha += 1
+            yield line + "\n"
+        if len(pending) > MAX_LINE_SIZE:
+            raise ImportFileError(linha + 1, "Linha excede o tamanho máximo")
+        if not chunk:
+            break
+    if pending:
+        yield pending
+
+
+def _csv_records(file: BinaryIO) -> Iterator[ImportRecord]:
+    reader = csv.reader(_lines(file))
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [name.strip() for name in header]
+    for row in reader:
+        if not any(row):
+            continue
+        if len(row) != len(header):
+            yield ImportRecord(
+                reader.line_num, None, "Número de colunas diferente do cabeçalho"
+            )
+            continue
+        # Célula vazia equivale a campo ausente (aplica o padrão do modelo)
+        dados = {name: value for name, value in zip(header, row) if value != ""}
+        yield ImportRecord(reader.line_num, dados)
+
+
+def _ndjson_records(file: BinaryIO) -> Iterator[ImportRecord]:
+    for linha, line in enumerate(_lines(file), start=1):
+        if not line.strip():
+            continue
+        try:
+            dados = json.loads(line)
+        except ValueError:
+            yield ImportRecord(linha, None, "JSON inválido")
+            continue
+        if not isinstance(dados, dict):
+            yield ImportRecord(linha, None, "Cada linha deve ser um objeto JSON")
+            continue
+        yield ImportRecord(linha, dados)
+
+
+def read_records(file: BinaryIO, fmt: ExportFormat) -> Iterator[ImportRecord]:
+    """Registros do arquivo, lidos sob demanda (nunca o arquivo inteiro)"""
+    if fmt is ExportFormat.NDJSON:
+        return _ndjson_records(file)
+    return _csv_records(file)
+
+
+def next_batch(records: Iterator[ImportRecord], size: int) -> List[ImportRecord]:
+    """Próximo bloco de registros (lista vazia no fim do arquivo)"""
+    return list(itertools.islice(records, size))
+
+
+def _report_dir() -> Path:
+    base = settings.IMPORT_REPORT_DIR or os.path.join(
+        tempfile.gettempdir(), "biblioteca-imports"
+    )
+    path = Path(base)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _remove_expired(directory: Path, ttl: float) -> None:
+    limite = time.time() - ttl
+    for path in directory.glob("*.csv"):
+        try:
+            if path.stat().st_mtime < limite:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ImportErrorReport:
+    """Erros da importação: amostra em memória e relatório completo em disco
+
+    O arquivo CSV (linha, erro) só é criado no primeiro erro e é gravado à
+    medida que os blocos são processados, então a memória não cresce com a
+    quantidade de erros.
+    """
+
+    def __init__(self, entity: str, *, sample: int, ttl: float):
+        self.entity = entity
+        self.sample_size = sample
+        self.ttl = ttl
+        self.sample: List[ImportItemError] = []
+        self.count = 0
+        self.report_id: Optional[str] = None
+        self._file = None
+        self._writer = None
+
+    def add(self, linha: int, erro: str) -> None:
+        self.count += 1
+        if len(self.sample) < self.sample_size:
+            self.sample.append(ImportItemError(linha=linha, erro=erro))
+        if self._writer is None:
+            self._open()
+        self._writer.writerow((linha, erro))
+
+    def add_all(self, erros: List[Tuple[int, str]]) -> None:
+        for linha, erro in erros:
+            self.add(linha, erro)
+
+    def _open(self) -> None:
+        directory = _report_dir()
+        _remove_expired(directory, self.ttl)
+        self.report_id = uuid.uuid4().hex
+        path = directory / f"{self.entity.lower()}-{self.report_id}.csv"
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        self._writer.writerow(("linha", "erro"))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+def report_file(entity: str, report_id: str) -> Optional[Path]:
+    """Caminho do relatório de erros de uma importação da entidade, se existir"""
+    if not REPORT_ID.match(report_id):
+        return None
+    path = _report_dir() / f"{entity.lower()}-{report_id}.csv"
+    return path if path.is_file() else None
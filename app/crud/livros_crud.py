@@ -1,38 +1,108 @@
 from typing import List
 
-from sqlmodel import Session, and_, select
+from sqlalchemy import Integer, literal_column
+from sqlmodel import Session, select
 
+from config.logging_config import log_operation
+from crud.async_base import AsyncCRUDBase
 from crud.base import CRUDBase
-from domain.models import Livro, LivroCreate, LivroUpdate
+from crud.filters import FilterSpec
+from crud.search import search_livro_ids
+from domain.models import (
+    Autor,
+    Editora,
+    Livro,
+    LivroCreate,
+    LivroRead,
+    LivroUpdate,
+)
+
+# Literal tipado: divisão inteira e o mesmo SQL no SELECT e no GROUP BY
+DEZ = literal_column("10", Integer)
 
 
 class CRUDLivro(CRUDBase[Livro, LivroCreate, LivroUpdate]):
-    def get_by_titulo(self, db: Session, *, titulo: str) -> List[Livro]:
+    cache_ttl = 60
+    read_schema = LivroRead
+    sort_fields = ("id", "titulo", "ano_publicacao", "data_criacao")
+    filter_fields = {
+        "titulo": FilterSpec("titulo", "ilike"),
+        "genero": FilterSpec("genero"),
+        "autor_id": FilterSpec("autor_id"),
+        "editora_id": FilterSpec("editora_id"),
+        "ano_inicio": FilterSpec("ano_publicacao", "gte"),
+        "ano_fim": FilterSpec("ano_publicacao", "lte"),
+    }
+    expand_fields = {"autor": "joined", "editora": "joined"}
+    unique_fields = {"isbn": "ISBN já cadastrado"}
+    reference_fields = {
+        "autor_id": (Autor, "Autor não encontrado"),
+        "editora_id": (Editora, "Editora não encontrada"),
+    }
+    # Catálogos de editoras costumam trazer nomes em vez de ids
+    lookup_fields = {"autor": ("autor_id", Autor), "editora": ("editora_id", Editora)}
+    # Facetas de /livros/facets; década = ano arredondado para baixo
+    facet_fields = {
+        "genero": Livro.genero,
+        "decada": Livro.ano_publicacao // DEZ * DEZ,
+        "autor_id": Livro.autor_id,
+        "editora_id": Livro.editora_id,
+    }
+
+    def get_by_titulo(
+        self, db: Session, *, titulo: str, skip: int = 0, limit: int = 100
+    ) -> List[Livro]:
         """Buscar livros por título (busca parcial)"""
-        statement = select(Livro).where(Livro.titulo.ilike(f"%{titulo}%"))
-        return db.exec(statement).all()
+        return self.get_multi(db, skip=skip, limit=limit, filters={"titulo": titulo})
 
-    def get_by_genero(self, db: Session, *, genero: str) -> List[Livro]:
+    def get_by_genero(
+        self, db: Session, *, genero: str, skip: int = 0, limit: int = 100
+    ) -> List[Livro]:
         """Filtrar por gênero"""
-        statement = select(Livro).where(Livro.genero == genero)
-        return db.exec(statement).all()
+        return self.get_multi(db, skip=skip, limit=limit, filters={"genero": genero})
 
     def get_by_ano(
-        self, db: Session, *, ano_inicio: int, ano_fim: int = None
+        self,
+        db: Session,
+        *,
+        ano_inicio: int,
+        ano_fim: int = None,
+        skip: int = 0,
+        limit: int = 100,
     ) -> List[Livro]:
         """Filtrar por ano de publicação"""
         if ano_fim is None:
             ano_fim = ano_inicio
-        statement = select(Livro).where(
-            and_(Livro.ano_publicacao >= ano_inicio, Livro.ano_publicacao <= ano_fim)
+        return self.get_multi(
+            db,
+            skip=skip,
+            limit=limit,
+            filters={"ano_inicio": ano_inicio, "ano_fim": ano_fim},
         )
-        return db.exec(statement).all()
 
-    def get_by_autor(self, db: Session, *, autor_id: int) -> List[Livro]:
+    def get_by_autor(
+        self, db: Session, *, autor_id: int, skip: int = 0, limit: int = 100
+    ) -> List[Livro]:
         """Filtrar livros por autor"""
-        statement = select(Livro).where(Livro.autor_id == autor_id)
-        return db.exec(statement).all()
+        return self.get_multi(
+            db, skip=skip, limit=limit, filters={"autor_id": autor_id}
+        )
+
+    def search(self, db: Session, *, q: str, limit: int = 20) -> List[Livro]:
+        """Busca ranqueada por título, nome do autor e nome da editora"""
+        try:
+            ids = [livro_id for livro_id, _ in search_livro_ids(db, q=q, limit=limit)]
+            if not ids:
+                return []
+            statement = select(Livro).where(Livro.id.in_(ids))
+            livros = {livro.id: livro for livro in db.exec(statement)}
+            log_operation("SEARCH", "Livro", None, True)
+            return [livros[livro_id] for livro_id in ids if livro_id in livros]
+        except Exception as e:
+            log_operation("SEARCH", "Livro", None, False, str(e))
+            raise
 
 
 # Instância do CRUD
 crud_livro = CRUDLivro(Livro)
+crud_livro_async = AsyncCRUDBase(crud_livro)
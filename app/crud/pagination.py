@@ -0,0 +1,61 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+
+from crud.exceptions import InvalidCursorError
+
+ItemType = TypeVar("ItemType")
+
+
+@dataclass
+class Page(Generic[ItemType]):
+    """Página de resultados com o cursor para a próxima página"""
+
+    items: List[ItemType] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def parse_sort(sort: Optional[str], default: str = "id") -> Tuple[str, bool]:
+    """Converte 'campo' ou '-campo' em (campo, descendente)"""
+    sort = (sort or default).strip()
+    if sort.startswith("-"):
+        return sort[1:], True
+    return sort, False
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise InvalidCursorError("Cursor inválido")
+    return value
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """Gera um cursor opaco a partir da última linha da página"""
+    payload = {"s": sort, "v": _dump_value(value), "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Any, int]:
+    """Decodifica o cursor em (ordenação, valor da chave, último id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return payload["s"], _load_value(payload["v"]), int(payload["id"])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Cursor inválido") from e
@@ -0,0 +1,45 @@
+from typing import Any, List, Optional, Sequence, Type
+
+import orjson
+from fastapi import Response
+
+from crud.exceptions import InvalidQueryError
+from domain.models import SQLModel
+
+
+def read_columns(
+    schema: Type[SQLModel], fields: Optional[Sequence[str]] = None
+) -> List[str]:
+    """Colunas do schema de leitura, ou só as pedidas em fields= (na ordem dada)"""
+    if not fields:
+        return list(schema.model_fields)
+    invalid = [name for name in fields if name not in schema.model_fields]
+    if invalid:
+        raise InvalidQueryError(f"Campos não suportados: {', '.join(invalid)}")
+    return list(dict.fromkeys(fields))
+
+
+def rows_json(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    """Lista JSON de objetos montada direto das tuplas, sem Pydantic
+
+    Cada objeto leva as `columns` na ordem dada; valores a mais no fim da
+    linha (colunas só do ETag/cursor) ficam de fora. O orjson escreve datas
+    em ISO 8601 e enums pelo valor, como o response_model faria.
+    """
+    return orjson.dumps([dict(zip(columns, row)) for row in rows])
+
+
+def row_json(columns: Sequence[str], row: Sequence[Any]) -> bytes:
+    """Um objeto JSON de uma tupla, como em rows_json"""
+    return orjson.dumps(dict(zip(columns, row)))
+
+
+def json_response(content: bytes, *, response: Response) -> Response:
+    """Resposta JSON já serializada, com os headers postos em `response`
+
+    Uma Response devolvida pela rota dispensa o `response` injetado; os
+    headers dele (X-DB-Node, ETag, X-Next-Cursor) são copiados aqui.
+    """
+    out = Response(content, media_type="application/json")
+    out.headers.raw.extend(response.headers.raw)
+    return out
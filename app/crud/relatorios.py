@@ -0,0 +1,108 @@
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from sqlmodel import Session, select
+
+from domain.models import (
+    EstatisticaDiaria,
+    EstatisticaLivro,
+    EstatisticaUsuario,
+    RankingLivro,
+    RankingUsuario,
+    RelatorioPeriodo,
+)
+
+
+def _periodo(periodo: str, dias: Iterable[EstatisticaDiaria]) -> RelatorioPeriodo:
+    """Soma os dias do período; atraso médio sobre as devoluções dele"""
+    totais = {
+        "emprestimos": 0,
+        "livros": 0,
+        "devolucoes": 0,
+        "devolucoes_atrasadas": 0,
+        "atraso_dias": 0.0,
+    }
+    for dia in dias:
+        for campo in totais:
+            totais[campo] += getattr(dia, campo)
+    atraso = totais.pop("atraso_dias")
+    medio = round(atraso / totais["devolucoes"], 2) if totais["devolucoes"] else None
+    return RelatorioPeriodo(periodo=periodo, atraso_medio_dias=medio, **totais)
+
+
+class RelatoriosEmprestimos:
+    """Relatórios de empréstimos, lidos só dos rollups (crud/rollups.py)
+
+    Só consultas: os rollups são escritos pelo checkout, pela devolução e
+    por rebuild_rollups. As rotas chamam os métodos via run_sync. Cada
+    consulta percorre no máximo um dia por data do intervalo, ou as
+    `limit` primeiras linhas de um índice; o custo não cresce com o número
+    de empréstimos.
+    """
+
+    def _dias(self, db: Session, inicio: date, fim: date) -> List[EstatisticaDiaria]:
+        statement = (
+            select(EstatisticaDiaria)
+            .where(EstatisticaDiaria.dia >= inicio, EstatisticaDiaria.dia <= fim)
+            .order_by(EstatisticaDiaria.dia)
+        )
+        return db.exec(statement).all()
+
+    def por_dia(
+        self, db: Session, *, inicio: date, fim: date
+    ) -> List[RelatorioPeriodo]:
+        """Empréstimos, devoluções e atraso médio de cada dia do intervalo"""
+        return [_periodo(d.dia.isoformat(), [d]) for d in self._dias(db, inicio, fim)]
+
+    def por_mes(
+        self, db: Session, *, inicio: date, fim: date
+    ) -> List[RelatorioPeriodo]:
+        """Os mesmos totais, somados por mês (AAAA-MM)"""
+        meses: Dict[Tuple[int, int], List[EstatisticaDiaria]] = {}
+        for dia in self._dias(db, inicio, fim):
+            meses.setdefault((dia.dia.year, dia.dia.month), []).append(dia)
+        return [
+            _periodo(f"{ano:04d}-{mes:02d}", dias)
+            for (ano, mes), dias in meses.items()
+        ]
+
+    def resumo(self, db: Session, *, inicio: date, fim: date) -> RelatorioPeriodo:
+        """Totais e atraso médio das devoluções do intervalo inteiro"""
+        return _periodo(f"{inicio}/{fim}", self._dias(db, inicio, fim))
+
+    def livros_mais_emprestados(
+        self, db: Session, *, limit: int = 10
+    ) -> List[RankingLivro]:
+        """Livros com mais empréstimos (pelo índice do rollup)"""
+        statement = (
+            select(EstatisticaLivro.livro_id, EstatisticaLivro.emprestimos)
+            # Zerados por remoções de empréstimos ficam de fora
+            .where(EstatisticaLivro.emprestimos > 0)
+            .order_by(
+                EstatisticaLivro.emprestimos.desc(), EstatisticaLivro.livro_id.desc()
+            )
+            .limit(limit)
+        )
+        return [RankingLivro(**row._mapping) for row in db.exec(statement)]
+
+    def usuarios_mais_ativos(
+        self, db: Session, *, limit: int = 10
+    ) -> List[RankingUsuario]:
+        """Usuários com mais empréstimos (pelo índice do rollup)"""
+        statement = (
+            select(
+                EstatisticaUsuario.usuario_id,
+                EstatisticaUsuario.emprestimos,
+                EstatisticaUsuario.livros,
+            )
+            .where(EstatisticaUsuario.emprestimos > 0)
+            .order_by(
+                EstatisticaUsuario.emprestimos.desc(),
+                EstatisticaUsuario.usuario_id.desc(),
+            )
+            .limit(limit)
+        )
+        return [RankingUsuario(**row._mapping) for row in db.exec(statement)]
+
+
+relatorios_emprestimos = RelatoriosEmprestimos()
@@ -0,0 +1,275 @@
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.dialects.postgresql import insert as postgres_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, func, select
+
+from domain.models import (
+    Emprestimo,
+    EstatisticaDiaria,
+    EstatisticaLivro,
+    EstatisticaUsuario,
+    LivroEmprestimoLink,
+)
+
+# INSERT ... ON CONFLICT DO UPDATE de cada dialeto suportado
+UPSERTS = {"postgresql": postgres_insert, "sqlite": sqlite_insert}
+ROLLUPS = (EstatisticaDiaria, EstatisticaLivro, EstatisticaUsuario)
+
+
+def atraso_dias(real: datetime, prevista: datetime) -> float:
+    """Dias (fracionários) de atraso da devolução; 0 se no prazo"""
+    return max((real - prevista).total_seconds(), 0) / 86400
+
+
+def _incrementar(
+    db: Session, model: type, rows: List[Dict[str, Any]], key: Sequence[str]
+) -> None:
+    """Soma as colunas de `rows` às linhas do rollup, criando as que faltam
+
+    Um único INSERT ... ON CONFLICT DO UPDATE, dentro da transação corrente
+    (sem commit): a linha é travada só pelo tempo da escrita que a alterou.
+    Nos dialetos sem upsert, um UPDATE por linha e INSERT se ela não existir.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERTS:
+        for row in rows:
+            _incrementar_linha(db, model, row, key)
+        return
+    statement = UPSERTS[dialect](model).values(rows)
+    columns = model.__table__.c
+    somas = {
+        name: columns[name] + statement.excluded[name]
+        for name in rows[0]
+        if name not in key
+    }
+    db.execute(statement.on_conflict_do_update(index_elements=key, set_=somas))
+
+
+def _incrementar_linha(
+    db: Session, model: type, row: Dict[str, Any], key: Sequence[str]
+) -> None:
+    """UPDATE ... SET coluna = coluna + valor; INSERT se a linha não existe"""
+    columns = model.__table__.c
+    where = [columns[name] == row[name] for name in key]
+    somas = {
+        name: columns[name] + value for name, value in row.items() if name not in key
+    }
+    if db.execute(update(model).where(*where).values(**somas)).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(model).values(**row))
+    except IntegrityError:
+        # Outra transação criou a linha entre o UPDATE e o INSERT
+        db.execute(update(model).where(*where).values(**somas))
+
+
+def registrar_emprestimo(
+    db: Session, emprestimo: Emprestimo, livro_ids: Sequence[int]
+) -> None:
+    """Soma um checkout ao dia, aos livros e ao usuário (sem commit)"""
+    livros = len(livro_ids)
+    dia = emprestimo.data_emprestimo.date()
+    _incrementar(
+        db,
+        EstatisticaDiaria,
+        [{"dia": dia, "emprestimos": 1, "livros": livros}],
+        ["dia"],
+    )
+    _incrementar(
+        db,
+        EstatisticaLivro,
+        [{"livro_id": livro_id, "emprestimos": 1} for livro_id in livro_ids],
+        ["livro_id"],
+    )
+    _incrementar(
+        db,
+        EstatisticaUsuario,
+        [{"usuario_id": emprestimo.usuario_id, "emprestimos": 1, "livros": livros}],
+        ["usuario_id"],
+    )
+
+
+def _devolucao(emprestimo: Emprestimo, sinal: int = 1) -> Optional[Dict[str, Any]]:
+    """Linha do dia da devolução do empréstimo (None se não foi devolvido)
+
+    Devolvido é ter data_devolucao_real, o mesmo critério de rebuild_rollups.
+    """
+    real = emprestimo.data_devolucao_real
+    if real is None:
+        return None
+    atraso = atraso_dias(real, emprestimo.data_devolucao_prevista)
+    return {
+        "dia": real.date(),
+        "devolucoes": sinal,
+        "devolucoes_atrasadas": sinal * int(atraso > 0),
+        "atraso_dias": sinal * atraso,
+    }
+
+
+def registrar_devolucao(db: Session, emprestimo: Emprestimo) -> None:
+    """Soma uma devolução (e o atraso dela) ao dia da devolução (sem commit)"""
+    _incrementar(db, EstatisticaDiaria, [_devolucao(emprestimo)], ["dia"])
+
+
+def corrigir_devolucao(db: Session, antes: Emprestimo, depois: Emprestimo) -> None:
+    """Troca nos rollups a devolução de `antes` pela de `depois` (sem commit)
+
+    Para edições que mudam status, data de devolução ou prazo: desconta a
+    devolução antiga, soma a nova, numa linha por dia.
+    """
+    dias: Dict[date, Dict[str, Any]] = {}
+    for linha in (_devolucao(antes, -1), _devolucao(depois)):
+        if linha is None:
+            continue
+        dia = dias.setdefault(
+            linha["dia"],
+            {
+                "dia": linha["dia"],
+                "devolucoes": 0,
+                "devolucoes_atrasadas": 0,
+                "atraso_dias": 0.0,
+            },
+        )
+        for campo in ("devolucoes", "devolucoes_atrasadas", "atraso_dias"):
+            dia[campo] += linha[campo]
+    rows = [
+        row
+        for row in dias.values()
+        if row["devolucoes"] or row["devolucoes_atrasadas"] or row["atraso_dias"]
+    ]
+    if rows:
+        _incrementar(db, EstatisticaDiaria, rows, ["dia"])
+
+
+def remover_emprestimo(
+    db: Session, emprestimo: Emprestimo, livro_ids: Sequence[int]
+) -> None:
+    """Desconta dos rollups um empréstimo removido (sem commit)
+
+    Subtrai o checkout do dia, dos livros e do usuário e, se ele já tinha
+    sido devolvido, a devolução do dia dela.
+    """
+    livros = len(livro_ids)
+    zerado = {
+        "emprestimos": 0,
+        "livros": 0,
+        "devolucoes": 0,
+        "devolucoes_atrasadas": 0,
+        "atraso_dias": 0.0,
+    }
+    dias = {emprestimo.data_emprestimo.date(): dict(zerado)}
+    dias[emprestimo.data_emprestimo.date()].update(emprestimos=-1, livros=-livros)
+    real = emprestimo.data_devolucao_real
+    if real is not None:
+        atraso = atraso_dias(real, emprestimo.data_devolucao_prevista)
+        # Devolvido no mesmo dia: uma linha só (o upsert não aceita a mesma
+        # chave duas vezes)
+        dia = dias.setdefault(real.date(), dict(zerado))
+        dia["devolucoes"] -= 1
+        dia["devolucoes_atrasadas"] -= int(atraso > 0)
+        dia["atraso_dias"] -= atraso
+    _incrementar(
+        db,
+        EstatisticaDiaria,
+        [{"dia": dia, **totais} for dia, totais in dias.items()],
+        ["dia"],
+    )
+    if livro_ids:
+        _incrementar(
+            db,
+            EstatisticaLivro,
+            [{"livro_id": livro_id, "emprestimos": -1} for livro_id in livro_ids],
+            ["livro_id"],
+        )
+    _incrementar(
+        db,
+        EstatisticaUsuario,
+        [{"usuario_id": emprestimo.usuario_id, "emprestimos": -1, "livros": -livros}],
+        ["usuario_id"],
+    )
+
+
+def rebuild_rollups(db: Session, *, chunk_size: int = 10000) -> Dict[str, int]:
+    """Recalcula os rollups a partir do histórico (backfill ou correção)
+
+    Numa transação, esvazia as três tabelas e as reconstrói: livros e
+    usuários com um INSERT ... SELECT agrupado; os dias percorrendo os
+    empréstimos em blocos, com a mesma data e o mesmo cálculo de atraso das
+    escritas incrementais. Retorna quantas linhas cada tabela recebeu.
+    """
+    link = LivroEmprestimoLink
+    try:
+        for model in ROLLUPS:
+            db.execute(delete(model))
+        db.execute(
+            insert(EstatisticaLivro).from_select(
+                ["livro_id", "emprestimos"],
+                select(link.livro_id, func.count()).group_by(link.livro_id),
+            )
+        )
+        por_usuario = (
+            select(
+                Emprestimo.usuario_id,
+                func.count(func.distinct(Emprestimo.id)),
+                func.count(link.livro_id),
+            )
+            .outerjoin(link, link.emprestimo_id == Emprestimo.id)
+            .group_by(Emprestimo.usuario_id)
+        )
+        db.execute(
+            insert(EstatisticaUsuario).from_select(
+                ["usuario_id", "emprestimos", "livros"], por_usuario
+            )
+        )
+
+        dias: Dict[date, Dict[str, Any]] = {}
+
+        def dia(valor: date) -> Dict[str, Any]:
+            if valor not in dias:
+                dias[valor] = {
+                    "dia": valor,
+                    "emprestimos": 0,
+                    "livros": 0,
+                    "devolucoes": 0,
+                    "devolucoes_atrasadas": 0,
+                    "atraso_dias": 0.0,
+                }
+            return dias[valor]
+
+        emprestimos = (
+            select(
+                Emprestimo.data_emprestimo,
+                Emprestimo.data_devolucao_prevista,
+                Emprestimo.data_devolucao_real,
+                func.count(link.livro_id),
+            )
+            .outerjoin(link, link.emprestimo_id == Emprestimo.id)
+            .group_by(Emprestimo.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        for emprestado, prevista, real, livros in db.exec(emprestimos):
+            totais = dia(emprestado.date())
+            totais["emprestimos"] += 1
+            totais["livros"] += livros
+            if real is not None:
+                atraso = atraso_dias(real, prevista)
+                totais = dia(real.date())
+                totais["devolucoes"] += 1
+                totais["devolucoes_atrasadas"] += int(atraso > 0)
+                totais["atraso_dias"] += atraso
+        rows = list(dias.values())
+        for start in range(0, len(rows), chunk_size):
+            db.execute(insert(EstatisticaDiaria), rows[start : start + chunk_size])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {
+        model.__tablename__: db.exec(select(func.count()).select_from(model)).one()
+        for model in ROLLUPS
+    }
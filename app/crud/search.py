@@ -0,0 +1,204 @@
+import logging
+import re
+from typing import List, Tuple
+
+from sqlalchemy import inspect, literal, text, union_all
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, func, select
+
+from domain.models import Autor, Editora, Livro
+
+logger = logging.getLogger("uvicorn")
+
+# Pesos relativos de cada campo no ranking: título > autor > editora
+PESO_TITULO = 1.0
+PESO_AUTOR = 0.8
+PESO_EDITORA = 0.5
+
+# Postgres: cada ramo usa o índice GIN (gin_trgm_ops) da sua tabela, criado na
+# migração b7d2c9e4f1a3. O UNION evita o OR entre tabelas, que forçaria seq scan.
+POSTGRES_SEARCH = text(
+    """
+    WITH hits AS (
+        SELECT l.id, word_similarity(:q, l.titulo) * :peso_titulo AS score
+        FROM livro l
+        WHERE l.titulo ILIKE :pattern OR :q <% l.titulo
+        UNION ALL
+        SELECT l.id, word_similarity(:q, a.nome) * :peso_autor
+        FROM autor a JOIN livro l ON l.autor_id = a.id
+        WHERE a.nome ILIKE :pattern OR :q <% a.nome
+        UNION ALL
+        SELECT l.id, word_similarity(:q, e.nome) * :peso_editora
+        FROM editora e JOIN livro l ON l.editora_id = e.id
+        WHERE e.nome ILIKE :pattern OR :q <% e.nome
+    )
+    SELECT id, max(score) AS rank
+    FROM hits
+    GROUP BY id
+    ORDER BY rank DESC, id
+    LIMIT :limit
+    """
+)
+
+# SQLite: bm25 retorna valores menores para documentos mais relevantes
+SQLITE_SEARCH = text(
+    """
+    SELECT
+        rowid AS id,
+        bm25(livro_fts, :peso_titulo, :peso_autor, :peso_editora) AS rank
+    FROM livro_fts
+    WHERE livro_fts MATCH :q
+    ORDER BY rank, rowid
+    LIMIT :limit
+    """
+)
+
+SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE livro_fts USING fts5(
+        titulo, autor, editora, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER livro_fts_ai AFTER INSERT ON livro BEGIN
+        INSERT INTO livro_fts(rowid, titulo, autor, editora) VALUES (
+            new.id,
+            new.titulo,
+            (SELECT nome FROM autor WHERE id = new.autor_id),
+            (SELECT nome FROM editora WHERE id = new.editora_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER livro_fts_au AFTER UPDATE ON livro BEGIN
+        UPDATE livro_fts SET
+            titulo = new.titulo,
+            autor = (SELECT nome FROM autor WHERE id = new.autor_id),
+            editora = (SELECT nome FROM editora WHERE id = new.editora_id)
+        WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER livro_fts_ad AFTER DELETE ON livro BEGIN
+        DELETE FROM livro_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER livro_fts_autor_au AFTER UPDATE OF nome ON autor BEGIN
+        UPDATE livro_fts SET autor = new.nome
+        WHERE rowid IN (SELECT id FROM livro WHERE autor_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER livro_fts_editora_au AFTER UPDATE OF nome ON editora BEGIN
+        UPDATE livro_fts SET editora = new.nome
+        WHERE rowid IN (SELECT id FROM livro WHERE editora_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO livro_fts(rowid, titulo, autor, editora)
+    SELECT l.id, l.titulo, a.nome, e.nome
+    FROM livro l
+    LEFT JOIN autor a ON a.id = l.autor_id
+    LEFT JOIN editora e ON e.id = l.editora_id
+    """,
+]
+
+
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS livro_fts_ai",
+    "DROP TRIGGER IF EXISTS livro_fts_au",
+    "DROP TRIGGER IF EXISTS livro_fts_ad",
+    "DROP TRIGGER IF EXISTS livro_fts_autor_au",
+    "DROP TRIGGER IF EXISTS livro_fts_editora_au",
+    "DROP TABLE IF EXISTS livro_fts",
+]
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Cria o índice FTS5 (e triggers de manutenção) no SQLite, se ausente
+
+    No Postgres o índice de trigramas é criado pela migração do Alembic.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    if inspect(engine).has_table("livro_fts"):
+        return
+    with engine.begin() as conn:
+        for statement in SQLITE_FTS_DDL:
+            conn.exec_driver_sql(statement)
+    logger.info("Índice de busca FTS5 criado")
+
+
+def drop_search_index(engine: Engine) -> None:
+    """Remove o índice FTS5 e seus triggers (SQLite)
+
+    Para cargas em massa: sem os triggers cada INSERT em livro fica bem mais
+    barato, e ensure_search_index recria o índice de uma vez ao final.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        for statement in SQLITE_FTS_DROP:
+            conn.exec_driver_sql(statement)
+
+
+def _fts5_query(q: str) -> str:
+    """Converte texto livre em consulta FTS5 segura (termos com prefixo)"""
+    termos = re.findall(r"\w+", q)
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _generic_search(pattern: str, limit: int):
+    """Demais bancos: UNION ALL de um ILIKE por campo, com o peso do campo
+
+    Sem índice de texto: cada ramo é uma varredura, mas a rota funciona em
+    qualquer dialeto (ILIKE vira lower() LIKE lower() onde não existe).
+    """
+    ramos = [
+        select(Livro.id, literal(PESO_TITULO).label("score")).where(
+            Livro.titulo.ilike(pattern, escape="\\")
+        ),
+        select(Livro.id, literal(PESO_AUTOR))
+        .join(Autor, Autor.id == Livro.autor_id)
+        .where(Autor.nome.ilike(pattern, escape="\\")),
+        select(Livro.id, literal(PESO_EDITORA))
+        .join(Editora, Editora.id == Livro.editora_id)
+        .where(Editora.nome.ilike(pattern, escape="\\")),
+    ]
+    hits = union_all(*ramos).subquery("hits")
+    rank = func.max(hits.c.score).label("rank")
+    return (
+        select(hits.c.id, rank)
+        .group_by(hits.c.id)
+        .order_by(rank.desc(), hits.c.id)
+        .limit(limit)
+    )
+
+
+def search_livro_ids(db: Session, *, q: str, limit: int) -> List[Tuple[int, float]]:
+    """Retorna (livro_id, rank) dos livros mais relevantes para o termo"""
+    params = {
+        "limit": limit,
+        "peso_titulo": PESO_TITULO,
+        "peso_autor": PESO_AUTOR,
+        "peso_editora": PESO_EDITORA,
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = POSTGRES_SEARCH
+        params.update(q=q, pattern=_like_pattern(q))
+    elif dialect == "sqlite":
+        fts_query = _fts5_query(q)
+        if not fts_query:
+            return []
+        statement = SQLITE_SEARCH
+        params.update(q=fts_query)
+    else:
+        statement = _generic_search(_like_pattern(q), limit)
+    return [(row.id, row.rank) for row in db.execute(statement, params)]
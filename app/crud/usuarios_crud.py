@@ -2,11 +2,21 @@ from typing import List, Optional
 
 from sqlmodel import Session, select
 
+from crud.async_base import AsyncCRUDBase
 from crud.base import CRUDBase
-from domain.models import Usuario, UsuarioCreate, UsuarioUpdate
+from crud.filters import FilterSpec
+from domain.models import Usuario, UsuarioCreate, UsuarioRead, UsuarioUpdate
 
 
 class CRUDUsuario(CRUDBase[Usuario, UsuarioCreate, UsuarioUpdate]):
+    cache_ttl = 60
+    read_schema = UsuarioRead
+    sort_fields = ("id", "nome", "data_criacao")
+    filter_fields = {
+        "apenas_ativos": FilterSpec("ativo", "flag"),
+    }
+    unique_fields = {"email": "Email já cadastrado", "cpf": "CPF já cadastrado"}
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[Usuario]:
         """Buscar usuário por email"""
         statement = select(Usuario).where(Usuario.email == email)
@@ -17,11 +27,15 @@ class CRUDUsuario(CRUDBase[Usuario, UsuarioCreate, UsuarioUpdate]):
         statement = select(Usuario).where(Usuario.cpf == cpf)
         return db.exec(statement).first()
 
-    def get_ativos(self, db: Session) -> List[Usuario]:
+    def get_ativos(
+        self, db: Session, *, skip: int = 0, limit: int = 100
+    ) -> List[Usuario]:
         """Listar apenas usuários ativos"""
-        statement = select(Usuario).where(Usuario.ativo is True)
-        return db.exec(statement).all()
+        return self.get_multi(
+            db, skip=skip, limit=limit, filters={"apenas_ativos": True}
+        )
 
 
 
 crud_usuario = CRUDUsuario(Usuario)
+crud_usuario_async = AsyncCRUDBase(crud_usuario)
@@ -1,15 +1,41 @@
 from sqlmodel import SQLModel, Field, Relationship
-from typing import Optional, List
-from datetime import datetime
+from sqlalchemy import Index, text
+from pydantic import model_validator
+from typing import Dict, List, Optional, Union
+from datetime import date, datetime
 from enum import Enum
 
 class LivroEmprestimoLink(SQLModel, table=True):
     __tablename__ = "livro_emprestimo"
+    # A PK (livro_id, emprestimo_id) só atende buscas por livro
+    __table_args__ = (
+        Index("ix_livro_emprestimo_emprestimo_id", "emprestimo_id", "livro_id"),
+    )
     
     livro_id: Optional[int] = Field(default=None, foreign_key="livro.id", primary_key=True)
     emprestimo_id: Optional[int] = Field(default=None, foreign_key="emprestimo.id", primary_key=True)
     quantidade: int = Field(default=1)
 
+class ExpandableRead(SQLModel):
+    """Base para schemas de leitura com relacionamentos opcionais (expand=)
+
+    Relacionamentos que não foram carregados na consulta ficam de fora da
+    resposta, em vez de disparar lazy loading (N+1) na serialização.
+    """
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _apenas_relacionamentos_carregados(cls, value, handler):
+        state = getattr(value, "_sa_instance_state", None)
+        if state is not None:
+            relacionamentos = state.mapper.relationships.keys()
+            value = {
+                name: getattr(value, name)
+                for name in cls.model_fields
+                if not (name in relacionamentos and name in state.unloaded)
+            }
+        return handler(value)
+
 class StatusEmprestimo(str, Enum):
     ATIVO = "ativo"
     DEVOLVIDO = "devolvido"
@@ -25,6 +51,10 @@ class AutorBase(SQLModel):
 class Autor(AutorBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     data_criacao: datetime = Field(default_factory=datetime.now)
+    # Renovada a cada UPDATE (ORM ou Core): é a versão usada nos ETags
+    atualizado_em: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
     
     # Relacionamento 1:N com Livro
     livros: List["Livro"] = Relationship(back_populates="autor")
@@ -53,6 +83,9 @@ class EditoraBase(SQLModel):
 class Editora(EditoraBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     data_criacao: datetime = Field(default_factory=datetime.now)
+    atualizado_em: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
     
     # Relacionamento 1:N com Livro
     livros: List["Livro"] = Relationship(back_populates="editora")
@@ -80,8 +113,19 @@ class LivroBase(SQLModel):
     paginas: int = Field(gt=0)
 
 class Livro(LivroBase, table=True):
+    # (coluna, id): atende o filtro e a ordenação/cursor por id no mesmo índice
+    __table_args__ = (
+        Index("ix_livro_autor_id", "autor_id", "id"),
+        Index("ix_livro_editora_id", "editora_id", "id"),
+        Index("ix_livro_genero", "genero", "id"),
+        Index("ix_livro_ano_publicacao", "ano_publicacao", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     data_criacao: datetime = Field(default_factory=datetime.now)
+    atualizado_em: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
     
     # Relacionamentos
     autor_id: int = Field(foreign_key="autor.id")
@@ -106,6 +150,10 @@ class LivroRead(LivroBase):
     autor_id: int
     editora_id: int
 
+class LivroReadExpanded(LivroRead, ExpandableRead):
+    autor: Optional[AutorRead] = None
+    editora: Optional[EditoraRead] = None
+
 class LivroUpdate(SQLModel):
     titulo: Optional[str] = None
     isbn: Optional[str] = None
@@ -126,6 +174,9 @@ class UsuarioBase(SQLModel):
 class Usuario(UsuarioBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     data_criacao: datetime = Field(default_factory=datetime.now)
+    atualizado_em: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
     ativo: bool = Field(default=True)
     
     # Relacionamento 1:N com Empréstimo
@@ -154,9 +205,25 @@ class EmprestimoBase(SQLModel):
     observacoes: Optional[str] = None
 
 class Emprestimo(EmprestimoBase, table=True):
+    __table_args__ = (
+        Index("ix_emprestimo_usuario_id", "usuario_id", "id"),
+        Index("ix_emprestimo_status", "status", "id"),
+        Index("ix_emprestimo_data_devolucao_prevista", "data_devolucao_prevista", "id"),
+        # Parcial: só os empréstimos ativos, por vencimento (atrasados)
+        Index(
+            "ix_emprestimo_ativos_vencimento",
+            "data_devolucao_prevista",
+            postgresql_where=text("status = 'ATIVO'"),
+            sqlite_where=text("status = 'ATIVO'"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     data_devolucao_real: Optional[datetime] = None
     status: StatusEmprestimo = Field(default=StatusEmprestimo.ATIVO)
+    atualizado_em: datetime = Field(
+        default_factory=datetime.now, sa_column_kwargs={"onupdate": datetime.now}
+    )
     
     # Relacionamentos
     usuario_id: int = Field(foreign_key="usuario.id")
@@ -182,8 +249,110 @@ class EmprestimoRead(EmprestimoBase):
 class EmprestimoReadWithLivros(EmprestimoRead):
     livros: List[LivroRead] = []
 
+class EmprestimoReadExpanded(EmprestimoRead, ExpandableRead):
+    usuario: Optional[UsuarioRead] = None
+    livros: Optional[List[LivroRead]] = None
+
 class EmprestimoUpdate(SQLModel):
     data_devolucao_prevista: Optional[datetime] = None
     data_devolucao_real: Optional[datetime] = None
     status: Optional[StatusEmprestimo] = None
     observacoes: Optional[str] = None
+
+
+# Contagem de registros por entidade, mantida na mesma transação das escritas
+class Contador(SQLModel, table=True):
+    entidade: str = Field(primary_key=True, max_length=50)
+    quantidade: int = Field(default=0)
+
+# Rollups dos relatórios de empréstimos (crud/rollups.py): atualizados na
+# mesma transação do checkout e da devolução, recalculáveis do histórico
+class EstatisticaDiaria(SQLModel, table=True):
+    __tablename__ = "estatistica_dia"
+
+    dia: date = Field(primary_key=True)
+    emprestimos: int = Field(default=0)
+    livros: int = Field(default=0)
+    # Devoluções do dia e a soma dos atrasos delas (0 para as no prazo)
+    devolucoes: int = Field(default=0)
+    devolucoes_atrasadas: int = Field(default=0)
+    atraso_dias: float = Field(default=0)
+
+class EstatisticaLivro(SQLModel, table=True):
+    __tablename__ = "estatistica_livro"
+    # Ranking por (emprestimos DESC) lido direto do índice
+    __table_args__ = (
+        Index("ix_estatistica_livro_emprestimos", "emprestimos", "livro_id"),
+    )
+
+    livro_id: int = Field(
+        primary_key=True, sa_column_kwargs={"autoincrement": False}
+    )
+    emprestimos: int = Field(default=0)
+
+class EstatisticaUsuario(SQLModel, table=True):
+    __tablename__ = "estatistica_usuario"
+    __table_args__ = (
+        Index("ix_estatistica_usuario_emprestimos", "emprestimos", "usuario_id"),
+    )
+
+    usuario_id: int = Field(
+        primary_key=True, sa_column_kwargs={"autoincrement": False}
+    )
+    emprestimos: int = Field(default=0)
+    livros: int = Field(default=0)
+
+class RelatorioPeriodo(SQLModel):
+    periodo: str
+    emprestimos: int
+    livros: int
+    devolucoes: int
+    devolucoes_atrasadas: int
+    atraso_medio_dias: Optional[float] = None
+
+class RelatorioDisponivel(SQLModel):
+    caminho: str
+    descricao: str
+
+class RankingLivro(SQLModel):
+    livro_id: int
+    emprestimos: int
+
+class RankingUsuario(SQLModel):
+    usuario_id: int
+    emprestimos: int
+    livros: int
+
+# Criação em lote
+class BulkItemError(SQLModel):
+    indice: int
+    erro: str
+
+class BulkCreateResult(SQLModel):
+    total: int
+    criados: int
+    # Alinhado com a entrada: None nas posições que falharam
+    ids: List[Optional[int]] = []
+    erros: List[BulkItemError] = []
+
+# Facetas do catálogo
+class FacetValue(SQLModel):
+    valor: Union[int, str, None]
+    total: int
+
+class FacetResult(SQLModel):
+    total: int
+    facetas: Dict[str, List[FacetValue]]
+
+# Importação de arquivos
+class ImportItemError(SQLModel):
+    linha: int
+    erro: str
+
+class ImportResult(SQLModel):
+    total: int
+    criados: int
+    com_erro: int
+    # Primeiros erros; a lista completa fica no relatório
+    erros: List[ImportItemError] = []
+    relatorio_erros: Optional[str] = None
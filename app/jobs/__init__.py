@@ -0,0 +1,6 @@
+"""Jobs periódicos da aplicação
+
+Rodam no lifespan da API ou como worker separado (a partir de app/):
+
+    python -m jobs atrasos --intervalo 60
+"""
@@ -0,0 +1,68 @@
+import argparse
+import json
+import sys
+import time
+
+from sqlmodel import Session
+
+from config.config import settings
+from config.database import engine
+from crud.rollups import rebuild_rollups
+from jobs.overdue import overdue_sweeper
+
+
+def cmd_atrasos(args) -> int:
+    while True:
+        overdue_sweeper.run_once(engine, full=args.completa)
+        stats = overdue_sweeper.stats()
+        print(json.dumps(stats, ensure_ascii=False), flush=True)
+        if args.uma_vez:
+            return 1 if stats["ultimo_erro"] else 0
+        time.sleep(args.intervalo)
+
+
+def cmd_rollups(args) -> int:
+    with Session(engine) as db:
+        linhas = rebuild_rollups(db, chunk_size=args.lote)
+    print(json.dumps(linhas, ensure_ascii=False), flush=True)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m jobs", description="Jobs periódicos fora da API"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    atrasos = sub.add_parser(
+        "atrasos", help="Marca empréstimos vencidos como ATRASADO, em lotes"
+    )
+    atrasos.add_argument(
+        "--intervalo",
+        type=float,
+        default=settings.OVERDUE_SWEEP_INTERVAL or 60,
+        help="Segundos entre execuções",
+    )
+    atrasos.add_argument("--uma-vez", action="store_true", help="Executa e sai")
+    atrasos.add_argument(
+        "--completa", action="store_true", help="Ignora o watermark (todas as vezes)"
+    )
+    atrasos.set_defaults(func=cmd_atrasos)
+
+    rollups = sub.add_parser(
+        "rollups", help="Recalcula os rollups dos relatórios a partir do histórico"
+    )
+    rollups.add_argument(
+        "--lote", type=int, default=10000, help="Empréstimos lidos por bloco"
+    )
+    rollups.set_defaults(func=cmd_rollups)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from config.config import settings
+from config.metrics import REGISTRY
+from crud.emprestimos_crud import crud_emprestimo
+
+logger = logging.getLogger("biblioteca_api")
+
+
+@dataclass
+class SweepStats:
+    """Estatísticas das execuções do job de atrasos"""
+
+    execucoes: int = 0
+    varreduras_completas: int = 0
+    marcados_total: int = 0
+    falhas: int = 0
+    ultima_execucao: Optional[datetime] = None
+    ultima_duracao_ms: Optional[float] = None
+    ultimos_marcados: int = 0
+    ultimos_lotes: int = 0
+    ultimo_erro: Optional[str] = None
+    # Corte da última execução bem-sucedida: vencimento e maior id visto
+    watermark: Optional[datetime] = None
+    watermark_id: Optional[int] = None
+
+
+class OverdueSweeper:
+    """Marca empréstimos ativos vencidos como ATRASADO, em lotes
+
+    Cada execução parte do watermark da anterior (instante de corte e maior
+    id): só lê os empréstimos que venceram desde então, pelo índice parcial
+    de ativos por vencimento, e os criados depois, pela PK. A cada
+    `full_every` execuções (e na primeira) a varredura ignora o watermark,
+    para pegar vencimentos alterados para o passado.
+    """
+
+    def __init__(self, *, batch_size: int = 1000, full_every: int = 60):
+        self.batch_size = batch_size
+        self.full_every = full_every
+        self._stats = SweepStats()
+        self._lock = threading.Lock()
+
+    def run_once(self, engine: Engine, *, full: bool = False) -> int:
+        """Uma execução completa (todos os lotes); retorna quantos marcou"""
+        stats = self._stats
+        agora = datetime.now()
+        full = full or stats.watermark is None or (
+            self.full_every > 0 and stats.execucoes % self.full_every == 0
+        )
+        # Incremental: os que venceram desde o corte anterior (pelo índice
+        # parcial) e os criados depois dele, que podem já nascer vencidos
+        passes = [{}] if full else [
+            {"desde": stats.watermark},
+            {"apos_id": stats.watermark_id},
+        ]
+        start = time.perf_counter()
+        marcados = lotes = 0
+        ultimo_id = None
+        erro = None
+        try:
+            with Session(engine) as db:
+                ultimo_id = crud_emprestimo.ultimo_id(db)
+            for criterio in passes:
+                while True:
+                    with Session(engine) as db:
+                        lote = crud_emprestimo.marcar_atrasados(
+                            db, agora=agora, limit=self.batch_size, **criterio
+                        )
+                    lotes += 1
+                    marcados += lote
+                    if lote < self.batch_size:
+                        break
+        except Exception as e:
+            erro = f"{e.__class__.__name__}: {e}"
+            logger.error(f"Job de atrasos falhou: {erro}")
+        with self._lock:
+            stats.execucoes += 1
+            stats.varreduras_completas += int(full)
+            stats.marcados_total += marcados
+            stats.ultima_execucao = agora
+            stats.ultima_duracao_ms = round((time.perf_counter() - start) * 1000, 3)
+            stats.ultimos_marcados = marcados
+            stats.ultimos_lotes = lotes
+            stats.ultimo_erro = erro
+            if erro is None:
+                stats.watermark = agora
+                stats.watermark_id = ultimo_id
+            else:
+                stats.falhas += 1
+        if marcados:
+            logger.info(f"Job de atrasos: {marcados} empréstimo(s) marcados")
+        return marcados
+
+    async def run_forever(self, engine: Engine, interval: float) -> None:
+        """Executa a cada `interval` segundos (no threadpool) até ser cancelado"""
+        while True:
+            await asyncio.to_thread(self.run_once, engine)
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = asdict(self._stats)
+        for key in ("ultima_execucao", "watermark"):
+            if data[key] is not None:
+                data[key] = data[key].isoformat()
+        return data
+
+
+def _collector():
+    stats = overdue_sweeper.stats()
+    counters = {
+        "overdue_sweep_runs_total": ("Execuções do job de atrasos", "execucoes"),
+        "overdue_sweep_marked_total": ("Empréstimos marcados", "marcados_total"),
+        "overdue_sweep_failures_total": ("Execuções com erro", "falhas"),
+    }
+    for metric, (help, key) in counters.items():
+        yield metric, "counter", help, [({}, stats[key])]
+    duration = (stats["ultima_duracao_ms"] or 0) / 1000
+    yield "overdue_sweep_last_duration_seconds", "gauge", "Duração da última", [
+        ({}, duration)
+    ]
+
+
+overdue_sweeper = OverdueSweeper(
+    batch_size=settings.OVERDUE_SWEEP_BATCH,
+    full_every=settings.OVERDUE_SWEEP_FULL_EVERY,
+)
+REGISTRY.collectors.append(_collector)
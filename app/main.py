@@ -1,11 +1,30 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timezone
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-
-from config.database import create_db_and_tables
-from config.logging_config import setup_logging
-from routers import autores, editoras, emprestimos, livros, usuarios
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from config.config import settings
+from config.database import (
+    create_db_and_tables,
+    dispose_engines,
+    engine,
+    replica_router,
+)
+from config.logging_config import logging_stats, setup_logging
+from config.metrics import MetricsMiddleware, render_metrics
+from config.query_stats import QueryStatsMiddleware
+from crud.cache import entity_cache
+from crud.exceptions import (
+    DuplicateValueError,
+    InvalidQueryError,
+    ReferencedRowError,
+    ReferenceNotFoundError,
+)
+from jobs.overdue import overdue_sweeper
+from routers import autores, editoras, emprestimos, livros, relatorios, usuarios
 
 logger = setup_logging()
 
@@ -20,8 +39,19 @@ async def lifespan(app: FastAPI):
         logger.error(f"Erro na inicialização: {e}")
         raise
     
+    sweeper = None
+    if settings.OVERDUE_SWEEP_INTERVAL > 0:
+        sweeper = asyncio.create_task(
+            overdue_sweeper.run_forever(engine, settings.OVERDUE_SWEEP_INTERVAL)
+        )
+
     yield
-    
+
+    if sweeper is not None:
+        sweeper.cancel()
+        with suppress(asyncio.CancelledError):
+            await sweeper
+    await dispose_engines()
     logger.info("Aplicação finalizada")
 
 
@@ -40,13 +70,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-DB-Queries", "X-DB-Time", "X-DB-Node"],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(autores.router)
 app.include_router(editoras.router)
 app.include_router(livros.router)
 app.include_router(usuarios.router)
 app.include_router(emprestimos.router)
+app.include_router(relatorios.router)
+
+
+@app.exception_handler(InvalidQueryError)
+async def invalid_query_handler(request, exc):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(DuplicateValueError)
+async def duplicate_value_handler(request, exc):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(ReferenceNotFoundError)
+async def reference_not_found_handler(request, exc):
+    return JSONResponse(status_code=404, content={"detail": str(exc)})
+
+
+@app.exception_handler(ReferencedRowError)
+async def referenced_row_handler(request, exc):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
 
 
 @app.exception_handler(Exception)
@@ -58,7 +112,25 @@ async def global_exception_handler(request, exc):
 @app.get("/health")
 def health_check():
     """Endpoint de verificação de saúde da API"""
-    return {"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "logs": logging_stats(),
+        "atrasos": overdue_sweeper.stats(),
+        "leituras": replica_router.stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas no formato de texto do Prometheus"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Contadores de acertos/falhas do cache de entidades"""
+    return entity_cache.stats()
 
 
 @app.get("/")
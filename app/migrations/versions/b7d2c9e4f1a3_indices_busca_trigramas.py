@@ -0,0 +1,45 @@
+"""Indices de busca por trigramas
+
+Revision ID: b7d2c9e4f1a3
+Revises: e59fb10af1e9
+Create Date: 2026-10-18 09:12:31.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2c9e4f1a3'
+down_revision: Union[str, None] = 'e59fb10af1e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRGM_INDEXES = [
+    ('ix_livro_titulo_trgm', 'livro', 'titulo'),
+    ('ix_autor_nome_trgm', 'autor', 'nome'),
+    ('ix_editora_nome_trgm', 'editora', 'nome'),
+]
+
+
+def upgrade() -> None:
+    # No SQLite a busca usa FTS5, criado em create_db_and_tables
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRGM_INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, _ in TRGM_INDEXES:
+        op.drop_index(name, table_name=table)
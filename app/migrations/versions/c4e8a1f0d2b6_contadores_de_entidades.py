@@ -0,0 +1,46 @@
+"""Contadores de entidades
+
+Revision ID: c4e8a1f0d2b6
+Revises: b7d2c9e4f1a3
+Create Date: 2026-10-18 10:41:07.226318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f0d2b6'
+down_revision: Union[str, None] = 'b7d2c9e4f1a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# entidade (nome do modelo) -> tabela
+ENTIDADES = {
+    'Autor': 'autor',
+    'Editora': 'editora',
+    'Livro': 'livro',
+    'Usuario': 'usuario',
+    'Emprestimo': 'emprestimo',
+}
+
+
+def upgrade() -> None:
+    op.create_table('contador',
+    sa.Column('entidade', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('entidade')
+    )
+    # Backfill com a contagem exata no momento da migração
+    for entidade, tabela in ENTIDADES.items():
+        op.execute(
+            f"INSERT INTO contador (entidade, quantidade) "
+            f"SELECT '{entidade}', count(*) FROM {tabela}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('contador')
@@ -0,0 +1,72 @@
+"""Indices das colunas de filtro
+
+Revision ID: d5a9c3e7b1f4
+Revises: c4e8a1f0d2b6
+Create Date: 2026-10-18 11:05:42.913064
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9c3e7b1f4'
+down_revision: Union[str, None] = 'c4e8a1f0d2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, tabela, colunas): o id no fim atende a ordenação/cursor padrão
+INDEXES = [
+    ('ix_livro_autor_id', 'livro', ['autor_id', 'id']),
+    ('ix_livro_editora_id', 'livro', ['editora_id', 'id']),
+    ('ix_livro_genero', 'livro', ['genero', 'id']),
+    ('ix_livro_ano_publicacao', 'livro', ['ano_publicacao', 'id']),
+    ('ix_emprestimo_usuario_id', 'emprestimo', ['usuario_id', 'id']),
+    ('ix_emprestimo_status', 'emprestimo', ['status', 'id']),
+    (
+        'ix_emprestimo_data_devolucao_prevista',
+        'emprestimo',
+        ['data_devolucao_prevista', 'id'],
+    ),
+    (
+        'ix_livro_emprestimo_emprestimo_id',
+        'livro_emprestimo',
+        ['emprestimo_id', 'livro_id'],
+    ),
+]
+# Parcial: empréstimos ativos por vencimento (consulta de atrasados)
+ATIVOS = sa.text("status = 'ATIVO'")
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    # No Postgres, CONCURRENTLY não bloqueia escritas durante a criação,
+    # mas não pode rodar dentro da transação da migração
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            'ix_emprestimo_ativos_vencimento',
+            'emprestimo',
+            ['data_devolucao_prevista'],
+            if_not_exists=True,
+            postgresql_where=ATIVOS,
+            sqlite_where=ATIVOS,
+            postgresql_concurrently=True,
+        )
+    if postgres:
+        op.execute('ANALYZE livro, emprestimo, livro_emprestimo')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_emprestimo_ativos_vencimento', table_name='emprestimo')
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,45 @@
+"""Coluna atualizado_em (versão para ETags)
+
+Revision ID: e1b7f3a9c5d2
+Revises: d5a9c3e7b1f4
+Create Date: 2026-10-18 12:20:31.508142
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b7f3a9c5d2'
+down_revision: Union[str, None] = 'd5a9c3e7b1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabela -> expressão com o valor inicial das linhas existentes
+TABELAS = {
+    'autor': 'data_criacao',
+    'editora': 'data_criacao',
+    'livro': 'data_criacao',
+    'usuario': 'data_criacao',
+    'emprestimo': 'COALESCE(data_devolucao_real, data_emprestimo)',
+}
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    for tabela, inicial in TABELAS.items():
+        op.add_column(tabela, sa.Column('atualizado_em', sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE {tabela} SET atualizado_em = {inicial}')
+        # No SQLite o NOT NULL exigiria recriar a tabela (e os triggers da
+        # busca); lá a coluna fica anulável, sempre preenchida pela aplicação
+        if postgres:
+            op.alter_column(
+                tabela, 'atualizado_em', existing_type=sa.DateTime(), nullable=False
+            )
+
+
+def downgrade() -> None:
+    for tabela in reversed(list(TABELAS)):
+        op.drop_column(tabela, 'atualizado_em')
@@ -0,0 +1,62 @@
+"""Rollups dos relatórios de empréstimos
+
+Revision ID: f3c6d8a2b4e7
+Revises: e1b7f3a9c5d2
+Create Date: 2026-10-18 15:02:44.913520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c6d8a2b4e7'
+down_revision: Union[str, None] = 'e1b7f3a9c5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # As tabelas nascem vazias: o backfill a partir do histórico é o
+    # `python -m jobs rollups`, o mesmo usado para corrigir divergências
+    op.create_table('estatistica_dia',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('emprestimos', sa.Integer(), nullable=False),
+    sa.Column('livros', sa.Integer(), nullable=False),
+    sa.Column('devolucoes', sa.Integer(), nullable=False),
+    sa.Column('devolucoes_atrasadas', sa.Integer(), nullable=False),
+    sa.Column('atraso_dias', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('dia')
+    )
+    op.create_table('estatistica_livro',
+    # Cópias dos ids de livro/usuário: sem SERIAL (sequência) no Postgres
+    sa.Column('livro_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('emprestimos', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('livro_id')
+    )
+    op.create_index(
+        'ix_estatistica_livro_emprestimos',
+        'estatistica_livro',
+        ['emprestimos', 'livro_id'],
+    )
+    op.create_table('estatistica_usuario',
+    sa.Column('usuario_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('emprestimos', sa.Integer(), nullable=False),
+    sa.Column('livros', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('usuario_id')
+    )
+    op.create_index(
+        'ix_estatistica_usuario_emprestimos',
+        'estatistica_usuario',
+        ['emprestimos', 'usuario_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_estatistica_usuario_emprestimos', table_name='estatistica_usuario')
+    op.drop_table('estatistica_usuario')
+    op.drop_index('ix_estatistica_livro_emprestimos', table_name='estatistica_livro')
+    op.drop_table('estatistica_livro')
+    op.drop_table('estatistica_dia')
@@ -1,69 +1,195 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import FileResponse
 
-from crud.autores_crud import crud_autor
-from config.database import get_session
-from domain.models import AutorCreate, AutorRead, AutorUpdate
+from crud.autores_crud import crud_autor_async
+from crud.conditional import get_or_304, page_or_304
+from crud.export import MEDIA_TYPES, ExportFormat, export_response
+from crud.filters import split_csv
+from crud.importer import detect_format, report_file
+from config.config import settings
+from config.database import DbSession, get_db
+from config.query_stats import query_budget
+from domain.models import (
+    BulkCreateResult,
+    ImportResult,
+    AutorCreate,
+    AutorRead,
+    AutorUpdate,
+)
 
 router = APIRouter(prefix="/autores", tags=["autores"])
 
 
 @router.post("/", response_model=AutorRead)
-def criar_autor(autor: AutorCreate, db: Session = Depends(get_session)):
+@query_budget(2)
+async def criar_autor(autor: AutorCreate, db: DbSession = Depends(get_db)):
     """Criar um novo autor"""
-    return crud_autor.create(db=db, obj_in=autor)
+    return await crud_autor_async.create_returning(db=db, obj_in=autor)
+
+
+@router.post("/bulk", response_model=BulkCreateResult)
+@query_budget(2, per_batch=True)
+async def criar_autores_em_lote(
+    autores: List[AutorCreate] = Body(...), db: DbSession = Depends(get_db)
+):
+    """Criar autores em lote (erros reportados por linha)"""
+    if len(autores) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo de {settings.BULK_MAX_ITEMS} registros por lote",
+        )
+    return await crud_autor_async.create_bulk(db=db, objs_in=autores)
+
+
+@router.post("/import", response_model=ImportResult)
+@query_budget(2, per_batch=True)
+async def importar_autores(
+    arquivo: UploadFile = File(...),
+    fmt: Optional[ExportFormat] = Query(None, alias="format"),
+    db: DbSession = Depends(get_db),
+):
+    """Importar autores de um arquivo CSV ou NDJSON, em blocos transacionais"""
+    return await crud_autor_async.import_file(
+        db,
+        arquivo.file,
+        schema=AutorCreate,
+        fmt=fmt or detect_format(arquivo.filename),
+        report_path=f"{router.prefix}/import",
+    )
+
+
+@router.get("/import/{relatorio_id}")
+@query_budget(0)
+async def relatorio_importacao_autores(relatorio_id: str):
+    """Baixar o relatório de erros (linha, erro) de uma importação"""
+    path = report_file("Autor", relatorio_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado")
+    return FileResponse(
+        path, media_type=MEDIA_TYPES[ExportFormat.CSV], filename=path.name
+    )
 
 
 @router.get("/", response_model=List[AutorRead])
-def listar_autores(
+@query_budget(2)
+async def listar_autores(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
     nome: Optional[str] = Query(None),
     nacionalidade: Optional[str] = Query(None),
-    db: Session = Depends(get_session),
+    fields: Optional[str] = Query(None, description="id,nome"),
+    db: DbSession = Depends(get_db),
 ):
-    """Listar autores com filtros opcionais"""
-    if nome:
-        return crud_autor.get_by_nome(db=db, nome=nome)
-    elif nacionalidade:
-        return crud_autor.get_by_nacionalidade(db=db, nacionalidade=nacionalidade)
-    else:
-        return crud_autor.get_multi(db=db, skip=skip, limit=limit)
+    """Listar autores com filtros opcionais combináveis"""
+    filters = {"nome": nome, "nacionalidade": nacionalidade}
+    page = await page_or_304(
+        crud_autor_async,
+        db,
+        request,
+        response,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        filters=filters,
+        fields=split_csv(fields),
+    )
+    if isinstance(page, Response):
+        return page
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.get("/count")
-def contar_autores(db: Session = Depends(get_session)):
-    """Contar total de autores"""
-    count = crud_autor.count(db=db)
+@query_budget(3)
+async def contar_autores(
+    nome: Optional[str] = Query(None),
+    nacionalidade: Optional[str] = Query(None),
+    approx: bool = Query(False),
+    db: DbSession = Depends(get_db),
+):
+    """Contar autores (com os mesmos filtros da listagem)"""
+    filters = {"nome": nome, "nacionalidade": nacionalidade}
+    count = await crud_autor_async.count(db=db, filters=filters, approx=approx)
     return {"quantidade": count}
 
 
+@router.get("/export")
+async def exportar_autores(
+    fmt: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    sort: Optional[str] = Query(None),
+    nome: Optional[str] = Query(None),
+    nacionalidade: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="id,nome"),
+    db: DbSession = Depends(get_db),
+):
+    """Exportar autores em CSV ou NDJSON (streaming, mesmos filtros da listagem)"""
+    filters = {"nome": nome, "nacionalidade": nacionalidade}
+    body = crud_autor_async.export(
+        db, fmt=fmt, sort=sort, filters=filters, fields=split_csv(fields)
+    )
+    return export_response(body, fmt, "autores")
+
+
 @router.get("/{autor_id}", response_model=AutorRead)
-def buscar_autor(autor_id: int, db: Session = Depends(get_session)):
-    """Buscar autor por ID"""
-    autor = crud_autor.get(db=db, id=autor_id)
+@query_budget(2)
+async def buscar_autor(
+    autor_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="id,nome"),
+    db: DbSession = Depends(get_db),
+):
+    """Buscar autor por ID (ETag; 304 se não mudou)"""
+    autor = await get_or_304(
+        crud_autor_async,
+        db,
+        request,
+        response,
+        autor_id,
+        fields=split_csv(fields),
+    )
     if not autor:
         raise HTTPException(status_code=404, detail="Autor não encontrado")
     return autor
 
 
 @router.put("/{autor_id}", response_model=AutorRead)
-def atualizar_autor(
-    autor_id: int, autor_update: AutorUpdate, db: Session = Depends(get_session)
+@query_budget(1)
+async def atualizar_autor(
+    autor_id: int, autor_update: AutorUpdate, db: DbSession = Depends(get_db)
 ):
     """Atualizar autor"""
-    autor = crud_autor.get(db=db, id=autor_id)
+    autor = await crud_autor_async.update_returning(
+        db=db, id=autor_id, obj_in=autor_update
+    )
     if not autor:
         raise HTTPException(status_code=404, detail="Autor não encontrado")
-    return crud_autor.update(db=db, db_obj=autor, obj_in=autor_update)
+    return autor
 
 
 @router.delete("/{autor_id}")
-def deletar_autor(autor_id: int, db: Session = Depends(get_session)):
-    """Deletar autor"""
-    autor = crud_autor.remove(db=db, id=autor_id)
+@query_budget(2)
+async def deletar_autor(autor_id: int, db: DbSession = Depends(get_db)):
+    """Deletar autor (409 se ainda tiver livros)"""
+    autor = await crud_autor_async.remove_returning(db=db, id=autor_id)
     if not autor:
         raise HTTPException(status_code=404, detail="Autor não encontrado")
     return {"message": "Autor deletado com sucesso"}
@@ -1,66 +1,191 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import FileResponse
 
-from crud.editoras_crud import crud_editora
-from config.database import get_session
-from domain.models import EditoraCreate, EditoraRead, EditoraUpdate
+from crud.editoras_crud import crud_editora_async
+from crud.conditional import get_or_304, page_or_304
+from crud.export import MEDIA_TYPES, ExportFormat, export_response
+from crud.filters import split_csv
+from crud.importer import detect_format, report_file
+from config.config import settings
+from config.database import DbSession, get_db
+from config.query_stats import query_budget
+from domain.models import (
+    BulkCreateResult,
+    ImportResult,
+    EditoraCreate,
+    EditoraRead,
+    EditoraUpdate,
+)
 
 router = APIRouter(prefix="/editoras", tags=["editoras"])
 
 
 @router.post("/", response_model=EditoraRead)
-def criar_editora(editora: EditoraCreate, db: Session = Depends(get_session)):
+@query_budget(2)
+async def criar_editora(editora: EditoraCreate, db: DbSession = Depends(get_db)):
     """Criar uma nova editora"""
-    return crud_editora.create(db=db, obj_in=editora)
+    return await crud_editora_async.create_returning(db=db, obj_in=editora)
+
+
+@router.post("/bulk", response_model=BulkCreateResult)
+@query_budget(2, per_batch=True)
+async def criar_editoras_em_lote(
+    editoras: List[EditoraCreate] = Body(...), db: DbSession = Depends(get_db)
+):
+    """Criar editoras em lote (erros reportados por linha)"""
+    if len(editoras) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo de {settings.BULK_MAX_ITEMS} registros por lote",
+        )
+    return await crud_editora_async.create_bulk(db=db, objs_in=editoras)
+
+
+@router.post("/import", response_model=ImportResult)
+@query_budget(2, per_batch=True)
+async def importar_editoras(
+    arquivo: UploadFile = File(...),
+    fmt: Optional[ExportFormat] = Query(None, alias="format"),
+    db: DbSession = Depends(get_db),
+):
+    """Importar editoras de um arquivo CSV ou NDJSON, em blocos transacionais"""
+    return await crud_editora_async.import_file(
+        db,
+        arquivo.file,
+        schema=EditoraCreate,
+        fmt=fmt or detect_format(arquivo.filename),
+        report_path=f"{router.prefix}/import",
+    )
+
+
+@router.get("/import/{relatorio_id}")
+@query_budget(0)
+async def relatorio_importacao_editoras(relatorio_id: str):
+    """Baixar o relatório de erros (linha, erro) de uma importação"""
+    path = report_file("Editora", relatorio_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado")
+    return FileResponse(
+        path, media_type=MEDIA_TYPES[ExportFormat.CSV], filename=path.name
+    )
 
 
 @router.get("/", response_model=List[EditoraRead])
-def listar_editoras(
+@query_budget(2)
+async def listar_editoras(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
     nome: Optional[str] = Query(None),
-    db: Session = Depends(get_session),
+    fields: Optional[str] = Query(None, description="id,nome"),
+    db: DbSession = Depends(get_db),
 ):
     """Listar editoras com filtros opcionais"""
-    if nome:
-        return crud_editora.get_by_nome(db=db, nome=nome)
-    else:
-        return crud_editora.get_multi(db=db, skip=skip, limit=limit)
+    page = await page_or_304(
+        crud_editora_async,
+        db,
+        request,
+        response,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        filters={"nome": nome},
+        fields=split_csv(fields),
+    )
+    if isinstance(page, Response):
+        return page
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.get("/count")
-def contar_editoras(db: Session = Depends(get_session)):
-    """Contar total de editoras"""
-    count = crud_editora.count(db=db)
+@query_budget(3)
+async def contar_editoras(
+    nome: Optional[str] = Query(None),
+    approx: bool = Query(False),
+    db: DbSession = Depends(get_db),
+):
+    """Contar editoras (com os mesmos filtros da listagem)"""
+    count = await crud_editora_async.count(
+        db=db, filters={"nome": nome}, approx=approx
+    )
     return {"quantidade": count}
 
 
+@router.get("/export")
+async def exportar_editoras(
+    fmt: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    sort: Optional[str] = Query(None),
+    nome: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="id,nome"),
+    db: DbSession = Depends(get_db),
+):
+    """Exportar editoras em CSV ou NDJSON (streaming, mesmos filtros da listagem)"""
+    body = crud_editora_async.export(
+        db, fmt=fmt, sort=sort, filters={"nome": nome}, fields=split_csv(fields)
+    )
+    return export_response(body, fmt, "editoras")
+
+
 @router.get("/{editora_id}", response_model=EditoraRead)
-def buscar_editora(editora_id: int, db: Session = Depends(get_session)):
-    """Buscar editora por ID"""
-    editora = crud_editora.get(db=db, id=editora_id)
+@query_budget(2)
+async def buscar_editora(
+    editora_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="id,nome"),
+    db: DbSession = Depends(get_db),
+):
+    """Buscar editora por ID (ETag; 304 se não mudou)"""
+    editora = await get_or_304(
+        crud_editora_async,
+        db,
+        request,
+        response,
+        editora_id,
+        fields=split_csv(fields),
+    )
     if not editora:
         raise HTTPException(status_code=404, detail="Editora não encontrada")
     return editora
 
 
 @router.put("/{editora_id}", response_model=EditoraRead)
-def atualizar_editora(
-    editora_id: int, editora_update: EditoraUpdate, db: Session = Depends(get_session)
+@query_budget(1)
+async def atualizar_editora(
+    editora_id: int, editora_update: EditoraUpdate, db: DbSession = Depends(get_db)
 ):
     """Atualizar editora"""
-    editora = crud_editora.get(db=db, id=editora_id)
+    editora = await crud_editora_async.update_returning(
+        db=db, id=editora_id, obj_in=editora_update
+    )
     if not editora:
         raise HTTPException(status_code=404, detail="Editora não encontrada")
-    return crud_editora.update(db=db, db_obj=editora, obj_in=editora_update)
+    return editora
 
 
 @router.delete("/{editora_id}")
-def deletar_editora(editora_id: int, db: Session = Depends(get_session)):
-    """Deletar editora"""
-    editora = crud_editora.remove(db=db, id=editora_id)
+@query_budget(2)
+async def deletar_editora(editora_id: int, db: DbSession = Depends(get_db)):
+    """Deletar editora (409 se ainda tiver livros)"""
+    editora = await crud_editora_async.remove_returning(db=db, id=editora_id)
     if not editora:
         raise HTTPException(status_code=404, detail="Editora não encontrada")
     return {"message": "Editora deletada com sucesso"}
@@ -1,139 +1,218 @@
-from datetime import datetime
-from typing import List, Optional
-
-from crud.emprestimos_crud import crud_emprestimo
-from crud.livros_crud import crud_livro
-from crud.usuarios_crud import crud_usuario
-from config.database import get_session
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Any, Dict, List, Optional
+
+from crud.conditional import get_or_304, page_or_304
+from crud.emprestimos_crud import crud_emprestimo_async
+from crud.exceptions import LivroNotFoundError, LivroUnavailableError
+from crud.export import ExportFormat, export_response
+from crud.filters import split_csv
+from config.database import DbSession, get_db
+from config.query_stats import query_budget
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from domain.models import (
     EmprestimoCreate,
     EmprestimoRead,
+    EmprestimoReadExpanded,
     EmprestimoReadWithLivros,
     EmprestimoUpdate,
     StatusEmprestimo,
 )
-from sqlmodel import Session
 
 router = APIRouter(prefix="/emprestimos", tags=["emprestimos"])
 
 
-@router.post("/", response_model=EmprestimoRead)
-def criar_emprestimo(emprestimo: EmprestimoCreate, db: Session = Depends(get_session)):
-    """Criar um novo empréstimo"""
-    # Verificar se usuário existe
-    usuario = crud_usuario.get(db=db, id=emprestimo.usuario_id)
-    if not usuario:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-
-    # Verificar se todos os livros existem
-    for livro_id in emprestimo.livro_ids:
-        livro = crud_livro.get(db=db, id=livro_id)
-        if not livro:
-            raise HTTPException(
-                status_code=404, detail=f"Livro {livro_id} não encontrado"
-            )
-
-    return crud_emprestimo.create_with_livros(db=db, obj_in=emprestimo)
+async def emprestimo_filters(
+    usuario_id: Optional[int] = Query(None),
+    status: Optional[StatusEmprestimo] = Query(None),
+    atrasados: bool = Query(False),
+) -> Dict[str, Any]:
+    """Filtros da listagem, compartilhados por count e export"""
+    return {"usuario_id": usuario_id, "status": status, "atrasados": atrasados}
 
 
-@router.get("/", response_model=List[EmprestimoRead])
-def listar_emprestimos(
+@router.post("/", response_model=EmprestimoRead)
+@query_budget(7)
+async def criar_emprestimo(
+    emprestimo: EmprestimoCreate, db: DbSession = Depends(get_db)
+):
+    """Criar um novo empréstimo"""
+    # Livros validados, travados e vinculados em lote no checkout; usuário
+    # inexistente vem da chave estrangeira (404)
+    try:
+        return await crud_emprestimo_async.create_with_livros(db=db, obj_in=emprestimo)
+    except LivroNotFoundError as e:
+        raise HTTPException(
+            status_code=404, detail=f"Livro {e.ids[0]} não encontrado"
+        )
+    except LivroUnavailableError as e:
+        ids = ", ".join(str(livro_id) for livro_id in e.ids)
+        raise HTTPException(status_code=409, detail=f"Livros indisponíveis: {ids}")
+
+
+@router.get(
+    "/", response_model=List[EmprestimoReadExpanded], response_model_exclude_unset=True
+)
+@query_budget(2)
+async def listar_emprestimos(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    usuario_id: Optional[int] = Query(None),
-    status: Optional[StatusEmprestimo] = Query(None),
-    atrasados: bool = Query(False),
-    db: Session = Depends(get_session),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
+    filters: Dict[str, Any] = Depends(emprestimo_filters),
+    expand: Optional[str] = Query(None, description="livros,usuario"),
+    fields: Optional[str] = Query(None, description="id,status,usuario_id"),
+    db: DbSession = Depends(get_db),
 ):
-    """Listar empréstimos com filtros opcionais"""
-    if atrasados:
-        return crud_emprestimo.get_atrasados(db=db)
-    elif usuario_id:
-        return crud_emprestimo.get_by_usuario(db=db, usuario_id=usuario_id)
-    elif status:
-        return crud_emprestimo.get_by_status(db=db, status=status)
-    else:
-        return crud_emprestimo.get_multi(db=db, skip=skip, limit=limit)
+    """Listar empréstimos com filtros opcionais combináveis"""
+    page = await page_or_304(
+        crud_emprestimo_async,
+        db,
+        request,
+        response,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        filters=filters,
+        expand=split_csv(expand),
+        fields=split_csv(fields),
+    )
+    if isinstance(page, Response):
+        return page
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.get("/count")
-def contar_emprestimos(db: Session = Depends(get_session)):
-    """Contar total de empréstimos"""
-    count = crud_emprestimo.count(db=db)
+@query_budget(3)
+async def contar_emprestimos(
+    filters: Dict[str, Any] = Depends(emprestimo_filters),
+    approx: bool = Query(False),
+    db: DbSession = Depends(get_db),
+):
+    """Contar empréstimos (com os mesmos filtros da listagem)"""
+    count = await crud_emprestimo_async.count(db=db, filters=filters, approx=approx)
     return {"quantidade": count}
 
 
+@router.get("/export")
+async def exportar_emprestimos(
+    fmt: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    sort: Optional[str] = Query(None),
+    filters: Dict[str, Any] = Depends(emprestimo_filters),
+    fields: Optional[str] = Query(None, description="id,status,usuario_id"),
+    db: DbSession = Depends(get_db),
+):
+    """Exportar o histórico de empréstimos em CSV ou NDJSON (streaming)"""
+    body = crud_emprestimo_async.export(
+        db, fmt=fmt, sort=sort, filters=filters, fields=split_csv(fields)
+    )
+    return export_response(body, fmt, "emprestimos")
+
+
 @router.get("/with-livros", response_model=List[EmprestimoReadWithLivros])
-def listar_emprestimos_com_livros(
+@query_budget(2)
+async def listar_emprestimos_com_livros(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_session),
+    cursor: Optional[str] = Query(None),
+    db: DbSession = Depends(get_db),
 ):
     """Listar empréstimos com seus livros associados"""
-    emprestimos = crud_emprestimo.get_all_with_livros(db=db, skip=skip, limit=limit)
+    emprestimos = await crud_emprestimo_async.get_all_with_livros(
+        db=db, skip=skip, limit=limit, cursor=cursor
+    )
+    next_cursor = crud_emprestimo_async.next_cursor(emprestimos, limit=limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return emprestimos
 
 
 @router.get("/{emprestimo_id}/with-livros", response_model=EmprestimoReadWithLivros)
-def buscar_emprestimo_com_livros(emprestimo_id: int, db: Session = Depends(get_session)):
+@query_budget(2)
+async def buscar_emprestimo_com_livros(
+    emprestimo_id: int, db: DbSession = Depends(get_db)
+):
     """Buscar empréstimo específico com seus livros associados"""
-    emprestimo = crud_emprestimo.get_with_livros(db=db, emprestimo_id=emprestimo_id)
+    emprestimo = await crud_emprestimo_async.get_with_livros(
+        db=db, emprestimo_id=emprestimo_id
+    )
     if not emprestimo:
         raise HTTPException(status_code=404, detail="Empréstimo não encontrado")
     return emprestimo
 
 
-@router.get("/{emprestimo_id}", response_model=EmprestimoRead)
-def buscar_emprestimo(emprestimo_id: int, db: Session = Depends(get_session)):
-    """Buscar empréstimo por ID"""
-    emprestimo = crud_emprestimo.get(db=db, id=emprestimo_id)
+@router.get(
+    "/{emprestimo_id}",
+    response_model=EmprestimoReadExpanded,
+    response_model_exclude_unset=True,
+)
+@query_budget(2)
+async def buscar_emprestimo(
+    emprestimo_id: int,
+    request: Request,
+    response: Response,
+    expand: Optional[str] = Query(None, description="livros,usuario"),
+    fields: Optional[str] = Query(None, description="id,status,usuario_id"),
+    db: DbSession = Depends(get_db),
+):
+    """Buscar empréstimo por ID (sem expand: ETag; 304 se não mudou)"""
+    emprestimo = await get_or_304(
+        crud_emprestimo_async,
+        db,
+        request,
+        response,
+        emprestimo_id,
+        expand=split_csv(expand),
+        fields=split_csv(fields),
+    )
     if not emprestimo:
         raise HTTPException(status_code=404, detail="Empréstimo não encontrado")
     return emprestimo
 
 
 @router.put("/{emprestimo_id}", response_model=EmprestimoRead)
-def atualizar_emprestimo(
+@query_budget(4)
+async def atualizar_emprestimo(
     emprestimo_id: int,
     emprestimo_update: EmprestimoUpdate,
-    db: Session = Depends(get_session),
+    db: DbSession = Depends(get_db),
 ):
-    """Atualizar empréstimo"""
-    emprestimo = crud_emprestimo.get(db=db, id=emprestimo_id)
+    """Atualizar empréstimo com um UPDATE ... RETURNING
+
+    Mudanças de status, devolução ou prazo também acertam os relatórios.
+    """
+    emprestimo = await crud_emprestimo_async.update_returning(
+        db=db, id=emprestimo_id, obj_in=emprestimo_update
+    )
     if not emprestimo:
         raise HTTPException(status_code=404, detail="Empréstimo não encontrado")
-
-    return crud_emprestimo.update(db=db, db_obj=emprestimo, obj_in=emprestimo_update)
+    return emprestimo
 
 
 @router.put("/{emprestimo_id}/devolver")
-def devolver_emprestimo(emprestimo_id: int, db: Session = Depends(get_session)):
-    """Marcar empréstimo como devolvido"""
-    emprestimo = crud_emprestimo.get(db=db, id=emprestimo_id)
-    if not emprestimo:
-        raise HTTPException(status_code=404, detail="Empréstimo não encontrado")
-
-    if emprestimo.status == StatusEmprestimo.DEVOLVIDO:
+@query_budget(3)
+async def devolver_emprestimo(emprestimo_id: int, db: DbSession = Depends(get_db)):
+    """Marcar empréstimo como devolvido (e somar a devolução aos relatórios)"""
+    emprestimo = await crud_emprestimo_async.devolver(db, id=emprestimo_id)
+    if emprestimo is None:
+        if await crud_emprestimo_async.get(db=db, id=emprestimo_id) is None:
+            raise HTTPException(status_code=404, detail="Empréstimo não encontrado")
         raise HTTPException(status_code=400, detail="Empréstimo já foi devolvido")
-
-    update_data = EmprestimoUpdate(
-        status=StatusEmprestimo.DEVOLVIDO, data_devolucao_real=datetime.now()
-    )
-
-    updated_emprestimo = crud_emprestimo.update(
-        db=db, db_obj=emprestimo, obj_in=update_data
-    )
     return {
         "message": "Empréstimo devolvido com sucesso",
-        "emprestimo": updated_emprestimo,
+        "emprestimo": emprestimo,
     }
 
 
 @router.delete("/{emprestimo_id}")
-def deletar_emprestimo(emprestimo_id: int, db: Session = Depends(get_session)):
-    """Deletar empréstimo"""
-    emprestimo = crud_emprestimo.remove(db=db, id=emprestimo_id)
+@query_budget(7)
+async def deletar_emprestimo(emprestimo_id: int, db: DbSession = Depends(get_db)):
+    """Deletar empréstimo (descontando-o dos relatórios)"""
+    emprestimo = await crud_emprestimo_async.remove(db=db, id=emprestimo_id)
     if not emprestimo:
         raise HTTPException(status_code=404, detail="Empréstimo não encontrado")
     return {"message": "Empréstimo deletado com sucesso"}
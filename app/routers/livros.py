@@ -1,99 +1,251 @@
-from typing import List, Optional
-
-from crud.autores_crud import crud_autor
-from crud.editoras_crud import crud_editora
-from crud.livros_crud import crud_livro
-from config.database import get_session
-from fastapi import APIRouter, Depends, HTTPException, Query
-from domain.models import LivroCreate, LivroRead, LivroUpdate
-from sqlmodel import Session
+from typing import Any, Dict, List, Optional
+
+from crud.conditional import get_or_304, page_or_304
+from crud.export import MEDIA_TYPES, ExportFormat, export_response
+from crud.importer import detect_format, report_file
+from crud.filters import split_csv
+from crud.livros_crud import crud_livro_async
+from config.config import settings
+from config.database import DbSession, get_db
+from config.query_stats import query_budget
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import FileResponse
+from domain.models import (
+    BulkCreateResult,
+    FacetResult,
+    ImportResult,
+    LivroCreate,
+    LivroRead,
+    LivroReadExpanded,
+    LivroUpdate,
+)
 
 router = APIRouter(prefix="/livros", tags=["livros"])
 
 
-@router.post("/", response_model=LivroRead)
-def criar_livro(livro: LivroCreate, db: Session = Depends(get_session)):
-    """Criar um novo livro"""
-    # Verificar se autor existe
-    autor = crud_autor.get(db=db, id=livro.autor_id)
-    if not autor:
-        raise HTTPException(status_code=404, detail="Autor não encontrado")
+async def livro_filters(
+    titulo: Optional[str] = Query(None),
+    genero: Optional[str] = Query(None),
+    autor_id: Optional[int] = Query(None),
+    editora_id: Optional[int] = Query(None),
+    ano_inicio: Optional[int] = Query(None),
+    ano_fim: Optional[int] = Query(None),
+) -> Dict[str, Any]:
+    """Filtros da listagem, compartilhados por count, facets e export"""
+    # Sem ano_fim, ano_inicio seleciona apenas aquele ano
+    if ano_inicio is not None and ano_fim is None:
+        ano_fim = ano_inicio
+    return {
+        "titulo": titulo,
+        "genero": genero,
+        "autor_id": autor_id,
+        "editora_id": editora_id,
+        "ano_inicio": ano_inicio,
+        "ano_fim": ano_fim,
+    }
 
-    # Verificar se editora existe
-    editora = crud_editora.get(db=db, id=livro.editora_id)
-    if not editora:
-        raise HTTPException(status_code=404, detail="Editora não encontrada")
 
-    return crud_livro.create(db=db, obj_in=livro)
+@router.post("/", response_model=LivroRead)
+@query_budget(4)
+async def criar_livro(livro: LivroCreate, db: DbSession = Depends(get_db)):
+    """Criar um novo livro
+
+    Autor/editora inexistentes (404) e ISBN repetido (400) vêm das
+    constraints do banco; o orçamento cobre as consultas da mensagem de erro.
+    """
+    return await crud_livro_async.create_returning(db=db, obj_in=livro)
 
 
-@router.get("/", response_model=List[LivroRead])
-def listar_livros(
+@router.post("/bulk", response_model=BulkCreateResult)
+@query_budget(5, per_batch=True)
+async def criar_livros_em_lote(
+    livros: List[LivroCreate] = Body(...), db: DbSession = Depends(get_db)
+):
+    """Criar livros em lote (erros reportados por linha)"""
+    if len(livros) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo de {settings.BULK_MAX_ITEMS} registros por lote",
+        )
+    return await crud_livro_async.create_bulk(db=db, objs_in=livros)
+
+
+@router.post("/import", response_model=ImportResult)
+@query_budget(7, per_batch=True)
+async def importar_livros(
+    arquivo: UploadFile = File(...),
+    fmt: Optional[ExportFormat] = Query(None, alias="format"),
+    db: DbSession = Depends(get_db),
+):
+    """Importar livros de um arquivo CSV ou NDJSON, em blocos transacionais"""
+    return await crud_livro_async.import_file(
+        db,
+        arquivo.file,
+        schema=LivroCreate,
+        fmt=fmt or detect_format(arquivo.filename),
+        report_path=f"{router.prefix}/import",
+    )
+
+
+@router.get("/import/{relatorio_id}")
+@query_budget(0)
+async def relatorio_importacao_livros(relatorio_id: str):
+    """Baixar o relatório de erros (linha, erro) de uma importação"""
+    path = report_file("Livro", relatorio_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado")
+    return FileResponse(
+        path, media_type=MEDIA_TYPES[ExportFormat.CSV], filename=path.name
+    )
+
+
+@router.get(
+    "/", response_model=List[LivroReadExpanded], response_model_exclude_unset=True
+)
+@query_budget(2)
+async def listar_livros(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    titulo: Optional[str] = Query(None),
-    genero: Optional[str] = Query(None),
-    autor_id: Optional[int] = Query(None),
-    ano_inicio: Optional[int] = Query(None),
-    ano_fim: Optional[int] = Query(None),
-    db: Session = Depends(get_session),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
+    filters: Dict[str, Any] = Depends(livro_filters),
+    expand: Optional[str] = Query(None, description="autor,editora"),
+    fields: Optional[str] = Query(None, description="id,titulo,isbn"),
+    db: DbSession = Depends(get_db),
 ):
-    """Listar livros com filtros avançados"""
-    if titulo:
-        return crud_livro.get_by_titulo(db=db, titulo=titulo)
-    elif genero:
-        return crud_livro.get_by_genero(db=db, genero=genero)
-    elif autor_id:
-        return crud_livro.get_by_autor(db=db, autor_id=autor_id)
-    elif ano_inicio:
-        return crud_livro.get_by_ano(db=db, ano_inicio=ano_inicio, ano_fim=ano_fim)
-    else:
-        return crud_livro.get_multi(db=db, skip=skip, limit=limit)
+    """Listar livros com filtros avançados combináveis"""
+    page = await page_or_304(
+        crud_livro_async,
+        db,
+        request,
+        response,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        filters=filters,
+        expand=split_csv(expand),
+        fields=split_csv(fields),
+    )
+    if isinstance(page, Response):
+        return page
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+
+@router.get("/search", response_model=List[LivroRead])
+@query_budget(2)
+async def buscar_livros(
+    q: str = Query(..., min_length=2),
+    limit: int = Query(20, ge=1, le=100),
+    db: DbSession = Depends(get_db),
+):
+    """Busca textual ranqueada por título, autor e editora"""
+    return await crud_livro_async.search(db=db, q=q, limit=limit)
 
 
 @router.get("/count")
-def contar_livros(db: Session = Depends(get_session)):
-    """Contar total de livros"""
-    count = crud_livro.count(db=db)
+@query_budget(3)
+async def contar_livros(
+    filters: Dict[str, Any] = Depends(livro_filters),
+    approx: bool = Query(False),
+    db: DbSession = Depends(get_db),
+):
+    """Contar livros (com os mesmos filtros da listagem)"""
+    count = await crud_livro_async.count(db=db, filters=filters, approx=approx)
     return {"quantidade": count}
 
 
-@router.get("/{livro_id}", response_model=LivroRead)
-def buscar_livro(livro_id: int, db: Session = Depends(get_session)):
-    """Buscar livro por ID"""
-    livro = crud_livro.get(db=db, id=livro_id)
+@router.get("/facets", response_model=FacetResult)
+@query_budget(1)
+async def facetas_livros(
+    facetas: Optional[str] = Query(
+        None, description="genero,decada,autor_id,editora_id (padrão: todas)"
+    ),
+    limit: int = Query(20, ge=1, le=1000, description="Valores por faceta"),
+    filters: Dict[str, Any] = Depends(livro_filters),
+    db: DbSession = Depends(get_db),
+):
+    """Contagens por gênero, década, autor e editora (mesmos filtros da listagem)"""
+    return await crud_livro_async.facets(
+        db, names=split_csv(facetas), filters=filters, limit=limit
+    )
+
+
+@router.get("/export")
+async def exportar_livros(
+    fmt: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    sort: Optional[str] = Query(None),
+    filters: Dict[str, Any] = Depends(livro_filters),
+    fields: Optional[str] = Query(None, description="id,titulo,isbn"),
+    db: DbSession = Depends(get_db),
+):
+    """Exportar o catálogo em CSV ou NDJSON (streaming, mesmos filtros da listagem)"""
+    body = crud_livro_async.export(
+        db, fmt=fmt, sort=sort, filters=filters, fields=split_csv(fields)
+    )
+    return export_response(body, fmt, "livros")
+
+
+@router.get(
+    "/{livro_id}", response_model=LivroReadExpanded, response_model_exclude_unset=True
+)
+@query_budget(2)
+async def buscar_livro(
+    livro_id: int,
+    request: Request,
+    response: Response,
+    expand: Optional[str] = Query(None, description="autor,editora"),
+    fields: Optional[str] = Query(None, description="id,titulo,isbn"),
+    db: DbSession = Depends(get_db),
+):
+    """Buscar livro por ID (sem expand: ETag; 304 se não mudou)"""
+    livro = await get_or_304(
+        crud_livro_async,
+        db,
+        request,
+        response,
+        livro_id,
+        expand=split_csv(expand),
+        fields=split_csv(fields),
+    )
     if not livro:
         raise HTTPException(status_code=404, detail="Livro não encontrado")
     return livro
 
 
 @router.put("/{livro_id}", response_model=LivroRead)
-def atualizar_livro(
-    livro_id: int, livro_update: LivroUpdate, db: Session = Depends(get_session)
+@query_budget(4)
+async def atualizar_livro(
+    livro_id: int, livro_update: LivroUpdate, db: DbSession = Depends(get_db)
 ):
-    """Atualizar livro"""
-    livro = crud_livro.get(db=db, id=livro_id)
+    """Atualizar livro com um único UPDATE ... RETURNING"""
+    livro = await crud_livro_async.update_returning(
+        db=db, id=livro_id, obj_in=livro_update
+    )
     if not livro:
         raise HTTPException(status_code=404, detail="Livro não encontrado")
-
-    # Verificar se novos IDs existem
-    if livro_update.autor_id:
-        autor = crud_autor.get(db=db, id=livro_update.autor_id)
-        if not autor:
-            raise HTTPException(status_code=404, detail="Autor não encontrado")
-
-    if livro_update.editora_id:
-        editora = crud_editora.get(db=db, id=livro_update.editora_id)
-        if not editora:
-            raise HTTPException(status_code=404, detail="Editora não encontrada")
-
-    return crud_livro.update(db=db, db_obj=livro, obj_in=livro_update)
+    return livro
 
 
 @router.delete("/{livro_id}")
-def deletar_livro(livro_id: int, db: Session = Depends(get_session)):
-    """Deletar livro"""
-    livro = crud_livro.remove(db=db, id=livro_id)
+@query_budget(2)
+async def deletar_livro(livro_id: int, db: DbSession = Depends(get_db)):
+    """Deletar livro (409 se tiver empréstimos)"""
+    livro = await crud_livro_async.remove_returning(db=db, id=livro_id)
     if not livro:
         raise HTTPException(status_code=404, detail="Livro não encontrado")
     return {"message": "Livro deletado com sucesso"}
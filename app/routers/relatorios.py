@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from crud.async_base import run_sync
+from crud.relatorios import relatorios_emprestimos as relatorios
+from config.database import DbSession, get_db
+from config.query_stats import query_budget
+from fastapi import APIRouter, Depends, HTTPException, Query
+from domain.models import (
+    RankingLivro,
+    RankingUsuario,
+    RelatorioDisponivel,
+    RelatorioPeriodo,
+)
+
+router = APIRouter(prefix="/relatorios", tags=["relatorios"])
+
+
+def _intervalo(
+    inicio: Optional[date], fim: Optional[date], padrao: timedelta
+) -> Tuple[date, date]:
+    """Intervalo fechado [inicio, fim]; sem datas, o `padrao` até hoje"""
+    fim = fim or date.today()
+    inicio = inicio or fim - padrao
+    if inicio > fim:
+        raise HTTPException(status_code=400, detail="inicio deve ser <= fim")
+    return inicio, fim
+
+
+@router.get("/", response_model=List[RelatorioDisponivel])
+@query_budget(0)
+async def listar_relatorios():
+    """Relatórios disponíveis (todos lidos só das tabelas de rollup)"""
+    return [
+        RelatorioDisponivel(caminho=route.path, descricao=route.description)
+        for route in router.routes
+        if route.path != f"{router.prefix}/"
+    ]
+
+
+@router.get("/emprestimos/dia", response_model=List[RelatorioPeriodo])
+@query_budget(1)
+async def emprestimos_por_dia(
+    inicio: Optional[date] = Query(None, description="Padrão: 30 dias antes do fim"),
+    fim: Optional[date] = Query(None, description="Padrão: hoje"),
+    db: DbSession = Depends(get_db),
+):
+    """Empréstimos, livros, devoluções e atraso médio por dia"""
+    inicio, fim = _intervalo(inicio, fim, timedelta(days=30))
+    return await run_sync(db, relatorios.por_dia, inicio=inicio, fim=fim)
+
+
+@router.get("/emprestimos/mes", response_model=List[RelatorioPeriodo])
+@query_budget(1)
+async def emprestimos_por_mes(
+    inicio: Optional[date] = Query(None, description="Padrão: um ano antes do fim"),
+    fim: Optional[date] = Query(None, description="Padrão: hoje"),
+    db: DbSession = Depends(get_db),
+):
+    """Os mesmos totais por mês (AAAA-MM)"""
+    inicio, fim = _intervalo(inicio, fim, timedelta(days=365))
+    return await run_sync(db, relatorios.por_mes, inicio=inicio, fim=fim)
+
+
+@router.get("/emprestimos/resumo", response_model=RelatorioPeriodo)
+@query_budget(1)
+async def resumo_emprestimos(
+    inicio: Optional[date] = Query(None, description="Padrão: 30 dias antes do fim"),
+    fim: Optional[date] = Query(None, description="Padrão: hoje"),
+    db: DbSession = Depends(get_db),
+):
+    """Totais do intervalo, com o atraso médio das devoluções (em dias)"""
+    inicio, fim = _intervalo(inicio, fim, timedelta(days=30))
+    return await run_sync(db, relatorios.resumo, inicio=inicio, fim=fim)
+
+
+@router.get("/livros/mais-emprestados", response_model=List[RankingLivro])
+@query_budget(1)
+async def livros_mais_emprestados(
+    limit: int = Query(10, ge=1, le=100),
+    db: DbSession = Depends(get_db),
+):
+    """Livros com mais empréstimos em todo o histórico"""
+    return await run_sync(db, relatorios.livros_mais_emprestados, limit=limit)
+
+
+@router.get("/usuarios/mais-ativos", response_model=List[RankingUsuario])
+@query_budget(1)
+async def usuarios_mais_ativos(
+    limit: int = Query(10, ge=1, le=100),
+    db: DbSession = Depends(get_db),
+):
+    """Usuários com mais empréstimos em todo o histórico"""
+    return await run_sync(db, relatorios.usuarios_mais_ativos, limit=limit)
@@ -1,93 +1,201 @@
-from typing import List
-
-from crud.usuarios_crud import crud_usuario
-from config.database import get_session
-from fastapi import APIRouter, Depends, HTTPException, Query
-from domain.models import UsuarioCreate, UsuarioRead, UsuarioUpdate
-from sqlmodel import Session
+from typing import List, Optional
+
+from crud.usuarios_crud import crud_usuario_async
+from crud.conditional import get_or_304, page_or_304
+from crud.export import MEDIA_TYPES, ExportFormat, export_response
+from crud.filters import split_csv
+from crud.importer import detect_format, report_file
+from config.config import settings
+from config.database import DbSession, get_db
+from config.query_stats import query_budget
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import FileResponse
+from domain.models import (
+    BulkCreateResult,
+    ImportResult,
+    UsuarioCreate,
+    UsuarioRead,
+    UsuarioUpdate,
+)
 
 router = APIRouter(prefix="/usuarios", tags=["usuarios"])
 
 
 @router.post("/", response_model=UsuarioRead)
-def criar_usuario(usuario: UsuarioCreate, db: Session = Depends(get_session)):
-    """Criar um novo usuário"""
-    existing_user = crud_usuario.get_by_email(db=db, email=usuario.email)
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email já cadastrado")
+@query_budget(3)
+async def criar_usuario(usuario: UsuarioCreate, db: DbSession = Depends(get_db)):
+    """Criar um novo usuário (email/CPF repetidos: 400, pela constraint única)"""
+    return await crud_usuario_async.create_returning(db=db, obj_in=usuario)
 
-    existing_cpf = crud_usuario.get_by_cpf(db=db, cpf=usuario.cpf)
-    if existing_cpf:
-        raise HTTPException(status_code=400, detail="CPF já cadastrado")
 
-    return crud_usuario.create(db=db, obj_in=usuario)
+@router.post("/bulk", response_model=BulkCreateResult)
+@query_budget(4, per_batch=True)
+async def criar_usuarios_em_lote(
+    usuarios: List[UsuarioCreate] = Body(...), db: DbSession = Depends(get_db)
+):
+    """Criar usuários em lote (erros reportados por linha)"""
+    if len(usuarios) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo de {settings.BULK_MAX_ITEMS} registros por lote",
+        )
+    return await crud_usuario_async.create_bulk(db=db, objs_in=usuarios)
+
+
+@router.post("/import", response_model=ImportResult)
+@query_budget(4, per_batch=True)
+async def importar_usuarios(
+    arquivo: UploadFile = File(...),
+    fmt: Optional[ExportFormat] = Query(None, alias="format"),
+    db: DbSession = Depends(get_db),
+):
+    """Importar usuários de um arquivo CSV ou NDJSON, em blocos transacionais"""
+    return await crud_usuario_async.import_file(
+        db,
+        arquivo.file,
+        schema=UsuarioCreate,
+        fmt=fmt or detect_format(arquivo.filename),
+        report_path=f"{router.prefix}/import",
+    )
+
+
+@router.get("/import/{relatorio_id}")
+@query_budget(0)
+async def relatorio_importacao_usuarios(relatorio_id: str):
+    """Baixar o relatório de erros (linha, erro) de uma importação"""
+    path = report_file("Usuario", relatorio_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado")
+    return FileResponse(
+        path, media_type=MEDIA_TYPES[ExportFormat.CSV], filename=path.name
+    )
 
 
 @router.get("/", response_model=List[UsuarioRead])
-def listar_usuarios(
+@query_budget(2)
+async def listar_usuarios(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None),
     apenas_ativos: bool = Query(False),
-    db: Session = Depends(get_session),
+    fields: Optional[str] = Query(None, description="id,nome,email"),
+    db: DbSession = Depends(get_db),
 ):
     """Listar usuários com filtros opcionais"""
-    if apenas_ativos:
-        return crud_usuario.get_ativos(db=db)
-    else:
-        return crud_usuario.get_multi(db=db, skip=skip, limit=limit)
+    page = await page_or_304(
+        crud_usuario_async,
+        db,
+        request,
+        response,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        filters={"apenas_ativos": apenas_ativos},
+        fields=split_csv(fields),
+    )
+    if isinstance(page, Response):
+        return page
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 
 @router.get("/count")
-def contar_usuarios(db: Session = Depends(get_session)):
-    """Contar total de usuários"""
-    count = crud_usuario.count(db=db)
+@query_budget(3)
+async def contar_usuarios(
+    apenas_ativos: bool = Query(False),
+    approx: bool = Query(False),
+    db: DbSession = Depends(get_db),
+):
+    """Contar usuários (com os mesmos filtros da listagem)"""
+    count = await crud_usuario_async.count(
+        db=db, filters={"apenas_ativos": apenas_ativos}, approx=approx
+    )
     return {"quantidade": count}
 
 
+@router.get("/export")
+async def exportar_usuarios(
+    fmt: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    sort: Optional[str] = Query(None),
+    apenas_ativos: bool = Query(False),
+    fields: Optional[str] = Query(None, description="id,nome,email"),
+    db: DbSession = Depends(get_db),
+):
+    """Exportar usuários em CSV ou NDJSON (streaming, mesmos filtros da listagem)"""
+    filters = {"apenas_ativos": apenas_ativos}
+    body = crud_usuario_async.export(
+        db, fmt=fmt, sort=sort, filters=filters, fields=split_csv(fields)
+    )
+    return export_response(body, fmt, "usuarios")
+
+
 @router.get("/email/{email}", response_model=UsuarioRead)
-def buscar_por_email(email: str, db: Session = Depends(get_session)):
+@query_budget(1)
+async def buscar_por_email(email: str, db: DbSession = Depends(get_db)):
     """Buscar usuário por email"""
-    usuario = crud_usuario.get_by_email(db=db, email=email)
+    usuario = await crud_usuario_async.get_by_email(db=db, email=email)
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return usuario
 
 
 @router.get("/{usuario_id}", response_model=UsuarioRead)
-def buscar_usuario(usuario_id: int, db: Session = Depends(get_session)):
-    """Buscar usuário por ID"""
-    usuario = crud_usuario.get(db=db, id=usuario_id)
+@query_budget(2)
+async def buscar_usuario(
+    usuario_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="id,nome,email"),
+    db: DbSession = Depends(get_db),
+):
+    """Buscar usuário por ID (ETag; 304 se não mudou)"""
+    usuario = await get_or_304(
+        crud_usuario_async,
+        db,
+        request,
+        response,
+        usuario_id,
+        fields=split_csv(fields),
+    )
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return usuario
 
 
 @router.put("/{usuario_id}", response_model=UsuarioRead)
-def atualizar_usuario(
-    usuario_id: int, usuario_update: UsuarioUpdate, db: Session = Depends(get_session)
+@query_budget(3)
+async def atualizar_usuario(
+    usuario_id: int, usuario_update: UsuarioUpdate, db: DbSession = Depends(get_db)
 ):
-    """Atualizar usuário"""
-    usuario = crud_usuario.get(db=db, id=usuario_id)
+    """Atualizar usuário com um único UPDATE ... RETURNING"""
+    usuario = await crud_usuario_async.update_returning(
+        db=db, id=usuario_id, obj_in=usuario_update
+    )
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
-
-    if usuario_update.email and usuario_update.email != usuario.email:
-        existing_user = crud_usuario.get_by_email(db=db, email=usuario_update.email)
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Email já cadastrado")
-
-    if usuario_update.cpf and usuario_update.cpf != usuario.cpf:
-        existing_cpf = crud_usuario.get_by_cpf(db=db, cpf=usuario_update.cpf)
-        if existing_cpf:
-            raise HTTPException(status_code=400, detail="CPF já cadastrado")
-
-    return crud_usuario.update(db=db, db_obj=usuario, obj_in=usuario_update)
+    return usuario
 
 
 @router.delete("/{usuario_id}")
-def deletar_usuario(usuario_id: int, db: Session = Depends(get_session)):
-    """Deletar usuário"""
-    usuario = crud_usuario.remove(db=db, id=usuario_id)
+@query_budget(2)
+async def deletar_usuario(usuario_id: int, db: DbSession = Depends(get_db)):
+    """Deletar usuário (409 se tiver empréstimos)"""
+    usuario = await crud_usuario_async.remove_returning(db=db, id=usuario_id)
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     return {"message": "Usuário deletado com sucesso"}
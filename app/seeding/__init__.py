@@ -0,0 +1,6 @@
+"""Gerador determinístico de dados sintéticos em grande volume
+
+Uso (a partir de app/):
+
+    python -m seeding --perfil benchmark --seed 42
+"""
@@ -0,0 +1,95 @@
+import argparse
+import sys
+import time
+from dataclasses import replace
+from datetime import date
+
+from sqlmodel import SQLModel, create_engine
+
+from config.config import settings
+from crud.search import ensure_search_index
+from seeding.generator import SeedConfig, SeedGenerator
+from seeding.loader import load
+
+# Volumes prontos; qualquer um pode ser sobrescrito pelas opções individuais
+PERFIS = {
+    "dev": SeedConfig(
+        autores=1_000, editoras=100, livros=10_000, usuarios=2_000, emprestimos=40_000
+    ),
+    "benchmark": SeedConfig(
+        autores=50_000,
+        editoras=2_000,
+        livros=1_000_000,
+        usuarios=200_000,
+        emprestimos=4_000_000,
+    ),
+    "capacidade": SeedConfig(
+        autores=200_000,
+        editoras=5_000,
+        livros=5_000_000,
+        usuarios=500_000,
+        emprestimos=20_000_000,
+    ),
+}
+VOLUMES = ("autores", "editoras", "livros", "usuarios", "emprestimos")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m seeding",
+        description="Popula o banco com dados sintéticos determinísticos",
+    )
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--perfil", choices=sorted(PERFIS), default="dev")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--data-referencia",
+        type=date.fromisoformat,
+        help="Dia de referência das datas (AAAA-MM-DD, padrão: hoje)",
+    )
+    for volume in VOLUMES:
+        parser.add_argument(f"--{volume}", type=int)
+    parser.add_argument("--taxa-atraso", type=float)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument(
+        "--criar-tabelas",
+        action="store_true",
+        help="Cria o schema com create_all (sem Alembic), útil em SQLite",
+    )
+    args = parser.parse_args(argv)
+
+    overrides = {name: getattr(args, name) for name in VOLUMES}
+    overrides["taxa_atraso"] = args.taxa_atraso
+    config = replace(
+        PERFIS[args.perfil],
+        seed=args.seed,
+        data_referencia=args.data_referencia,
+        **{name: value for name, value in overrides.items() if value is not None},
+    )
+
+    engine = create_engine(args.database_url)
+    if args.criar_tabelas:
+        SQLModel.metadata.create_all(engine)
+        ensure_search_index(engine)
+
+    def progress(table, rows, seconds):
+        rate = rows / seconds if seconds else 0
+        print(
+            f"{table:<18} {rows:>12,} linhas {seconds:>8.1f}s {rate:>12,.0f}/s",
+            file=sys.stderr,
+        )
+
+    start = time.perf_counter()
+    totals = load(
+        engine, SeedGenerator(config), batch_size=args.batch_size, progress=progress
+    )
+    engine.dispose()
+    print(
+        f"{sum(totals.values()):,} linhas em {time.perf_counter() - start:.1f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+import itertools
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from domain.models import StatusEmprestimo
+
+Row = Tuple
+
+NOMES = (
+    "Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor",
+    "Isabel", "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael",
+    "Sofia", "Tiago", "Vitória", "Yuri",
+)
+SOBRENOMES = (
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Ferreira",
+    "Costa", "Rodrigues", "Almeida", "Nascimento", "Carvalho", "Gomes", "Ribeiro",
+)
+NACIONALIDADES = (
+    "Brasileira", "Portuguesa", "Argentina", "Francesa", "Inglesa",
+    "Norte-americana", "Russa", "Japonesa",
+)
+SUBSTANTIVOS = (
+    "Casa", "Rio", "Cidade", "Noite", "Mar", "Jardim", "Guerra", "Estrada",
+    "Memória", "Sombra", "Ilha", "Montanha", "Carta", "Viagem", "Tempo",
+)
+ADJETIVOS = (
+    "Perdida", "Antiga", "Silenciosa", "Eterna", "Distante", "Escura",
+    "Secreta", "Infinita", "Vermelha", "Última",
+)
+# Gênero e peso relativo no acervo
+GENEROS = (
+    ("romance", 30), ("ficcao", 20), ("tecnico", 15), ("historia", 10),
+    ("poesia", 8), ("biografia", 7), ("infantil", 10),
+)
+
+AUTOR_COLUMNS = (
+    "id", "nome", "nacionalidade", "email", "data_criacao", "atualizado_em",
+)
+EDITORA_COLUMNS = (
+    "id", "nome", "endereco", "telefone", "data_criacao", "atualizado_em",
+)
+LIVRO_COLUMNS = (
+    "id", "titulo", "isbn", "ano_publicacao", "genero", "paginas", "data_criacao",
+    "atualizado_em", "autor_id", "editora_id",
+)
+USUARIO_COLUMNS = (
+    "id", "nome", "email", "telefone", "endereco", "cpf", "data_criacao",
+    "atualizado_em", "ativo",
+)
+EMPRESTIMO_COLUMNS = (
+    "id", "data_emprestimo", "data_devolucao_prevista", "observacoes",
+    "data_devolucao_real", "status", "atualizado_em", "usuario_id",
+)
+LINK_COLUMNS = ("livro_id", "emprestimo_id", "quantidade")
+
+
+@dataclass
+class SeedConfig:
+    """Volumes e proporções do conjunto gerado (mesma seed, mesmos dados)"""
+
+    seed: int = 42
+    # Datas são relativas a este dia (padrão: hoje); seed + data, mesmos dados
+    data_referencia: Optional[date] = None
+    autores: int = 1_000
+    editoras: int = 100
+    livros: int = 10_000
+    usuarios: int = 2_000
+    emprestimos: int = 40_000
+    # Últimos ids de livro que nunca entram em empréstimos (ex.: benchmarks)
+    livros_reservados: int = 0
+    # Janela de datas dos empréstimos e prazo de devolução
+    dias_historico: int = 3 * 365
+    prazo_dias: int = 14
+    # Fração dos empréstimos já vencidos que ainda não foram devolvidos
+    taxa_atraso: float = 0.07
+    # Expoente da popularidade (quanto maior, mais concentrada nos primeiros ids)
+    concentracao: float = 2.0
+
+
+def _skewed(rng: random.Random, n: int, concentracao: float) -> int:
+    """Id em 1..n com popularidade decrescente (cauda longa nos ids altos)"""
+    return 1 + int(n * rng.random() ** concentracao)
+
+
+def _date(value: datetime) -> str:
+    # Mesmo formato que o SQLAlchemy grava no SQLite; isoformat é bem mais
+    # rápido que strftime
+    return value.isoformat(" ", "microseconds")
+
+
+class SeedGenerator:
+    """Gera as linhas de cada tabela como tuplas, sem materializar o conjunto
+
+    Cada tabela usa um Random próprio derivado da seed, de modo que gerar
+    uma tabela não altera as demais. Os empréstimos são gerados em ordem
+    cronológica; os vínculos com livros refazem só a sequência que decide
+    quais empréstimos continuam em aberto.
+    """
+
+    def __init__(self, config: SeedConfig):
+        self.config = config
+        self.agora = datetime.combine(config.data_referencia or date.today(), time())
+        self.criacao = _date(self.agora - timedelta(days=config.dias_historico + 30))
+
+    def _rng(self, tabela: str) -> random.Random:
+        return random.Random(f"{self.config.seed}:{tabela}")
+
+    def autores(self) -> Iterator[Row]:
+        rng = self._rng("autor")
+        for i in range(1, self.config.autores + 1):
+            nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}"
+            email = f"autor{i}@exemplo.com" if rng.random() < 0.6 else None
+            yield (
+                i, nome, rng.choice(NACIONALIDADES), email, self.criacao, self.criacao
+            )
+
+    def editoras(self) -> Iterator[Row]:
+        rng = self._rng("editora")
+        for i in range(1, self.config.editoras + 1):
+            nome = f"Editora {rng.choice(SUBSTANTIVOS)} {i}"
+            telefone = f"(11) 3{rng.randrange(10**7):07d}"
+            endereco = f"Rua {rng.choice(SOBRENOMES)}, {i}"
+            yield (i, nome, endereco, telefone, self.criacao, self.criacao)
+
+    def livros(self) -> Iterator[Row]:
+        cfg = self.config
+        rng = self._rng("livro")
+        generos = [nome for nome, _ in GENEROS]
+        pesos = list(itertools.accumulate(peso for _, peso in GENEROS))
+        ano_max = self.agora.year
+        for i in range(1, cfg.livros + 1):
+            titulo = f"{rng.choice(SUBSTANTIVOS)} {rng.choice(ADJETIVOS)} {i}"
+            # Mais títulos recentes que antigos
+            ano = ano_max - int(150 * rng.random() ** 2.5)
+            yield (
+                i,
+                titulo,
+                f"978{i:010d}",
+                ano,
+                rng.choices(generos, cum_weights=pesos)[0],
+                max(24, int(rng.gauss(280, 120))),
+                self.criacao,
+                self.criacao,
+                _skewed(rng, cfg.autores, 2.0),  # poucos autores muito prolíficos
+                _skewed(rng, cfg.editoras, 1.5),
+            )
+
+    def usuarios(self) -> Iterator[Row]:
+        rng = self._rng("usuario")
+        for i in range(1, self.config.usuarios + 1):
+            nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}"
+            telefone = None
+            if rng.random() < 0.8:
+                telefone = f"(11) 9{rng.randrange(10**8):08d}"
+            endereco = f"Rua {rng.choice(SOBRENOMES)}, {rng.randint(1, 2000)}"
+            ativo = rng.random() < 0.95
+            yield (
+                i,
+                nome,
+                f"usuario{i}@exemplo.com",
+                telefone,
+                endereco,
+                f"{i:011d}",
+                self.criacao,
+                self.criacao,
+                ativo,
+            )
+
+    def _em_aberto(self) -> Iterator[bool]:
+        """Se cada empréstimo (em ordem de id) continua sem devolução
+
+        Sequência própria e barata: os vínculos refazem só esta parte.
+        """
+        cfg = self.config
+        rng = self._rng("emprestimo_status")
+        primeiro_no_prazo = cfg.emprestimos * (cfg.dias_historico - cfg.prazo_dias)
+        primeiro_no_prazo /= cfg.dias_historico
+        for i in range(cfg.emprestimos):
+            # Ainda no prazo: 70% em aberto; vencidos: só os atrasados
+            limite = 0.7 if i >= primeiro_no_prazo else cfg.taxa_atraso
+            yield rng.random() < limite
+
+    def emprestimos(self) -> Iterator[Row]:
+        """Empréstimos em ordem cronológica, espaçados ao longo do histórico"""
+        cfg = self.config
+        rng = self._rng("emprestimo")
+        inicio = self.agora - timedelta(days=cfg.dias_historico)
+        passo = timedelta(days=cfg.dias_historico) / max(cfg.emprestimos, 1)
+        prazo = timedelta(days=cfg.prazo_dias)
+        for i, aberto in enumerate(self._em_aberto()):
+            data = inicio + passo * i
+            prevista = data + prazo
+            if not aberto:
+                status = StatusEmprestimo.DEVOLVIDO.name
+                dias = rng.triangular(1, cfg.prazo_dias + 10, cfg.prazo_dias - 2)
+                devolucao = _date(min(data + timedelta(days=dias), self.agora))
+            elif prevista >= self.agora:
+                status, devolucao = StatusEmprestimo.ATIVO.name, None
+            else:
+                status, devolucao = StatusEmprestimo.ATRASADO.name, None
+            yield (
+                i + 1,
+                _date(data),
+                _date(prevista),
+                None,
+                devolucao,
+                status,
+                devolucao or _date(data),
+                _skewed(rng, cfg.usuarios, 2.0),  # leitores assíduos
+            )
+
+    def livro_emprestimo(self) -> Iterator[Row]:
+        """1 a 3 livros por empréstimo, com livros populares mais emprestados
+
+        Um livro nunca aparece em dois empréstimos em aberto; só os ids dos
+        livros atualmente emprestados ficam em memória.
+        """
+        cfg = self.config
+        rng = self._rng("livro_emprestimo")
+        emprestaveis = cfg.livros - cfg.livros_reservados
+        emprestados = set()
+        for emprestimo_id, aberto in enumerate(self._em_aberto(), start=1):
+            quantidade = rng.choices((1, 2, 3), cum_weights=(60, 90, 100))[0]
+            escolhidos: List[int] = []
+            tentativas = 0
+            while len(escolhidos) < quantidade and tentativas < 20:
+                tentativas += 1
+                livro_id = _skewed(rng, emprestaveis, cfg.concentracao)
+                if livro_id in escolhidos or (aberto and livro_id in emprestados):
+                    continue
+                escolhidos.append(livro_id)
+            if aberto:
+                emprestados.update(escolhidos)
+            for livro_id in escolhidos:
+                yield (livro_id, emprestimo_id, 1)
+
+    def tables(self) -> Sequence[Tuple[str, Sequence[str], Iterator[Row]]]:
+        """(tabela, colunas, linhas) na ordem exigida pelas chaves estrangeiras"""
+        return [
+            ("autor", AUTOR_COLUMNS, self.autores()),
+            ("editora", EDITORA_COLUMNS, self.editoras()),
+            ("livro", LIVRO_COLUMNS, self.livros()),
+            ("usuario", USUARIO_COLUMNS, self.usuarios()),
+            ("emprestimo", EMPRESTIMO_COLUMNS, self.emprestimos()),
+            ("livro_emprestimo", LINK_COLUMNS, self.livro_emprestimo()),
+        ]
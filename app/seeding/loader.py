@@ -0,0 +1,171 @@
+import csv
+import io
+import itertools
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from crud.counters import rebuild_counts
+from crud.rollups import rebuild_rollups
+from crud.search import drop_search_index, ensure_search_index
+from domain.models import Autor, Editora, Emprestimo, Livro, Usuario
+from seeding.generator import Row, SeedGenerator
+
+Progress = Callable[[str, int, float], None]
+
+PLACEHOLDERS = {"qmark": "?", "format": "%s", "pyformat": "%s"}
+# Tabelas com id serial cujo sequence precisa avançar após a carga com ids fixos
+SERIAL_TABLES = ("autor", "editora", "livro", "usuario", "emprestimo")
+
+
+class _CsvStream(io.RawIOBase):
+    """Arquivo somente-leitura que produz CSV sob demanda a partir das linhas
+
+    O COPY lê em blocos; cada bloco é montado só quando pedido, então o
+    conjunto inteiro nunca fica em memória.
+    """
+
+    def __init__(self, rows: Iterator[Row], rows_per_chunk: int = 2000):
+        self._rows = rows
+        self._rows_per_chunk = rows_per_chunk
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def _next_chunk(self) -> bytes:
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerows(itertools.islice(self._rows, self._rows_per_chunk))
+        return out.getvalue().encode("utf-8")
+
+    def readinto(self, buffer) -> int:
+        while len(self._buffer) < len(buffer):
+            chunk = self._next_chunk()
+            if not chunk:
+                break
+            self._buffer += chunk
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class _Counter:
+    """Conta as linhas à medida que o loader as consome"""
+
+    def __init__(self, rows: Iterable[Row]):
+        self.rows = iter(rows)
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+def copy_rows(dbapi_conn, table: str, columns: Sequence[str], rows: Iterable[Row]):
+    """Postgres: COPY ... FROM STDIN alimentado pelo gerador (psycopg2)"""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    with dbapi_conn.cursor() as cursor:
+        cursor.copy_expert(sql, _CsvStream(iter(rows)), size=1 << 20)
+
+
+def insert_rows(
+    dbapi_conn,
+    paramstyle: str,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Row],
+    batch_size: int,
+):
+    """Demais bancos: executemany em lotes, com commit a cada lote"""
+    placeholder = PLACEHOLDERS.get(paramstyle)
+    if placeholder is None:
+        raise NotImplementedError(f"paramstyle não suportado: {paramstyle}")
+    values = ", ".join(placeholder for _ in columns)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values})"
+    rows = iter(rows)
+    cursor = dbapi_conn.cursor()
+    try:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            cursor.executemany(sql, batch)
+            dbapi_conn.commit()
+    finally:
+        cursor.close()
+
+
+def _ensure_empty(engine: Engine, tables: Sequence[str]) -> None:
+    with engine.connect() as conn:
+        for table in tables:
+            if conn.execute(text(f"SELECT 1 FROM {table} LIMIT 1")).first():
+                raise RuntimeError(
+                    f"Tabela {table} não está vazia; a carga usa ids a partir de 1"
+                )
+
+
+def load(
+    engine: Engine,
+    generator: SeedGenerator,
+    *,
+    batch_size: int = 10_000,
+    progress: Optional[Progress] = None,
+) -> Dict[str, int]:
+    """Carrega todas as tabelas do gerador; retorna linhas inseridas por tabela
+
+    COPY no Postgres; executemany em lotes nos demais (no SQLite com
+    synchronous=OFF e o índice FTS5 reconstruído só ao final). Os
+    contadores de entidades são recalculados ao final.
+    """
+    tables = generator.tables()
+    _ensure_empty(engine, [table for table, _, _ in tables])
+    dialect = engine.dialect.name
+    fts = dialect == "sqlite" and inspect(engine).has_table("livro_fts")
+    if fts:
+        drop_search_index(engine)
+    totals: Dict[str, int] = {}
+
+    raw = engine.raw_connection()
+    try:
+        if dialect == "sqlite":
+            raw.execute("PRAGMA synchronous = OFF")
+        for table, columns, rows in tables:
+            start = time.perf_counter()
+            counter = _Counter(rows)
+            if dialect == "postgresql":
+                copy_rows(raw.driver_connection, table, columns, counter)
+                raw.commit()
+            else:
+                insert_rows(
+                    raw, engine.dialect.paramstyle, table, columns, counter, batch_size
+                )
+            totals[table] = counter.count
+            if progress:
+                progress(table, counter.count, time.perf_counter() - start)
+
+        if dialect == "postgresql":
+            with raw.cursor() as cursor:
+                for table in SERIAL_TABLES:
+                    cursor.execute(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                        f"GREATEST((SELECT max(id) FROM {table}), 1))"
+                    )
+                cursor.execute("ANALYZE")
+            raw.commit()
+    finally:
+        if dialect == "sqlite":
+            raw.execute("PRAGMA synchronous = FULL")
+        raw.close()
+
+    if fts:
+        ensure_search_index(engine)
+    with Session(engine) as db:
+        rebuild_counts(db, Autor, Editora, Livro, Usuario, Emprestimo)
+        rebuild_rollups(db)
+    return totals